@@ -1,18 +1,30 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import pickle
 import os
-import json
+import tempfile
+import time
 import requests
-import resend
-from math import radians, sin, cos, sqrt, atan2
 from dotenv import load_dotenv
 import plotly.express as px
 import plotly.graph_objects as go
-from groq import Groq
-
+import pydeck as pdk
+import inference
+from backends import feature_importances
+from predict_memo import PredictionMemo
+from cube import build_signals
+from chart_data import FigureCache, box_summary, stratified_sample
+from ingest import LiveData
+from explorer import Query
+import llm_cache
+import email_report
+from integrations import Integrations
+from ops_ai import OpsAI
+from streaming import StreamBuffer
+import metrics
+from metrics import timer
+
+_rerun_t0 = time.perf_counter()
 load_dotenv()
 
 st.set_page_config(
@@ -228,28 +240,11 @@ section[data-testid="stSidebar"] * { color: var(--tx) !important; }
 # ─────────────────────────────────────────────
 # HELPERS
 # ─────────────────────────────────────────────
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    dlat, dlon = lat2-lat1, lon2-lon1
-    a = sin(dlat/2)**2 + cos(lat1)*cos(lat2)*sin(dlon/2)**2
-    return R * 2 * atan2(sqrt(a), sqrt(1-a))
-
-CITY_MAP = {
-    "BANG":"Bangalore","INDORE":"Indore","COIM":"Coimbatore",
-    "CHEN":"Chennai","HYD":"Hyderabad","RANCH":"Ranchi",
-    "MYS":"Mysore","DELHI":"Delhi","KOLKATA":"Kolkata",
-    "PUNE":"Pune","MUMBAI":"Mumbai","AHMD":"Ahmedabad"
-}
-ORDER_MAP   = {"Buffet":0,"Drinks":1,"Meal":2,"Snack":3}
-VEHICLE_MAP = {"Bicycle":0,"Electric Scooter":1,"Motorcycle":2,"Scooter":3}
 COLORS      = ["#00c8f0","#6d28d9","#f59e0b","#10b981","#ef4444","#ec4899"]
-
-def extract_city(did):
-    did = str(did).upper()
-    for k, v in CITY_MAP.items():
-        if k in did: return v
-    return "Other"
+EXPORT_UI_MAX_ROWS = 500_000  # larger exports: `python explorer.py --out ...`, which never holds the file
+FEATURE_LABELS = {"Delivery_person_Age":"Partner Age", "Delivery_person_Ratings":"Partner Rating",
+                  "distance_km":"Distance", "Type_of_order_encoded":"Order Type",
+                  "Type_of_vehicle_encoded":"Vehicle Type"}
 
 PLOT_BASE = dict(
     paper_bgcolor="rgba(0,0,0,0)",
@@ -267,268 +262,144 @@ PLOT_BASE = dict(
 # ─────────────────────────────────────────────
 @st.cache_resource
 def load_model():
-    base = os.path.dirname(os.path.abspath(__file__))
-    try:
-        m = joblib.load(os.path.join(base, "delivery_time_model.joblib"))
-        f = joblib.load(os.path.join(base, "model_features.joblib"))
-    except FileNotFoundError:
-        with open(os.path.join(base, "delivery_time_model.pkl"), "rb") as fh: m = pickle.load(fh)
-        with open(os.path.join(base, "model_features.pkl"),       "rb") as fh: f = pickle.load(fh)
-    return m, f
+    return inference.load_model()
+
+@st.cache_resource  # one LRU (and optional dense grid) for every session
+def load_memo(_model, features):
+    return PredictionMemo(_model, features, int(os.getenv("PREDICT_MEMO_MAX", 65536)),
+                          float(os.getenv("PREDICT_GRID_KM", 0)) or None)
 
 # ─────────────────────────────────────────────
 # LOAD DATA
 # ─────────────────────────────────────────────
-@st.cache_data
+@st.cache_resource  # one shared, read-only frame; cache_data would pickle a copy per session
 def load_data():
     base = os.path.dirname(os.path.abspath(__file__))
     p = os.path.join(base, "Delivery_Dataset.csv")
     if not os.path.exists(p): return None
 
-    df = pd.read_csv(p)
-    df.columns = df.columns.str.strip()
-    df.rename(columns={"Delivery Time_taken(min)": "Delivery_Time_min"}, inplace=True)
-
-    df["distance_km"] = df.apply(lambda r: haversine(
-        r["Restaurant_latitude"],      r["Restaurant_longitude"],
-        r["Delivery_location_latitude"], r["Delivery_location_longitude"]
-    ), axis=1)
-
-    df = df[df["distance_km"] <= 50].copy()
-    df["City"]            = df["Delivery_person_ID"].apply(extract_city)
-    df["Type_of_vehicle"] = df["Type_of_vehicle"].str.strip().str.title()
-    df["Type_of_order"]   = df["Type_of_order"].str.strip().str.title()
-    return df
-
-model, FEATURES = load_model()
-df_full = load_data()
-
-# ─────────────────────────────────────────────
-# ENV / API KEYS
-# ─────────────────────────────────────────────
-GROQ_API_KEY   = os.getenv("GROQ_API_KEY", "")
-RESEND_API_KEY = os.getenv("RESEND_API_KEY", "")
-RESEND_FROM    = os.getenv("RESEND_FROM_EMAIL", "onboarding@resend.dev")
-if RESEND_API_KEY:
-    resend.api_key = RESEND_API_KEY
-
-# ─────────────────────────────────────────────
-# GROQ / LLAMA CLIENT
-# ─────────────────────────────────────────────
-_GROQ_CLIENT = Groq(api_key=GROQ_API_KEY) if GROQ_API_KEY else None
-_GROQ_MODEL  = "llama-3.3-70b-versatile"
+    return LiveData(p)
 
-def _llama(prompt):
-    response = _GROQ_CLIENT.chat.completions.create(
-        model=_GROQ_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3
-    )
-    return response.choices[0].message.content
+@st.cache_resource  # Analytics figures, shared by every session
+def load_chart_cache():
+    return FigureCache(int(os.getenv("CHART_CACHE_MAX", 256)))
 
+with timer("load_model"):
+    model, FEATURES = load_model()
+    memo = load_memo(model, FEATURES)
+with timer("load_data"):
+    live = load_data()
+    if live is not None:
+        live.poll()  # appends new inbox/ records and merges them into the cube
+    df_full, cube = live.snapshot() if live is not None else (None, None)
+data_version = live.version(df_full) if live is not None else None
+charts = load_chart_cache()
 
 # ─────────────────────────────────────────────
-# AI DECISION
+# GROQ / RESEND CLIENTS
 # ─────────────────────────────────────────────
-def get_ai_decision(signals):
-    if not GROQ_API_KEY:
-        return {"status":"ERROR","reason":"Groq API key not configured.",
-                "immediate_action":"Add GROQ_API_KEY to .env",
-                "long_term_recommendation":"Set up environment variables."}
-
-    delayed_pct = signals.get("delayed_pct", 0)
-    avg_eta     = signals.get("avg_delivery_time_min", 0)
-
-    # Rule-based classification — Llama writes narrative, not the verdict
-    if delayed_pct > 20 or avg_eta > 35:
-        forced_status = "CRITICAL"
-    elif delayed_pct > 10 or avg_eta > 28:
-        forced_status = "WARNING"
-    else:
-        forced_status = "GOOD"
-
-    prompt = f"""You are an elite operations intelligence engine for a food delivery SaaS platform used by operations managers and C-suite executives. Your analysis must be data-driven, specific, and immediately actionable — never generic.
-
-## Live Operations Snapshot
-{json.dumps(signals, indent=2)}
-
-## Classification
-Status is already determined as: {forced_status}
-Do NOT change or override this status.
-
-## Your Task
-Analyze the snapshot above and return a JSON object with exactly these fields:
-
-1. "status" → Must be exactly: "{forced_status}"
-
-2. "reason" → 3 sentences MAX. Must:
-   - Reference AT LEAST 2 specific numbers from the snapshot
-   - Identify the single biggest bottleneck (city, vehicle type, or order type) using the breakdown data provided
-   - State the business impact (customer satisfaction, revenue risk, or retention)
-   - Sound like a McKinsey ops analyst wrote it, not a chatbot
-
-3. "immediate_action" → 1 sentence. Must:
-   - Be executable within 24 hours by an ops manager
-   - Name a specific city or vehicle type pulled from the breakdown data
-   - Start with an action verb (e.g., "Reallocate", "Flag", "Dispatch", "Audit")
-
-4. "long_term_recommendation" → 1 sentence. Must:
-   - Be a strategic initiative (weeks/months horizon)
-   - Reference a specific pattern visible in the breakdown data
-   - Mention expected outcome (e.g., "reduce delayed_pct by ~X%")
+@st.cache_resource
+def load_clients():
+    # one pooled async HTTP client + job pool shared by every session
+    return Integrations()
+
+_CLIENTS = load_clients()
+
+def _start_job(name, fn, *args):
+    """Run fn(*args) in the background; its result lands in st.session_state[name]."""
+    st.session_state.setdefault("_jobs", {})[name] = _CLIENTS.submit(fn, *args)
+
+def _collect_jobs():
+    """Move finished job results into session_state; returns the names still running."""
+    jobs = st.session_state.get("_jobs", {})
+    for name, fut in list(jobs.items()):
+        if fut.done():
+            st.session_state[name] = fut.result()
+            del jobs[name]
+    return set(jobs)
+
+@st.fragment(run_every=0.25)
+def _stream_view(name, render):
+    # re-renders a StreamBuffer's partial output while its job runs
+    render(st.session_state[name])
+
+def _timing_caption(buf):
+    if buf is not None and buf.done:
+        st.markdown(f'<p style="color:#3a4a5c;font-size:11px;margin-top:6px;">first token {buf.ttft:.2f}s &nbsp;·&nbsp; total {buf.total:.2f}s</p>', unsafe_allow_html=True)
+
+def _decision_cards(decision, pending=False):
+    status    = decision.get("status", "ERROR")
+    card_cls  = {"GOOD":"good","WARNING":"warning","CRITICAL":"critical"}.get(status, "neutral")
+    badge_cls = {"GOOD":"badge-good","WARNING":"badge-warning","CRITICAL":"badge-critical"}.get(status, "badge-warning")
+    wait      = "&hellip;" if pending else ""
+
+    st.markdown(f"""
+<div class="ai-wrap">
+  <div class="ai-card {card_cls}">
+    <span class="ai-badge {badge_cls}">{status}</span>
+    <div class="ai-stitle">Analysis</div>
+    <div class="ai-text">{decision.get('reason', wait)}</div>
+  </div>
+  <div class="ai-card {card_cls}">
+    <div class="ai-stitle">Immediate Action</div>
+    <div class="ai-text">{decision.get('immediate_action', wait)}</div>
+  </div>
+  <div class="ai-card {card_cls}">
+    <div class="ai-stitle">Long-Term Strategy</div>
+    <div class="ai-text">{decision.get('long_term_recommendation', wait)}</div>
+  </div>
+</div>""", unsafe_allow_html=True)
 
-## Hard Rules
-- Return STRICT JSON ONLY — no markdown, no explanation outside JSON
-- Every claim must trace back to a number in the snapshot
-- No filler phrases like "it is important to", "we recommend considering", "as shown"
-- If delayed_pct > 15, the reason MUST call it out as a retention risk
-- Use the city-level and vehicle-level breakdown data — do not give generic advice
+def _copilot_card(text):
+    st.markdown(f"""
+<div class="copilot-resp">
+  <div class="ai-stitle" style="color:#00c8f0 !important;">Response</div>
+  <div class="ai-text">{text}</div>
+</div>""", unsafe_allow_html=True)
 
-Return format:
-{{"status":"","reason":"","immediate_action":"","long_term_recommendation":""}}"""
+@st.fragment(run_every=0.5)
+def _await_jobs():
+    # only rendered while jobs are pending; reruns the page once one finishes
+    if any(f.done() for f in st.session_state.get("_jobs", {}).values()):
+        st.rerun()
 
-    try:
-        t = _llama(prompt).replace("```json","").replace("```","").strip()
-        start, end = t.find("{"), t.rfind("}") + 1
-        if start != -1 and end > start:
-            t = t[start:end]
-        result = json.loads(t)
-        result["status"] = forced_status  # enforce — never let model override
-        return result
-    except Exception as e:
-        return {"status": forced_status, "reason": str(e),
-                "immediate_action": "Check Groq API key and response format.",
-                "long_term_recommendation": "Add response validation and retry logic."}
+@st.cache_resource
+def load_ai():
+    # LLM_CACHE=sqlite|memory|off, LLM_CACHE_TTL seconds, LLM_CACHE_MAX entries
+    base = os.path.dirname(os.path.abspath(__file__))
+    return OpsAI(_CLIENTS, llm_cache.from_env(os.path.join(base, ".cache", "llm_cache.sqlite")))
 
+_AI = load_ai()
+_LLM_CACHE = _AI.cache
 
 # ─────────────────────────────────────────────
-# COPILOT
+# METRICS
 # ─────────────────────────────────────────────
-def ask_copilot(question, signals):
-    if not GROQ_API_KEY:
-        return "Groq API key not configured."
-
-    prompt = f"""You are an expert operations analyst for a food delivery platform. You have access to real-time operational data.
-
-## Live Operations Data
-{json.dumps(signals, indent=2)}
-
-## Question from Operations Manager
-{question}
-
-## Instructions
-- Answer in 3-5 sentences MAX
-- You MUST cite at least 2 specific numbers from the data in your answer
-- If the question is about a specific city or vehicle type, pull the exact figure from the breakdown data
-- Give a concrete recommendation at the end of your answer
-- Do not use filler phrases like "Great question" or "Based on the data provided"
-- Write like a senior analyst briefing a VP — direct, confident, specific"""
-
+@st.cache_resource
+def start_metrics_server():
+    # Prometheus text on http://127.0.0.1:METRICS_PORT/metrics (0 disables); one server per process
+    port = int(os.getenv("METRICS_PORT", 9464))
+    if not port:
+        return None
     try:
-        return _llama(prompt)
-    except Exception as e:
-        return f"Error: {e}"
-
+        return metrics.serve(port)
+    except OSError:  # port taken, e.g. a second app process on this host
+        return None
+
+_METRICS_SERVER = start_metrics_server()
+# cache counters are read from each cache's own stats() at scrape time
+metrics.collector("predict_memo", memo.stats)
+metrics.collector("figure_cache", charts.stats)
+metrics.collector("integrations", lambda: _CLIENTS.stats)
+if _LLM_CACHE is not None:
+    metrics.collector("llm_cache", _LLM_CACHE.stats)
 
 # ─────────────────────────────────────────────
-# EMAIL
+# AI DECISION / COPILOT / EMAIL  (ops_ai.py — shared with report_job.py)
 # ─────────────────────────────────────────────
-def send_report_email(to_email: str, decision: dict, signals: dict):
-    if not RESEND_API_KEY:
-        return "Error: Resend API key not configured."
-
-    c_map = {"GOOD":"#10b981","WARNING":"#f59e0b","CRITICAL":"#ef4444","ERROR":"#6b7280"}
-    c = c_map.get(decision.get("status","ERROR"), "#6b7280")
-    s = decision.get("status","N/A")
-
-    # Build city breakdown rows
-    city_rows = ""
-    for city, eta in signals.get("avg_eta_by_city", {}).items():
-        delay = signals.get("delay_rate_by_city", {}).get(city, 0)
-        delay_color = "#ef4444" if delay > 20 else "#f59e0b" if delay > 10 else "#10b981"
-        city_rows += f"""
-        <tr>
-          <td style="padding:10px 14px;color:#e8f0fe;font-size:13px;border-bottom:1px solid #1a2d45;">{city}</td>
-          <td style="padding:10px 14px;color:#00c8f0;font-family:monospace;font-size:13px;border-bottom:1px solid #1a2d45;">{eta} min</td>
-          <td style="padding:10px 14px;font-family:monospace;font-size:13px;border-bottom:1px solid #1a2d45;color:{delay_color};">{delay}%</td>
-        </tr>"""
-
-    # Build vehicle breakdown rows
-    vehicle_rows = ""
-    for vehicle, eta in signals.get("avg_eta_by_vehicle", {}).items():
-        vehicle_rows += f"""
-        <tr>
-          <td style="padding:10px 14px;color:#e8f0fe;font-size:13px;border-bottom:1px solid #1a2d45;">{vehicle}</td>
-          <td style="padding:10px 14px;color:#00c8f0;font-family:monospace;font-size:13px;border-bottom:1px solid #1a2d45;">{eta} min</td>
-        </tr>"""
-
-    html = f"""
-<div style="font-family:Arial,sans-serif;max-width:680px;margin:0 auto;background:#080d18;padding:36px;border-radius:18px;border:1px solid #1a2d45;">
-  <div style="height:3px;background:linear-gradient(90deg,#00c8f0,#6d28d9,#f59e0b);border-radius:3px;margin-bottom:28px;"></div>
-
-  <h1 style="color:#e8f0fe;font-size:22px;margin:0 0 5px 0;font-family:monospace;letter-spacing:-0.5px;">Delivery Performance Report</h1>
-  <p style="color:#7a8fad;font-size:12px;margin:0 0 22px 0;">Smart Delivery AI Platform &nbsp;·&nbsp; Auto-generated alert</p>
-
-  <div style="display:inline-block;background:{c}22;color:{c};padding:5px 18px;border-radius:20px;font-size:11px;font-weight:700;letter-spacing:2px;text-transform:uppercase;border:1px solid {c}55;margin-bottom:26px;font-family:monospace;">{s}</div>
-
-  <!-- KPI row -->
-  <div style="display:flex;gap:12px;margin-bottom:22px;flex-wrap:wrap;">
-    <div style="flex:1;min-width:120px;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:16px 18px;">
-      <div style="color:#7a8fad;font-size:10px;letter-spacing:1.5px;text-transform:uppercase;margin-bottom:6px;">Avg ETA</div>
-      <div style="color:#00c8f0;font-family:monospace;font-size:22px;font-weight:700;">{signals.get('avg_delivery_time_min','—')} min</div>
-    </div>
-    <div style="flex:1;min-width:120px;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:16px 18px;">
-      <div style="color:#7a8fad;font-size:10px;letter-spacing:1.5px;text-transform:uppercase;margin-bottom:6px;">Delayed &gt;35min</div>
-      <div style="color:#ef4444;font-family:monospace;font-size:22px;font-weight:700;">{signals.get('delayed_pct','—')}%</div>
-    </div>
-    <div style="flex:1;min-width:120px;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:16px 18px;">
-      <div style="color:#7a8fad;font-size:10px;letter-spacing:1.5px;text-transform:uppercase;margin-bottom:6px;">Avg Rating</div>
-      <div style="color:#10b981;font-family:monospace;font-size:22px;font-weight:700;">{signals.get('avg_partner_rating','—')}</div>
-    </div>
-    <div style="flex:1;min-width:120px;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:16px 18px;">
-      <div style="color:#7a8fad;font-size:10px;letter-spacing:1.5px;text-transform:uppercase;margin-bottom:6px;">Total Orders</div>
-      <div style="color:#e8f0fe;font-family:monospace;font-size:22px;font-weight:700;">{signals.get('total_deliveries','—'):,}</div>
-    </div>
-  </div>
-
-  <!-- Analysis -->
-  <div style="background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:20px;margin-bottom:14px;">
-    <p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">AI Analysis</p>
-    <p style="color:#e8f0fe;font-size:14px;line-height:1.75;margin:0;">{decision.get('reason','')}</p>
-  </div>
-
-  <!-- Immediate Action -->
-  <div style="background:#0d1525;border:1px solid #1a2d45;border-left:3px solid #f59e0b;border-radius:12px;padding:20px;margin-bottom:14px;">
-    <p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">Immediate Action (24h)</p>
-    <p style="color:#e8f0fe;font-size:14px;line-height:1.75;margin:0;">{decision.get('immediate_action','')}</p>
-  </div>
-
-  <!-- Long-Term -->
-  <div style="background:#0d1525;border:1px solid #1a2d45;border-left:3px solid #00c8f0;border-radius:12px;padding:20px;margin-bottom:22px;">
-    <p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">Long-Term Strategy</p>
-    <p style="color:#e8f0fe;font-size:14px;line-height:1.75;margin:0;">{decision.get('long_term_recommendation','')}</p>
-  </div>
-
-  <!-- City Breakdown Table -->
-  {'<div style="margin-bottom:22px;"><p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">City Breakdown</p><table style="width:100%;border-collapse:collapse;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;overflow:hidden;"><thead><tr><th style="padding:10px 14px;text-align:left;color:#7a8fad;font-size:10px;letter-spacing:1.2px;text-transform:uppercase;border-bottom:1px solid #1a2d45;">City</th><th style="padding:10px 14px;text-align:left;color:#7a8fad;font-size:10px;letter-spacing:1.2px;text-transform:uppercase;border-bottom:1px solid #1a2d45;">Avg ETA</th><th style="padding:10px 14px;text-align:left;color:#7a8fad;font-size:10px;letter-spacing:1.2px;text-transform:uppercase;border-bottom:1px solid #1a2d45;">Delay Rate</th></tr></thead><tbody>' + city_rows + '</tbody></table></div>' if city_rows else ''}
-
-  <!-- Vehicle Breakdown Table -->
-  {'<div style="margin-bottom:22px;"><p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">Vehicle Breakdown</p><table style="width:100%;border-collapse:collapse;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;overflow:hidden;"><thead><tr><th style="padding:10px 14px;text-align:left;color:#7a8fad;font-size:10px;letter-spacing:1.2px;text-transform:uppercase;border-bottom:1px solid #1a2d45;">Vehicle</th><th style="padding:10px 14px;text-align:left;color:#7a8fad;font-size:10px;letter-spacing:1.2px;text-transform:uppercase;border-bottom:1px solid #1a2d45;">Avg ETA</th></tr></thead><tbody>' + vehicle_rows + '</tbody></table></div>' if vehicle_rows else ''}
-
-  <hr style="border:none;border-top:1px solid #1a2d45;margin:0 0 18px 0;"/>
-  <p style="color:#3a4a5c;font-size:11px;margin:0;">Powered by Gradient Boosting ML · Llama 3.3 70B · Smart Delivery AI</p>
-</div>"""
-
-    try:
-        resend.Emails.send({
-            "from":    f"Delivery AI <{RESEND_FROM}>",
-            "to":      [to_email],
-            "subject": f"[{s}] Delivery Performance Alert — Action Required",
-            "html":    html
-        })
-        return f"Report sent to {to_email}"
-    except Exception as e:
-        return f"Error: {e}"
+get_ai_decision   = _AI.decision
+ask_copilot       = _AI.copilot
+send_report_email = _AI.send_report_email
 
 
 # ─────────────────────────────────────────────
@@ -539,25 +410,30 @@ with st.sidebar:
     st.markdown('<div class="sb-sub">Smart Operations Platform</div>', unsafe_allow_html=True)
 
     if df_full is not None:
-        all_cities = sorted(df_full["City"].unique().tolist())
+        all_cities = cube.cities
         selected_cities = st.multiselect(
             "Filter by City", options=all_cities,
             default=all_cities[:5] if len(all_cities) > 5 else all_cities
         )
-        df_filtered = df_full[df_full["City"].isin(selected_cities)] if selected_cities else df_full
+        with timer("city_filter"):
+            df_filtered = df_full[df_full["City"].isin(selected_cities)] if selected_cities else df_full
+        with timer("sidebar_metrics"):
+            kpi = cube.totals(selected_cities)
 
         st.markdown("---")
         st.markdown('<div style="font-size:10px;color:#7a8fad;letter-spacing:1.5px;text-transform:uppercase;margin-bottom:12px;">Live Stats</div>', unsafe_allow_html=True)
-        st.metric("Total Deliveries",  f"{len(df_filtered):,}")
-        st.metric("Avg ETA",           f"{df_filtered['Delivery_Time_min'].mean():.1f} min")
-        st.metric("Delayed (>35 min)", f"{(df_filtered['Delivery_Time_min']>35).mean()*100:.1f}%")
-        st.metric("Avg Distance",      f"{df_filtered['distance_km'].mean():.1f} km")
+        st.metric("Total Deliveries",  f"{kpi['n']:,}")
+        st.metric("Avg ETA",           f"{kpi['avg_time']:.1f} min")
+        st.metric("Delayed (>35 min)", f"{kpi['delayed_pct']:.1f}%")
+        st.metric("Avg Distance",      f"{kpi['avg_distance']:.1f} km")
     else:
         selected_cities = []
         df_filtered = None
         st.warning("Delivery_Dataset.csv not found.")
 
     st.markdown("---")
+    debug_panel = st.toggle("Debug timings", help="Per-stage timings and cache counters (also served as Prometheus text)")
+    debug_slot = st.empty()  # filled at the end of the script, once every stage of this rerun has run
     st.markdown('<p style="font-size:10px;color:#2a3a4c;text-align:center;line-height:1.6;">Gradient Boosting · Llama 3.3 70B via Groq<br>Streamlit · Plotly</p>', unsafe_allow_html=True)
 
 # ─────────────────────────────────────────────
@@ -593,11 +469,7 @@ with tab1:
 
     with right:
         if predict_btn:
-            X_in = pd.DataFrame(
-                [[age, rating, distance, ORDER_MAP[order_type], VEHICLE_MAP[vehicle_type]]],
-                columns=FEATURES
-            )
-            pred = model.predict(X_in)[0]
+            pred = memo.predict_one(age, rating, distance, order_type, vehicle_type)
             if   pred < 25: insight = "Fast delivery expected. High-rated partner and short distance — optimal conditions."
             elif pred < 35: insight = "Moderate delivery time. Consider a higher-rated partner if available."
             else:           insight = "Longer ETA expected. Distance or vehicle type is the primary delay factor."
@@ -622,6 +494,8 @@ with tab1:
     </div>
   </div>
 </div>""", unsafe_allow_html=True)
+            ms = memo.stats()
+            st.markdown(f'<p style="color:#3a4a5c;font-size:11px;margin-top:6px;">Prediction cache &nbsp;·&nbsp; {ms["hits"] + ms["grid_hits"]} hits / {ms["misses"]} misses ({ms["hit_rate"]:.0%}) &nbsp;·&nbsp; {ms["hit_us"]:.0f} µs hit vs {ms["miss_us"]:.0f} µs miss &nbsp;·&nbsp; {ms["entries"]} entries</p>', unsafe_allow_html=True)
         else:
             st.markdown("""
 <div class="pred-card" style="opacity:0.4;">
@@ -631,15 +505,16 @@ with tab1:
 </div>""", unsafe_allow_html=True)
 
         st.markdown('<div class="sh" style="margin-top:2rem;">Model Feature Importance</div>', unsafe_allow_html=True)
-        fi = pd.DataFrame({
-            "Feature":    ["Partner Rating","Distance","Partner Age","Vehicle Type","Order Type"],
-            "Importance": model.feature_importances_
-        }).sort_values("Importance", ascending=True)
-        fig_fi = go.Figure(go.Bar(
-            x=fi["Importance"], y=fi["Feature"], orientation="h",
-            marker=dict(color=COLORS[:len(fi)], line=dict(color="rgba(0,0,0,0)"))
-        ))
-        fig_fi.update_layout(**PLOT_BASE, height=210)
+        with timer("charts_predict"):
+            fi = pd.DataFrame({
+                "Feature":    [FEATURE_LABELS.get(f, f) for f in FEATURES],
+                "Importance": feature_importances(model)
+            }).sort_values("Importance", ascending=True)
+            fig_fi = go.Figure(go.Bar(
+                x=fi["Importance"], y=fi["Feature"], orientation="h",
+                marker=dict(color=COLORS[:len(fi)], line=dict(color="rgba(0,0,0,0)"))
+            ))
+            fig_fi.update_layout(**PLOT_BASE, height=210)
         st.plotly_chart(fig_fi, use_container_width=True)
 
 # ══════════════════════════════════════════════
@@ -652,22 +527,95 @@ with tab2:
         st.markdown('<div class="sh">Overview</div>', unsafe_allow_html=True)
         c1, c2, c3, c4 = st.columns(4)
         for col, lbl, val in [
-            (c1, "Total Records",  f"{len(df_filtered):,}"),
-            (c2, "Cities",         str(df_filtered['City'].nunique())),
-            (c3, "Avg ETA",        f"{df_filtered['Delivery_Time_min'].mean():.1f} min"),
-            (c4, "Avg Distance",   f"{df_filtered['distance_km'].mean():.1f} km"),
+            (c1, "Total Records",  f"{kpi['n']:,}"),
+            (c2, "Cities",         str(kpi['cities'])),
+            (c3, "Avg ETA",        f"{kpi['avg_time']:.1f} min"),
+            (c4, "Avg Distance",   f"{kpi['avg_distance']:.1f} km"),
         ]:
             with col:
                 st.markdown(f'<div class="kpi"><div class="kpi-label">{lbl}</div><div class="kpi-value">{val}</div></div>', unsafe_allow_html=True)
 
-        st.markdown('<div class="sh" style="margin-top:1.6rem;">Raw Data</div>', unsafe_allow_html=True)
+        # ── Dataset Explorer: filters / sort / pages answered by explorer.Explorer on the snapshot ──
+        st.markdown('<div class="sh" style="margin-top:1.6rem;">Dataset Explorer</div>', unsafe_allow_html=True)
+        ex = live.explorer()
+        f1, f2, f3 = st.columns([1.2, 1, 1])
+        with f1:
+            partner = st.text_input("Partner ID contains", placeholder="e.g. BANGRES18")
+        with f2:
+            vehicles = st.multiselect("Vehicle", ex.labels("Type_of_vehicle"))
+        with f3:
+            orders = st.multiselect("Order type", ex.labels("Type_of_order"))
+        f4, f5 = st.columns(2)
+        with f4:
+            rating = st.slider("Partner rating", 1.0, 5.0, (1.0, 5.0), 0.1)
+        with f5:
+            distance = st.slider("Distance (km)", 0.0, 50.0, (0.0, 50.0), 0.5)
+        s1, s2, s3 = st.columns([1.4, 0.8, 0.8])
+        with s1:
+            sort_col = st.selectbox("Sort by", ["(dataset order)"] + ex.sortable)
+        with s2:
+            page_size = st.selectbox("Rows per page", [25, 50, 100, 200], index=1)
+        with s3:
+            desc = st.toggle("Descending", value=True, disabled=sort_col == "(dataset order)")
         default_cols = ["Delivery_person_ID","Delivery_person_Age","Delivery_person_Ratings",
                         "distance_km","Type_of_order","Type_of_vehicle","Delivery_Time_min","City"]
         show_cols = st.multiselect("Columns", options=df_filtered.columns.tolist(), default=default_cols)
-        n_rows    = st.slider("Rows to show", 10, 200, 50, step=10)
-        st.dataframe(df_filtered[show_cols].head(n_rows).reset_index(drop=True),
-                     use_container_width=True, height=420)
-        st.markdown(f'<p style="color:#3a4a5c;font-size:11px;margin-top:6px;">Showing {n_rows} of {len(df_filtered):,} rows &nbsp;·&nbsp; GPS outliers removed (distance > 50 km)</p>', unsafe_allow_html=True)
+
+        q = Query(tuple(selected_cities), partner, tuple(vehicles), tuple(orders),
+                  None if rating == (1.0, 5.0) else rating, None if distance == (0.0, 50.0) else distance,
+                  None if sort_col == "(dataset order)" else sort_col, desc)
+        # cursors of the pages seen so far; a new query / page size / data version starts over
+        if st.session_state.get("ex_query") != (q, page_size, data_version):
+            st.session_state["ex_query"], st.session_state["ex_cursors"] = (q, page_size, data_version), [None]
+        cursors = st.session_state["ex_cursors"]
+        with timer("explorer_page") as tm:
+            page = ex.page(q, cursors[-1], page_size, show_cols)
+        query_ms = tm.elapsed * 1000
+        st.dataframe(page.rows.reset_index(drop=True), use_container_width=True, height=420)
+
+        first = (len(cursors) - 1) * page_size
+        p1, p2, p3 = st.columns([0.6, 0.6, 4])
+        with p1:
+            st.button("← Prev", disabled=len(cursors) == 1, on_click=cursors.pop, use_container_width=True)
+        with p2:
+            st.button("Next →", disabled=page.cursor is None, on_click=cursors.append, args=(page.cursor,),
+                      use_container_width=True)
+        with p3:
+            st.markdown(f'<p style="color:#3a4a5c;font-size:11px;margin-top:10px;">Rows {first + min(1, len(page.rows)):,}–{first + len(page.rows):,} of {page.total:,} matches &nbsp;·&nbsp; query {query_ms:.1f} ms &nbsp;·&nbsp; GPS outliers removed (distance > 50 km)</p>', unsafe_allow_html=True)
+
+        e1, e2 = st.columns([1, 3])
+        with e1:
+            export_fmt = st.radio("Export format", ["CSV.gz", "Parquet"], horizontal=True)
+        with e2:
+            suffix = ".csv.gz" if export_fmt == "CSV.gz" else ".parquet"
+
+            export_key = (q, tuple(show_cols), suffix, data_version)
+
+            def _export(key, q, cols, suffix):
+                # the result is streamed to a temp file chunk by chunk; its bytes are kept for the download
+                fd, path = tempfile.mkstemp(suffix=suffix)
+                os.close(fd)
+                try:
+                    ex.export(q, path, cols)
+                    with open(path, "rb") as fh:
+                        st.session_state["ex_export"] = (key, fh.read())
+                finally:
+                    os.remove(path)
+
+            ready = st.session_state.get("ex_export")
+            if ready is not None and ready[0] == export_key:
+                # the bytes live only until they are served
+                st.download_button(f"Download {page.total:,} rows", ready[1], file_name=f"deliveries{suffix}",
+                                   mime="application/gzip" if suffix == ".csv.gz" else "application/octet-stream",
+                                   on_click=st.session_state.pop, args=("ex_export", None))
+            else:
+                st.session_state.pop("ex_export", None)  # stale: another query, format or data version
+                if page.total > EXPORT_UI_MAX_ROWS:
+                    st.caption(f"{page.total:,} rows is over the {EXPORT_UI_MAX_ROWS:,}-row limit for browser "
+                               "exports; narrow the filters or use `python explorer.py --out`.")
+                else:
+                    st.button(f"Prepare export of {page.total:,} rows", on_click=_export,
+                              args=(export_key, q, show_cols, suffix))
 
 # ══════════════════════════════════════════════
 # TAB 3 — ANALYTICS
@@ -678,92 +626,171 @@ with tab3:
     else:
         st.markdown('<div class="sh">Performance Metrics</div>', unsafe_allow_html=True)
         k1, k2, k3, k4, k5 = st.columns(5)
-        delayed = (df_filtered["Delivery_Time_min"] > 35).mean() * 100
-        fast    = (df_filtered["Delivery_Time_min"] < 25).mean() * 100
         for col, lbl, val in [
-            (k1, "Avg ETA",         f"{df_filtered['Delivery_Time_min'].mean():.1f} min"),
-            (k2, "Delayed >35 min", f"{delayed:.1f}%"),
-            (k3, "Fast <25 min",    f"{fast:.1f}%"),
-            (k4, "Avg Rating",      f"{df_filtered['Delivery_person_Ratings'].mean():.2f}"),
-            (k5, "Median Distance", f"{df_filtered['distance_km'].median():.1f} km"),
+            (k1, "Avg ETA",         f"{kpi['avg_time']:.1f} min"),
+            (k2, "Delayed >35 min", f"{kpi['delayed_pct']:.1f}%"),
+            (k3, "Fast <25 min",    f"{kpi['fast_pct']:.1f}%"),
+            (k4, "Avg Rating",      f"{kpi['avg_rating']:.2f}"),
+            (k5, "Median Distance", f"{cube.sketch('distance', selected_cities).median():.1f} km"),
         ]:
             with col:
                 st.markdown(f'<div class="kpi"><div class="kpi-label">{lbl}</div><div class="kpi-value">{val}</div></div>', unsafe_allow_html=True)
 
         st.markdown("&nbsp;", unsafe_allow_html=True)
 
-        r1a, r1b = st.columns(2, gap="medium")
-        with r1a:
-            fig = px.histogram(df_filtered, x="Delivery_Time_min", nbins=30,
-                               title="Delivery Time Distribution",
-                               color_discrete_sequence=[COLORS[0]])
-            fig.update_layout(**PLOT_BASE, height=290)
-            fig.update_traces(marker_line_color="rgba(0,0,0,0)")
-            st.plotly_chart(fig, use_container_width=True)
-        with r1b:
-            ca = df_filtered.groupby("City")["Delivery_Time_min"].mean().reset_index().sort_values("Delivery_Time_min", ascending=False)
+        # Figures are built from cube sketches / stratified samples and cached per (chart, cities, data version)
+        def _time_hist():
+            edges, counts = cube.sketch("time", selected_cities).histogram(30)
+            fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+                                   marker=dict(color=COLORS[0], line=dict(color="rgba(0,0,0,0)"))))
+            fig.update_layout(**PLOT_BASE, height=290, title="Delivery Time Distribution", bargap=0)
+            fig.update_xaxes(title_text="Delivery_Time_min")
+            fig.update_yaxes(title_text="count")
+            return fig
+
+        def _eta_by_city():
+            ca = cube.breakdown("City", selected_cities)["avg_time"].rename("Delivery_Time_min").reset_index().sort_values("Delivery_Time_min", ascending=False)
             fig = px.bar(ca, x="City", y="Delivery_Time_min", title="Avg ETA by City",
                          color="Delivery_Time_min",
                          color_continuous_scale=["#00c8f0","#6d28d9","#ef4444"])
             fig.update_layout(**PLOT_BASE, height=290, coloraxis_showscale=False)
-            st.plotly_chart(fig, use_container_width=True)
+            return fig
 
-        r2a, r2b = st.columns(2, gap="medium")
-        with r2a:
-            samp = df_filtered.sample(min(3000, len(df_filtered)), random_state=42)
+        def _distance_scatter():
+            samp = stratified_sample(df_filtered, "Type_of_vehicle", 3000, seed=42)
             fig = px.scatter(samp, x="distance_km", y="Delivery_Time_min",
                              color="Type_of_vehicle", title="Distance vs Delivery Time",
                              color_discrete_sequence=COLORS, opacity=0.45)
             fig.update_layout(**PLOT_BASE, height=310)
             fig.update_traces(marker_size=4)
-            st.plotly_chart(fig, use_container_width=True)
-        with r2b:
-            fig = px.box(df_filtered, x="Type_of_vehicle", y="Delivery_Time_min",
-                         title="Delivery Time by Vehicle",
-                         color="Type_of_vehicle", color_discrete_sequence=COLORS)
-            fig.update_layout(**PLOT_BASE, height=310, showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
-
-        r3a, r3b = st.columns(2, gap="medium")
-        with r3a:
-            samp2 = df_filtered.sample(min(2000, len(df_filtered)), random_state=7)
+            return fig
+
+        def _vehicle_box():
+            fig = go.Figure()
+            for i, (vehicle, sk) in enumerate(cube.sketches_by("Type_of_vehicle", "time", selected_cities).items()):
+                b, color = box_summary(sk), COLORS[i % len(COLORS)]
+                fig.add_trace(go.Box(x=[vehicle], q1=[b["q1"]], median=[b["median"]], q3=[b["q3"]],
+                                     lowerfence=[b["lowerfence"]], upperfence=[b["upperfence"]],
+                                     name=vehicle, marker_color=color, boxpoints=False))
+                if b["outliers"]:  # one marker per distinct outlier value, not per row
+                    fig.add_trace(go.Scatter(x=[vehicle] * len(b["outliers"]), y=b["outliers"],
+                                             customdata=b["outlier_counts"], mode="markers", name=vehicle,
+                                             marker=dict(color=color, size=4), showlegend=False,
+                                             hovertemplate="%{y} min · %{customdata} orders<extra></extra>"))
+            fig.update_layout(**PLOT_BASE, height=310, showlegend=False, title="Delivery Time by Vehicle")
+            fig.update_xaxes(title_text="Type_of_vehicle")
+            fig.update_yaxes(title_text="Delivery_Time_min")
+            return fig
+
+        def _rating_scatter():
+            samp2 = stratified_sample(df_filtered, "City", 2000, seed=7)
             fig = px.scatter(samp2, x="Delivery_person_Ratings", y="Delivery_Time_min",
                              color="City", title="Partner Rating vs Delivery Time",
                              color_discrete_sequence=COLORS, opacity=0.45)
             fig.update_layout(**PLOT_BASE, height=290)
             fig.update_traces(marker_size=4)
-            st.plotly_chart(fig, use_container_width=True)
-        with r3b:
-            oa = df_filtered.groupby("Type_of_order")["Delivery_Time_min"].mean().reset_index()
+            return fig
+
+        def _eta_by_order():
+            oa = cube.breakdown("Type_of_order", selected_cities)["avg_time"].rename("Delivery_Time_min").reset_index()
             fig = px.pie(oa, values="Delivery_Time_min", names="Type_of_order",
                          title="Avg ETA by Order Type",
                          color_discrete_sequence=COLORS, hole=0.52)
             fig.update_layout(**PLOT_BASE, height=290)
-            st.plotly_chart(fig, use_container_width=True)
+            return fig
+
+        with timer("charts_analytics") as tm:
+            figs = [charts.get((build.__name__, tuple(sorted(selected_cities)), data_version), build)
+                    for build in (_time_hist, _eta_by_city, _distance_scatter, _vehicle_box, _rating_scatter, _eta_by_order)]
+        chart_ms = tm.elapsed * 1000
+        for i in range(0, len(figs), 2):
+            for col, entry in zip(st.columns(2, gap="medium"), figs[i:i + 2]):
+                with col:
+                    st.plotly_chart(entry.figure, use_container_width=True)
+        cs = charts.stats()
+        st.markdown(f'<p style="color:#3a4a5c;font-size:11px;margin-top:6px;">Chart payload {sum(len(e.json) for e in figs) / 1024:.1f} kB &nbsp;·&nbsp; figures ready in {chart_ms:.1f} ms &nbsp;·&nbsp; figure cache {cs["hits"]} hits / {cs["misses"]} builds &nbsp;·&nbsp; data {data_version}</p>', unsafe_allow_html=True)
+
+        # ── Geo zones: grid heatmap + radius / nearest queries on the snapshot's GeoIndex ──
+        st.markdown('<div class="sh" style="margin-top:1.6rem;">Geo Zones</div>', unsafe_allow_html=True)
+        g1, g2, g3 = st.columns([1, 1, 1.2])
+        with g1:
+            geo_kind = st.selectbox("Locations", ["Pickup (restaurants)", "Drop-off"])
+        with g2:
+            geo_metric = st.selectbox("Color by", ["Delay rate", "Avg ETA", "Orders"])
+        geo = live.geo("pickup" if geo_kind.startswith("Pickup") else "drop")
+        cells = geo.heatmap(selected_cities)
+        if cells.empty:
+            st.info("No geo-located orders for the selected cities.")
+        else:
+            busiest = cells.loc[cells["n"].idxmax()]
+            with g3:
+                q1, q2, q3 = st.columns(3)
+                with q1:
+                    q_lat = st.number_input("Lat", value=round(float(busiest["lat"]), 3), format="%.3f")
+                with q2:
+                    q_lon = st.number_input("Lon", value=round(float(busiest["lon"]), 3), format="%.3f")
+                with q3:
+                    q_km = st.slider("Radius km", 0.5, 10.0, 2.0, 0.5)
+
+            t = time.perf_counter()
+            # same city filter as the map, so the zone cards and table agree with it
+            pos, _ = geo.radius(q_lat, q_lon, q_km, selected_cities)
+            zone = geo.summary(pos)
+            near, near_km = live.geo("pickup").nearest(q_lat, q_lon, k=5, cities=selected_cities)
+            query_us = (time.perf_counter() - t) * 1e6
+
+            col = {"Delay rate": "delayed_pct", "Avg ETA": "avg_time", "Orders": "n"}[geo_metric]
+            v = cells[col].to_numpy(float)
+            z = (v - v.min()) / (np.ptp(v) or 1.0)
+            lo, hi = np.array([0, 200, 240]), np.array([239, 68, 68])  # COLORS[0] -> COLORS[4]
+            rgb = (lo + np.outer(z, hi - lo)).astype(int)
+            cells = cells.assign(r=rgb[:, 0], g=rgb[:, 1], b=rgb[:, 2],
+                                 eta=cells["avg_time"].round(1), late=cells["delayed_pct"].round(1))
+            deck = pdk.Deck(
+                layers=[
+                    pdk.Layer("ScatterplotLayer", cells, get_position=["lon", "lat"], get_radius=450,
+                              get_fill_color="[r, g, b, 170]", pickable=True),
+                    pdk.Layer("ScatterplotLayer", pd.DataFrame({"lat": [q_lat], "lon": [q_lon]}),
+                              get_position=["lon", "lat"], get_radius=q_km * 1000, stroked=True, filled=False,
+                              get_line_color=[245, 158, 11], line_width_min_pixels=2),
+                ],
+                initial_view_state=pdk.ViewState(latitude=q_lat, longitude=q_lon, zoom=10 if selected_cities else 4),
+                map_style="dark",
+                tooltip={"text": "{n} orders · {eta} min avg · {late}% delayed"},
+            )
+            m1, m2 = st.columns([1.6, 1], gap="medium")
+            with m1:
+                st.pydeck_chart(deck, height=380)
+            with m2:
+                z1, z2, z3 = st.columns(3)
+                for c, lbl, val in [
+                    (z1, "Orders in zone", f"{zone['n']:,}"),
+                    (z2, "Avg ETA",        f"{zone['avg_time']:.1f} min" if zone["n"] else "—"),
+                    (z3, "Delayed",        f"{zone['delayed_pct']:.1f}%" if zone["n"] else "—"),
+                ]:
+                    with c:
+                        st.markdown(f'<div class="kpi"><div class="kpi-label">{lbl}</div><div class="kpi-value">{val}</div></div>', unsafe_allow_html=True)
+                st.markdown('<p style="color:#7a8ba0;font-size:12px;margin:12px 0 4px 0;">Nearest restaurants</p>', unsafe_allow_html=True)
+                nearest = live.geo("pickup").points(near)
+                nearest.insert(0, "km", near_km.round(2))
+                st.dataframe(nearest[["km", "City", "n", "avg_time", "delayed_pct"]].round(1),
+                             use_container_width=True, hide_index=True)
+            st.markdown(f'<p style="color:#3a4a5c;font-size:11px;margin-top:6px;">{len(cells):,} cells of {geo.cell_deg:g}° &nbsp;·&nbsp; {len(pos):,} locations within {q_km:g} km &nbsp;·&nbsp; radius + nearest query {query_us:.0f} µs &nbsp;·&nbsp; {geo.skipped:,} rows without coordinates</p>', unsafe_allow_html=True)
 
 # ══════════════════════════════════════════════
 # TAB 4 — AI COPILOT
 # ══════════════════════════════════════════════
 with tab4:
     if df_filtered is not None:
-        signals = {
-            "total_deliveries":      int(len(df_filtered)),
-            "avg_delivery_time_min": round(float(df_filtered["Delivery_Time_min"].mean()), 2),
-            "delayed_pct":           round(float((df_filtered["Delivery_Time_min"] > 35).mean() * 100), 2),
-            "fast_pct":              round(float((df_filtered["Delivery_Time_min"] < 25).mean() * 100), 2),
-            "avg_partner_rating":    round(float(df_filtered["Delivery_person_Ratings"].mean()), 2),
-            "avg_distance_km":       round(float(df_filtered["distance_km"].mean()), 2),
-            "cities_covered":        int(df_filtered["City"].nunique()),
-            "low_rated_partners_pct": round(float((df_filtered["Delivery_person_Ratings"] < 4.0).mean() * 100), 2),
-            "avg_eta_by_vehicle":    df_filtered.groupby("Type_of_vehicle")["Delivery_Time_min"].mean().round(2).to_dict(),
-            "avg_eta_by_city":       df_filtered.groupby("City")["Delivery_Time_min"].mean().round(2).to_dict(),
-            "avg_eta_by_order_type": df_filtered.groupby("Type_of_order")["Delivery_Time_min"].mean().round(2).to_dict(),
-            "delay_rate_by_city":    df_filtered.groupby("City")["Delivery_Time_min"].apply(lambda x: round((x > 35).mean() * 100, 2)).to_dict(),
-        }
+        with timer("signals"):
+            signals = build_signals(cube, selected_cities)
     else:
         signals = {"total_deliveries":1000,"avg_delivery_time_min":27.3,
                    "delayed_pct":8.2,"avg_partner_rating":4.3}
 
+    running = _collect_jobs()
+    stream_mode = st.toggle("Stream responses", value=True,
+                            help="Show Llama output as it is generated instead of waiting for the full reply")
     col_l, col_r = st.columns([1.15, 0.85], gap="large")
 
     # ── LEFT: Analysis + Email ──
@@ -774,53 +801,48 @@ with tab4:
         if "ai_decision" not in st.session_state:
             st.session_state["ai_decision"] = None
 
-        if analyze_btn:
-            with st.spinner("Analyzing..."):
-                st.session_state["ai_decision"] = get_ai_decision(signals)
+        if analyze_btn and "ai_decision" not in running:
+            st.session_state["ai_stream"] = StreamBuffer() if stream_mode else None
+            _start_job("ai_decision", get_ai_decision, signals, st.session_state["ai_stream"])
+            running.add("ai_decision")
 
         decision = st.session_state["ai_decision"]
+        ai_stream = st.session_state.get("ai_stream")
 
-        if decision:
-            status    = decision.get("status", "ERROR")
-            card_cls  = {"GOOD":"good","WARNING":"warning","CRITICAL":"critical"}.get(status, "neutral")
-            badge_cls = {"GOOD":"badge-good","WARNING":"badge-warning","CRITICAL":"badge-critical"}.get(status, "badge-warning")
-
-            st.markdown(f"""
-<div class="ai-wrap">
-  <div class="ai-card {card_cls}">
-    <span class="ai-badge {badge_cls}">{status}</span>
-    <div class="ai-stitle">Analysis</div>
-    <div class="ai-text">{decision.get('reason','')}</div>
-  </div>
-  <div class="ai-card {card_cls}">
-    <div class="ai-stitle">Immediate Action</div>
-    <div class="ai-text">{decision.get('immediate_action','')}</div>
-  </div>
-  <div class="ai-card {card_cls}">
-    <div class="ai-stitle">Long-Term Strategy</div>
-    <div class="ai-text">{decision.get('long_term_recommendation','')}</div>
-  </div>
-</div>""", unsafe_allow_html=True)
+        if "ai_decision" in running:
+            if ai_stream is not None:
+                _stream_view("ai_stream", lambda b: _decision_cards(b.fields, pending=True))
+            else:
+                st.markdown('<div class="ai-card neutral" style="text-align:center;padding:18px 24px;"><div class="ai-text">Analyzing&hellip;</div></div>', unsafe_allow_html=True)
+        elif decision:
+            _decision_cards(decision)
+            _timing_caption(ai_stream)
 
             st.markdown('<div class="sh" style="margin-top:1.4rem;">Send Report via Email</div>', unsafe_allow_html=True)
             email_input = st.text_input(
                 "Recipient Email",
-                placeholder="manager@company.com",
-                help="Full report with city & vehicle breakdowns delivered to this address"
+                placeholder="manager@company.com, ops-leads@company.com",
+                help="Full report with city & vehicle breakdowns delivered to these addresses (comma separated)"
             )
             send_btn = st.button("Send Report", use_container_width=True)
 
             if send_btn:
-                if not email_input or "@" not in email_input:
-                    st.error("Please enter a valid email address.")
+                valid, invalid = email_report.parse_recipients(email_input)
+                if not valid or invalid:
+                    st.error("Please enter valid email addresses." + (f" Invalid: {', '.join(invalid)}" if invalid else ""))
+                elif "email_result" not in running:
+                    _start_job("email_result", send_report_email, email_input, decision, signals)
+                    running.add("email_result")
+
+            result = st.session_state.pop("email_result", None)
+            if "email_result" in running:
+                st.info("Sending report...")
+            elif result:
+                if "Error" in result:
+                    st.error(result)
                 else:
-                    with st.spinner(f"Sending to {email_input}..."):
-                        result = send_report_email(email_input, decision, signals)
-                    if "Error" in result:
-                        st.error(result)
-                    else:
-                        st.success(result)
-        else:
+                    st.success(result)
+        if not decision and "ai_decision" not in running:
             st.markdown("""
 <div class="ai-card neutral" style="text-align:center;padding:40px 24px;opacity:0.6;">
   <div class="ai-stitle" style="margin-bottom:10px;">No analysis yet</div>
@@ -847,14 +869,48 @@ with tab4:
         )
         ask_btn = st.button("Ask AI", use_container_width=True)
 
-        if ask_btn and user_q:
-            with st.spinner("Thinking..."):
-                answer = ask_copilot(user_q, signals)
-            st.markdown(f"""
-<div class="copilot-resp">
-  <div class="ai-stitle" style="color:#00c8f0 !important;">Response</div>
-  <div class="ai-text">{answer}</div>
-</div>""", unsafe_allow_html=True)
+        if ask_btn and user_q and "copilot_answer" not in running:
+            st.session_state["copilot_stream"] = StreamBuffer() if stream_mode else None
+            _start_job("copilot_answer", ask_copilot, user_q, signals, st.session_state["copilot_stream"])
+            running.add("copilot_answer")
+
+        answer = st.session_state.get("copilot_answer")
+        copilot_stream = st.session_state.get("copilot_stream")
+        if "copilot_answer" in running:
+            if copilot_stream is not None:
+                _stream_view("copilot_stream", lambda b: _copilot_card(b.text + "&#9612;" if b.parts else "Thinking&hellip;"))
+            else:
+                st.markdown('<div class="copilot-resp"><div class="ai-text">Thinking&hellip;</div></div>', unsafe_allow_html=True)
+        elif answer:
+            _copilot_card(answer)
+            _timing_caption(copilot_stream)
+
+        if _LLM_CACHE is not None:
+            cs = _LLM_CACHE.stats()
+            st.markdown(f'<p style="color:#3a4a5c;font-size:11px;margin-top:6px;">LLM cache &nbsp;·&nbsp; {cs["hits"]} hits / {cs["misses"]} misses ({cs["hit_rate"]:.0%}) &nbsp;·&nbsp; ~{cs["saved_s"]:.1f}s saved &nbsp;·&nbsp; {cs["entries"]} entries</p>', unsafe_allow_html=True)
 
         st.markdown('<div class="sh" style="margin-top:1.4rem;">Live Context Signals</div>', unsafe_allow_html=True)
-        st.json(signals)
\ No newline at end of file
+        st.json(signals)
+
+    if running:
+        _await_jobs()
+
+# ─────────────────────────────────────────────
+# DEBUG PANEL
+# ─────────────────────────────────────────────
+metrics.observe("stage_seconds", time.perf_counter() - _rerun_t0, stage="rerun")
+if debug_panel:
+    with debug_slot.container():
+        stages = pd.DataFrame([{"stage": r.get("stage") or f'{r.get("service")} HTTP ({r.get("outcome")})',
+                                **{k: r[k] for k in ("calls", "last_ms", "mean_ms", "p95_ms")}}
+                               for r in metrics.snapshot() if r["calls"]]).set_index("stage")
+        st.dataframe(stages.round(2), use_container_width=True)
+        caches = {}
+        for name, s in metrics.REGISTRY.collect().items():
+            if "hits" in s:
+                hits = s["hits"] + s.get("grid_hits", 0)
+                caches[name] = {"hits": hits, "misses": s["misses"], "entries": s.get("entries", 0),
+                                "hit_rate": hits / (hits + s["misses"]) if hits + s["misses"] else 0.0}
+        st.dataframe(pd.DataFrame(caches).T.round(3), use_container_width=True)
+        if _METRICS_SERVER is not None:
+            st.caption(f"Prometheus: http://127.0.0.1:{_METRICS_SERVER.server_address[1]}/metrics")
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Model backends: the estimator families `train.py` can fit and the app can serve.
+
+Both are sklearn boosters over the same five `FEATURES`, scored the same way
+(`predict` on the encoded frame, or `tree_kernel.compile_model` for the flat
+kernel), and stored the same way (`model_registry.Registry.register`):
+
+    gbr   GradientBoostingRegressor      exact splits; the shipped model
+    hist  HistGradientBoostingRegressor  features binned to <= 255 values once,
+                                         so fitting scales with bins, not rows
+
+`feature_importances(model)` works for either, and for registry models. GBR
+reports its impurity-based `feature_importances_`. HistGradientBoosting has
+none, so its importances are each feature's share of the total split gain
+summed over every tree (LightGBM's "gain" importance), normalized to 1.
+
+    b = BACKENDS["hist"]
+    model = b.make(max_iter=300, learning_rate=0.1).fit(X, y)
+    feature_importances(model)        # array aligned with FEATURES
+"""
+from collections import namedtuple
+
+import numpy as np
+
+
+class Backend(namedtuple("Backend", "name estimator base_params grids")):
+    __slots__ = ()
+
+    def make(self, **params):
+        """Unfitted estimator with the backend's base params; `params` override them."""
+        import sklearn.ensemble
+        return getattr(sklearn.ensemble, self.estimator)(**{**self.base_params, **params})
+
+
+BACKENDS = {
+    "gbr": Backend(
+        "gbr", "GradientBoostingRegressor",
+        # the shipped model's loss and seed, plus early stopping
+        {"loss": "squared_error", "random_state": 42, "n_iter_no_change": 10,
+         "validation_fraction": 0.1, "tol": 1e-4},
+        {"default": {"n_estimators": [300], "learning_rate": [0.05, 0.1, 0.2], "max_depth": [3, 4, 5],
+                     "subsample": [1.0, 0.8], "min_samples_leaf": [1, 20]},
+         "quick":   {"n_estimators": [200], "learning_rate": [0.1, 0.2], "max_depth": [3, 4],
+                     "subsample": [1.0], "min_samples_leaf": [1]}}),
+    "hist": Backend(
+        "hist", "HistGradientBoostingRegressor",
+        {"loss": "squared_error", "random_state": 42, "early_stopping": True, "n_iter_no_change": 10,
+         "validation_fraction": 0.1, "tol": 1e-4},
+        {"default": {"max_iter": [500], "learning_rate": [0.05, 0.1, 0.2], "max_leaf_nodes": [15, 31],
+                     "max_depth": [4, 6], "min_samples_leaf": [20, 100], "l2_regularization": [0.0, 1.0]},
+         "quick":   {"max_iter": [300], "learning_rate": [0.1, 0.2], "max_leaf_nodes": [15, 31],
+                     "max_depth": [6], "min_samples_leaf": [20], "l2_regularization": [0.0]}}),
+}
+
+
+def backend_of(model) -> Backend:
+    """Backend of a fitted estimator or a registry model (from its manifest)."""
+    manifest = getattr(model, "manifest", None)
+    name = manifest["backend"].rpartition(".")[2] if manifest else type(model).__name__
+    for b in BACKENDS.values():
+        if b.estimator == name:
+            return b
+    raise TypeError(f"no backend for {name}")
+
+
+def n_trees(model) -> int:
+    """Boosting iterations kept after early stopping."""
+    return int(getattr(model, "n_estimators_", None) or model.n_iter_)
+
+
+def feature_importances(model) -> np.ndarray:
+    """Per-feature importance summing to 1, in the model's feature order, for any backend."""
+    if getattr(model, "feature_importances_", None) is not None:
+        return np.asarray(model.feature_importances_, dtype=np.float64)
+    if not hasattr(model, "_predictors"):
+        raise TypeError(f"no feature importances for {type(model).__name__}")
+    gain = np.zeros(model.n_features_in_)
+    for predictors in model._predictors:
+        for p in predictors:
+            split = p.nodes[p.nodes["is_leaf"] == 0]
+            np.add.at(gain, split["feature_idx"], split["gain"])
+    total = gain.sum()
+    return gain / total if total > 0 else gain
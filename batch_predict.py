@@ -0,0 +1,150 @@
+"""
+Headless batch ETA scoring for large CSV / Parquet order dumps.
+
+Input is read in bounded chunks, each chunk is encoded with the same
+ORDER_MAP / VEHICLE_MAP / FEATURES layout as the Predict tab and scored in
+one vectorized `model.predict` call, and results are streamed to the output
+file as they are produced, so memory stays flat regardless of input size.
+
+    python batch_predict.py orders.csv predictions.csv
+    python batch_predict.py orders.parquet predictions.parquet --chunk-rows 1000000 --keep ID City
+    python batch_predict.py orders.csv.gz predictions.parquet --workers 0   # all cores
+
+Rows need Delivery_person_Age, Delivery_person_Ratings, Type_of_order,
+Type_of_vehicle and either distance_km or the four coordinate columns.
+Parquet in/out requires pyarrow.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from features import encode_features
+from inference import load_model, predict_frame
+from parallel_predict import ParallelScorer
+
+PRED_COL = "predicted_time_min"
+DEFAULT_CHUNK_ROWS = 250_000
+
+
+def _parquet():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet input/output requires pyarrow (pip install pyarrow)") from e
+    return pa, pq
+
+
+def _is_parquet(path):
+    return str(path).lower().endswith((".parquet", ".pq"))
+
+
+def iter_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield DataFrames of at most `chunk_rows` rows from a CSV(.gz) or Parquet file."""
+    if _is_parquet(path):
+        _, pq = _parquet()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunk_rows):
+            chunk.columns = chunk.columns.str.strip()
+            yield chunk
+
+
+class _CsvSink:
+    def __init__(self, path):
+        self.path, self.header = path, True
+
+    def write(self, df):
+        df.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        if self.header:  # empty input still gets a file
+            pd.DataFrame(columns=[PRED_COL]).to_csv(self.path, index=False)
+
+
+class _ParquetSink:
+    def __init__(self, path):
+        self.pa, self.pq = _parquet()
+        self.path, self.writer = path, None
+
+    def write(self, df):
+        table = self.pa.Table.from_pandas(
+            df, schema=self.writer.schema if self.writer else None, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        else:  # empty input still gets a file, as with CSV
+            self.pq.write_table(self.pa.table({PRED_COL: self.pa.array([], self.pa.float64())}), self.path)
+
+
+def open_sink(path):
+    return _ParquetSink(path) if _is_parquet(path) else _CsvSink(path)
+
+
+def predict_chunks(chunks, model, features, keep=("ID",), scorer=None):
+    """Yield one output frame (kept columns + PRED_COL) per input chunk.
+
+    With a `ParallelScorer`, encoded chunks are sharded across its workers
+    instead of being scored in this process.
+    """
+    for chunk in chunks:
+        out = chunk[[c for c in keep if c in chunk.columns]].copy()
+        if scorer is None:
+            out[PRED_COL] = predict_frame(model, features, chunk)
+        else:
+            out[PRED_COL] = scorer.predict(encode_features(chunk, features).to_numpy())
+        yield out
+
+
+def score_file(src, dst, chunk_rows=DEFAULT_CHUNK_ROWS, keep=("ID",),
+               model=None, features=None, log=None, workers=1):
+    """Score `src` into `dst`; returns {"rows", "seconds", "rows_per_sec"}."""
+    if model is None:
+        model, features = load_model()
+    scorer = ParallelScorer(workers, capacity=chunk_rows) if workers > 1 else None
+    sink = open_sink(dst)
+    rows, t0 = 0, time.perf_counter()
+    try:
+        for out in predict_chunks(iter_chunks(src, chunk_rows), model, features, keep, scorer):
+            sink.write(out)
+            rows += len(out)
+            if log:
+                el = time.perf_counter() - t0
+                log(f"  {rows:>14,} rows  {rows / el:>12,.0f} rows/s")
+    finally:
+        sink.close()
+        if scorer is not None:
+            scorer.close()
+    sec = time.perf_counter() - t0
+    return {"rows": rows, "seconds": round(sec, 3), "rows_per_sec": round(rows / sec if sec else 0.0, 1)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Batch ETA prediction over CSV/Parquet files.")
+    ap.add_argument("src", help="input .csv/.csv.gz/.parquet")
+    ap.add_argument("dst", help="output .csv/.parquet")
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    ap.add_argument("--keep", nargs="*", default=["ID"], help="input columns copied to the output")
+    ap.add_argument("-j", "--workers", type=int, default=1,
+                    help="score chunks across this many processes (0 = all cores)")
+    ap.add_argument("-q", "--quiet", action="store_true")
+    args = ap.parse_args(argv)
+
+    log = None if args.quiet else (lambda m: print(m, file=sys.stderr))
+    workers = args.workers or os.cpu_count() or 1
+    stats = score_file(args.src, args.dst, args.chunk_rows, args.keep, log=log, workers=workers)
+    print(f"{stats['rows']:,} rows in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/s) -> {args.dst}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Accuracy, latency and throughput of each `backends` model on Delivery_Dataset.csv.
+
+Both backends are fit on the same cleaned, encoded rows (`train.prepare`)
+and scored on the same held-out fold. "gbr" uses the shipped model's
+settings; "hist" uses HistGradientBoostingRegressor with early stopping.
+Per backend the harness reports:
+
+  * fit time, trees kept, hold-out RMSE / MAE / R²
+  * single-row latency: the Predict tab's DataFrame `predict` and the flat kernel
+  * batch throughput of `predict` (rows/s) at the dataset size and at `--rows`
+  * flat-kernel parity and the backend-neutral `feature_importances`
+
+    python -m benchmarks.bench_backends
+    python -m benchmarks.bench_backends --rows 2000000 --repeat 500
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import train
+from backends import BACKENDS, feature_importances, n_trees
+from tree_kernel import compile_model
+
+CONFIGS = {
+    "gbr":  {"n_estimators": 150, "max_depth": 4, "learning_rate": 0.1, "n_iter_no_change": None},
+    "hist": {"max_iter": 300, "max_depth": 6, "max_leaf_nodes": 31, "learning_rate": 0.1,
+             "min_samples_leaf": 20},
+}
+ATOL = 1e-9
+
+
+def per_call_us(fn, arg, repeat):
+    for _ in range(min(repeat, 50)):
+        fn(arg)
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - t)
+    return np.percentile(times, 50) * 1e6, np.percentile(times, 99) * 1e6
+
+
+def rows_per_s(fn, X, runs=3):
+    best = min(_timed(fn, X) for _ in range(runs))
+    return len(X) / best
+
+
+def _timed(fn, X):
+    t = time.perf_counter()
+    fn(X)
+    return time.perf_counter() - t
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, default=1_000_000, help="rows for the large-batch throughput run")
+    ap.add_argument("--repeat", type=int, default=1000)
+    ap.add_argument("--test-fold", type=int, default=0)
+    args = ap.parse_args()
+
+    X, y, folds, meta = train.load_cached(train.prepare())
+    X = pd.DataFrame(np.asarray(X), columns=meta["features"])
+    y, test = np.asarray(y), np.asarray(folds) == args.test_fold
+    big = pd.concat([X] * -(-args.rows // len(X)), ignore_index=True).iloc[:args.rows]
+    row = X.iloc[[0]]
+    print(f"{(~test).sum():,} train / {test.sum():,} test rows; large batch {len(big):,} rows\n")
+
+    rows, importances = [], {}
+    for name, params in CONFIGS.items():
+        t = time.perf_counter()
+        model = BACKENDS[name].make(**params).fit(X[~test], y[~test])
+        fit_s = time.perf_counter() - t
+        pred = model.predict(X[test])
+        err = pred - y[test]
+        flat = compile_model(model)
+        parity = np.abs(flat.predict(X.to_numpy()) - model.predict(X)).max()
+        assert parity <= ATOL, f"{name}: flat kernel diverges (max abs err {parity:.3g})"
+        sk50, sk99 = per_call_us(model.predict, row, args.repeat)
+        fk50, fk99 = per_call_us(flat.predict, row.to_numpy(), args.repeat)
+        rows.append({
+            "backend": name, "fit s": fit_s, "trees": n_trees(model), "depth": flat.depth,
+            "RMSE": np.sqrt(np.mean(err ** 2)), "MAE": np.mean(np.abs(err)),
+            "R2": 1 - np.sum(err ** 2) / np.sum((y[test] - y[test].mean()) ** 2),
+            "1-row p50 us": sk50, "1-row p99 us": sk99, "flat p50 us": fk50, "flat p99 us": fk99,
+            "rows/s (dataset)": rows_per_s(model.predict, X),
+            "rows/s (large)": rows_per_s(model.predict, big, runs=1),
+            "flat parity": parity,
+        })
+        importances[name] = feature_importances(model)
+
+    table = pd.DataFrame(rows).set_index("backend").T
+    with pd.option_context("display.float_format", lambda v: f"{v:,.0f}" if abs(v) >= 1000 else f"{v:.4g}"):
+        print(table.to_string())
+    print("\nfeature importances (gbr: impurity, hist: split gain)")
+    print(pd.DataFrame(importances, index=meta["features"]).round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
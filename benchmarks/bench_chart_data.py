@@ -0,0 +1,126 @@
+"""
+Analytics-tab chart payloads: figures from raw rows vs `chart_data` summaries.
+
+For the selection sizes the tab sees (the dataset, and the dataset repeated
+`--scale` times to stand in for a much larger history), each chart is built:
+
+  * "raw": the old way. `px.box` / `px.histogram` over every filtered row,
+    and `DataFrame.sample` for the scatter plot.
+  * "summary": quartiles/fences and histogram counts from the cube's time
+    sketches, and `chart_data.stratified_sample` for the scatter plot.
+  * "cached": `FigureCache.get` for an unchanged (chart, cities, version).
+
+Per chart and path the harness reports build time, `to_json` time (what
+Streamlit does on every rerun) and payload bytes (what the browser
+downloads and Plotly.js has to lay out). Box quartiles and fences are
+checked against numpy on the raw rows, and every group must appear in the
+stratified sample.
+
+    python -m benchmarks.bench_chart_data
+    python -m benchmarks.bench_chart_data --scale 50
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+import data_store
+from chart_data import FigureCache, box_summary, stratified_sample
+from cube import StatsCube
+
+Y = "Delivery_Time_min"
+
+
+def raw_box(df, cube):
+    return px.box(df, x="Type_of_vehicle", y=Y, color="Type_of_vehicle")
+
+
+def summary_box(df, cube):
+    fig = go.Figure()
+    for vehicle, sk in cube.sketches_by("Type_of_vehicle", "time").items():
+        b = box_summary(sk)
+        fig.add_trace(go.Box(x=[vehicle], q1=[b["q1"]], median=[b["median"]], q3=[b["q3"]],
+                             lowerfence=[b["lowerfence"]], upperfence=[b["upperfence"]], name=vehicle))
+        fig.add_trace(go.Scatter(x=[vehicle] * len(b["outliers"]), y=b["outliers"],
+                                 customdata=b["outlier_counts"], mode="markers"))
+    return fig
+
+
+def raw_hist(df, cube):
+    return px.histogram(df, x=Y, nbins=30)
+
+
+def summary_hist(df, cube):
+    edges, counts = cube.sketch("time").histogram(30)
+    return go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges)))
+
+
+def raw_scatter(df, cube):
+    return px.scatter(df.sample(min(3000, len(df)), random_state=42), x="distance_km", y=Y, color="Type_of_vehicle")
+
+
+def summary_scatter(df, cube):
+    return px.scatter(stratified_sample(df, "Type_of_vehicle", 3000, seed=42), x="distance_km", y=Y,
+                      color="Type_of_vehicle")
+
+
+CHARTS = {"box": (raw_box, summary_box), "histogram": (raw_hist, summary_hist),
+          "scatter": (raw_scatter, summary_scatter)}
+
+
+def measure(build, df, cube, repeat):
+    builds, dumps = [], []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fig = build(df, cube)
+        t1 = time.perf_counter()
+        js = fig.to_json()
+        builds.append(t1 - t)
+        dumps.append(time.perf_counter() - t1)
+    return np.median(builds) * 1000, np.median(dumps) * 1000, len(js)
+
+
+def check_box(df, cube):
+    for vehicle, sk in cube.sketches_by("Type_of_vehicle", "time").items():
+        y = df.loc[df["Type_of_vehicle"] == vehicle, Y].to_numpy(np.float64)
+        b = box_summary(sk)
+        q1, med, q3 = np.percentile(y, [25, 50, 75])
+        inside = y[(y >= q1 - 1.5 * (q3 - q1)) & (y <= q3 + 1.5 * (q3 - q1))]
+        assert (b["q1"], b["median"], b["q3"]) == (q1, med, q3), vehicle
+        assert (b["lowerfence"], b["upperfence"]) == (inside.min(), inside.max()), vehicle
+        assert sum(b["outlier_counts"]) == len(y) - len(inside), vehicle
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--scale", type=int, default=20, help="also run on the dataset repeated this many times")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    base = data_store.load_clean_frame()
+    print(f"{'rows':>10} {'chart':<10} {'path':<8} {'build ms':>9} {'to_json ms':>10} {'payload kB':>11}")
+    for scale in sorted({1, args.scale}):
+        df = pd.concat([base] * scale, ignore_index=True) if scale > 1 else base
+        cube = StatsCube.build(df)
+        check_box(df, cube)
+        s = stratified_sample(df, "City", 2000)
+        assert set(s["City"]) == set(df["City"]), "every city should be in the sample"
+        for name, (raw, summary) in CHARTS.items():
+            cache = FigureCache()
+            cache.get(name, lambda: summary(df, cube))
+            t = time.perf_counter()
+            for _ in range(100):
+                cached = cache.get(name, lambda: summary(df, cube))
+            hit_ms = (time.perf_counter() - t) * 10
+            for path, fn in (("raw", raw), ("summary", summary)):
+                b, d, n = measure(fn, df, cube, args.repeat)
+                print(f"{len(df):>10,} {name:<10} {path:<8} {b:>9.1f} {d:>10.1f} {n / 1024:>11.1f}")
+            print(f"{len(df):>10,} {name:<10} {'cached':<8} {hit_ms:>9.3f} {'-':>10} {len(cached.json) / 1024:>11.1f}")
+    print("\nbox quartiles/fences match numpy on the raw rows; stratified samples cover every city")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Email report rendering and bulk fan-out against the fake Resend server.
+
+  * parity: `email_report.render_report` matches the old inline `+=` renderer
+  * render cost: old renderer vs templates (with escaping) vs memoized snapshot;
+    all are tens of µs, the win is rendering once per snapshot, not per recipient
+  * fan-out: N recipients via /emails/batch under a rate limit vs one
+    /emails request per recipient; request spacing respects the limit
+  * per-recipient status with transient failures, hangs and bad addresses
+  * re-running with the same run_id delivers nothing twice
+
+    python -m benchmarks.bench_email
+    python -m benchmarks.bench_email --recipients 200 --batch-size 50 --rate 2
+"""
+import argparse
+import time
+
+from benchmarks.fake_apis import FakeApis
+from cube import StatsCube, build_signals
+from data_store import load_clean_frame
+from email_report import _render, bulk_send, render_report, summarize
+from integrations import Integrations, RateLimiter
+
+DECISION = {"status": "WARNING",
+            "reason": "26.3 min average ETA with 17.6% delayed is a retention risk; Motorcycle is the bottleneck.",
+            "immediate_action": "Reallocate evening motorcycle capacity to scooters in Hyderabad.",
+            "long_term_recommendation": "Rebalance the fleet mix to reduce delayed_pct by ~3%."}
+SENDER = "Delivery AI <ops@example.com>"
+
+
+def legacy_render(decision, signals):
+    """The inline renderer `send_report_email` used before, verbatim."""
+    c_map = {"GOOD":"#10b981","WARNING":"#f59e0b","CRITICAL":"#ef4444","ERROR":"#6b7280"}
+    c = c_map.get(decision.get("status","ERROR"), "#6b7280")
+    s = decision.get("status","N/A")
+
+    # Build city breakdown rows
+    city_rows = ""
+    for city, eta in signals.get("avg_eta_by_city", {}).items():
+        delay = signals.get("delay_rate_by_city", {}).get(city, 0)
+        delay_color = "#ef4444" if delay > 20 else "#f59e0b" if delay > 10 else "#10b981"
+        city_rows += f"""
+        <tr>
+          <td style="padding:10px 14px;color:#e8f0fe;font-size:13px;border-bottom:1px solid #1a2d45;">{city}</td>
+          <td style="padding:10px 14px;color:#00c8f0;font-family:monospace;font-size:13px;border-bottom:1px solid #1a2d45;">{eta} min</td>
+          <td style="padding:10px 14px;font-family:monospace;font-size:13px;border-bottom:1px solid #1a2d45;color:{delay_color};">{delay}%</td>
+        </tr>"""
+
+    # Build vehicle breakdown rows
+    vehicle_rows = ""
+    for vehicle, eta in signals.get("avg_eta_by_vehicle", {}).items():
+        vehicle_rows += f"""
+        <tr>
+          <td style="padding:10px 14px;color:#e8f0fe;font-size:13px;border-bottom:1px solid #1a2d45;">{vehicle}</td>
+          <td style="padding:10px 14px;color:#00c8f0;font-family:monospace;font-size:13px;border-bottom:1px solid #1a2d45;">{eta} min</td>
+        </tr>"""
+
+    html = f"""
+<div style="font-family:Arial,sans-serif;max-width:680px;margin:0 auto;background:#080d18;padding:36px;border-radius:18px;border:1px solid #1a2d45;">
+  <div style="height:3px;background:linear-gradient(90deg,#00c8f0,#6d28d9,#f59e0b);border-radius:3px;margin-bottom:28px;"></div>
+
+  <h1 style="color:#e8f0fe;font-size:22px;margin:0 0 5px 0;font-family:monospace;letter-spacing:-0.5px;">Delivery Performance Report</h1>
+  <p style="color:#7a8fad;font-size:12px;margin:0 0 22px 0;">Smart Delivery AI Platform &nbsp;·&nbsp; Auto-generated alert</p>
+
+  <div style="display:inline-block;background:{c}22;color:{c};padding:5px 18px;border-radius:20px;font-size:11px;font-weight:700;letter-spacing:2px;text-transform:uppercase;border:1px solid {c}55;margin-bottom:26px;font-family:monospace;">{s}</div>
+
+  <!-- KPI row -->
+  <div style="display:flex;gap:12px;margin-bottom:22px;flex-wrap:wrap;">
+    <div style="flex:1;min-width:120px;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:16px 18px;">
+      <div style="color:#7a8fad;font-size:10px;letter-spacing:1.5px;text-transform:uppercase;margin-bottom:6px;">Avg ETA</div>
+      <div style="color:#00c8f0;font-family:monospace;font-size:22px;font-weight:700;">{signals.get('avg_delivery_time_min','—')} min</div>
+    </div>
+    <div style="flex:1;min-width:120px;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:16px 18px;">
+      <div style="color:#7a8fad;font-size:10px;letter-spacing:1.5px;text-transform:uppercase;margin-bottom:6px;">Delayed &gt;35min</div>
+      <div style="color:#ef4444;font-family:monospace;font-size:22px;font-weight:700;">{signals.get('delayed_pct','—')}%</div>
+    </div>
+    <div style="flex:1;min-width:120px;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:16px 18px;">
+      <div style="color:#7a8fad;font-size:10px;letter-spacing:1.5px;text-transform:uppercase;margin-bottom:6px;">Avg Rating</div>
+      <div style="color:#10b981;font-family:monospace;font-size:22px;font-weight:700;">{signals.get('avg_partner_rating','—')}</div>
+    </div>
+    <div style="flex:1;min-width:120px;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:16px 18px;">
+      <div style="color:#7a8fad;font-size:10px;letter-spacing:1.5px;text-transform:uppercase;margin-bottom:6px;">Total Orders</div>
+      <div style="color:#e8f0fe;font-family:monospace;font-size:22px;font-weight:700;">{signals.get('total_deliveries','—'):,}</div>
+    </div>
+  </div>
+
+  <!-- Analysis -->
+  <div style="background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:20px;margin-bottom:14px;">
+    <p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">AI Analysis</p>
+    <p style="color:#e8f0fe;font-size:14px;line-height:1.75;margin:0;">{decision.get('reason','')}</p>
+  </div>
+
+  <!-- Immediate Action -->
+  <div style="background:#0d1525;border:1px solid #1a2d45;border-left:3px solid #f59e0b;border-radius:12px;padding:20px;margin-bottom:14px;">
+    <p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">Immediate Action (24h)</p>
+    <p style="color:#e8f0fe;font-size:14px;line-height:1.75;margin:0;">{decision.get('immediate_action','')}</p>
+  </div>
+
+  <!-- Long-Term -->
+  <div style="background:#0d1525;border:1px solid #1a2d45;border-left:3px solid #00c8f0;border-radius:12px;padding:20px;margin-bottom:22px;">
+    <p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">Long-Term Strategy</p>
+    <p style="color:#e8f0fe;font-size:14px;line-height:1.75;margin:0;">{decision.get('long_term_recommendation','')}</p>
+  </div>
+
+  <!-- City Breakdown Table -->
+  {'<div style="margin-bottom:22px;"><p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">City Breakdown</p><table style="width:100%;border-collapse:collapse;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;overflow:hidden;"><thead><tr><th style="padding:10px 14px;text-align:left;color:#7a8fad;font-size:10px;letter-spacing:1.2px;text-transform:uppercase;border-bottom:1px solid #1a2d45;">City</th><th style="padding:10px 14px;text-align:left;color:#7a8fad;font-size:10px;letter-spacing:1.2px;text-transform:uppercase;border-bottom:1px solid #1a2d45;">Avg ETA</th><th style="padding:10px 14px;text-align:left;color:#7a8fad;font-size:10px;letter-spacing:1.2px;text-transform:uppercase;border-bottom:1px solid #1a2d45;">Delay Rate</th></tr></thead><tbody>' + city_rows + '</tbody></table></div>' if city_rows else ''}
+
+  <!-- Vehicle Breakdown Table -->
+  {'<div style="margin-bottom:22px;"><p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">Vehicle Breakdown</p><table style="width:100%;border-collapse:collapse;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;overflow:hidden;"><thead><tr><th style="padding:10px 14px;text-align:left;color:#7a8fad;font-size:10px;letter-spacing:1.2px;text-transform:uppercase;border-bottom:1px solid #1a2d45;">Vehicle</th><th style="padding:10px 14px;text-align:left;color:#7a8fad;font-size:10px;letter-spacing:1.2px;text-transform:uppercase;border-bottom:1px solid #1a2d45;">Avg ETA</th></tr></thead><tbody>' + vehicle_rows + '</tbody></table></div>' if vehicle_rows else ''}
+
+  <hr style="border:none;border-top:1px solid #1a2d45;margin:0 0 18px 0;"/>
+  <p style="color:#3a4a5c;font-size:11px;margin:0;">Powered by Gradient Boosting ML · Llama 3.3 70B · Smart Delivery AI</p>
+</div>"""
+    return html
+
+
+def send_singly(clients, report, recipients, rate):
+    """The old path: one /emails request per recipient."""
+    async def run():
+        limiter = RateLimiter(rate)
+        for addr in recipients:
+            await limiter.acquire()
+            await clients.resend_send("k", {"from": SENDER, "to": [addr],
+                                            "subject": report.subject, "html": report.html})
+    clients.call(run(), timeout=len(recipients) / rate + 60)
+
+
+def per_call_us(fn, n):
+    t = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t) / n * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--recipients", type=int, default=60)
+    ap.add_argument("--batch-size", type=int, default=10)
+    ap.add_argument("--rate", type=float, default=10, help="requests / second")
+    ap.add_argument("--latency-ms", type=float, default=50)
+    args = ap.parse_args()
+
+    signals = build_signals(StatsCube.build(load_clean_frame()))
+    report = render_report(DECISION, signals)
+    assert report.html == legacy_render(DECISION, signals), "template output differs from the old renderer"
+    print(f"render ({len(report.html):,} chars, parity OK), µs per call:")
+    for label, fn in [("old inline +=", lambda: legacy_render(DECISION, signals)),
+                      ("templates + escaping", lambda: _render(DECISION, signals, report.key)),
+                      ("memoized snapshot", lambda: render_report(DECISION, signals))]:
+        print(f"  {label:<22} {per_call_us(fn, 500):8.1f}")
+
+    people = [f"user{i}@example.com" for i in range(args.recipients)]
+    lat = args.latency_ms / 1000
+    print(f"\nfan-out: {args.recipients} recipients, batch {args.batch_size}, {args.rate:g} req/s, "
+          f"upstream {args.latency_ms:g} ms")
+    print(f"  {'scenario':<22} {'requests':>8} {'wall s':>7} {'min gap s':>9}  status")
+    scenarios = [
+        ("one request each",  dict(latency_s=lat), None),
+        ("batched",           dict(latency_s=lat), {}),
+        ("batched, 30% 503",  dict(latency_s=lat, fail_rate=0.3), dict(backoff=0.05, retries=6)),
+        ("batched, hang",     dict(latency_s=lat, hang_rate=1.0), dict(timeout=0.3, retries=0)),
+    ]
+    for name, fake_kw, client_kw in scenarios:
+        with FakeApis(**fake_kw) as fake:
+            clients = Integrations(fake.groq_url, fake.resend_url, **(client_kw or {}))
+            t = time.perf_counter()
+            if client_kw is None:
+                send_singly(clients, report, people, args.rate)
+                status = {"sent": len(fake.emails)}
+            else:
+                status = summarize(bulk_send(clients, "k", SENDER, report, people + ["not-an-address"],
+                                             batch_size=args.batch_size, rate=args.rate))
+            wall = time.perf_counter() - t
+            times = fake.request_times
+            gap = min((b - a for a, b in zip(times, times[1:])), default=float("nan"))
+            print(f"  {name:<22} {len(times):>8} {wall:>7.2f} {gap:>9.3f}  {status}")
+            if client_kw is not None and "hang" not in name:
+                assert status == {"sent": args.recipients, "invalid": 1}, status
+                assert len(fake.emails) == args.recipients
+            if name == "batched":
+                assert gap >= 0.9 / args.rate, "rate limit not respected"
+            if "hang" in name:
+                assert status == {"failed": args.recipients, "invalid": 1}, status
+            clients.close()
+
+    with FakeApis(latency_s=lat) as fake:
+        clients = Integrations(fake.groq_url, fake.resend_url)
+        for _ in range(2):
+            bulk_send(clients, "k", SENDER, report, people, batch_size=args.batch_size,
+                      rate=args.rate * 10, run_id="daily-2026-01-01")
+        print(f"  same run_id twice: {len(fake.requests)} requests -> {len(fake.emails)} delivered")
+        assert len(fake.emails) == args.recipients, "re-run must reuse the idempotency keys"
+        clients.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Dataset Explorer queries: `explorer.Explorer` vs pandas filter + sort_values + head.
+
+On the dataset repeated `--scale` times, for a few typical queries (the
+whole history, a partner search, a narrowed filter set):
+
+  * first page: pandas boolean mask + `sort_values` + `head` vs `Explorer.page`
+    (cold, i.e. filter + sort key built, and warm)
+  * a page deep into the result, by cursor
+  * streamed export to CSV.gz and Parquet: rows/s and peak traced memory,
+    vs materializing the sorted result and writing it in one call (pandas'
+    defaults, so gzip level 9 against the export's level 6)
+
+Every Explorer page is checked against the pandas result first.
+
+    python -m benchmarks.bench_explorer
+    python -m benchmarks.bench_explorer --scale 50 --page-size 100
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import data_store
+from explorer import Explorer, Query
+
+COLUMNS = ["Delivery_person_ID", "Delivery_person_Ratings", "distance_km", "Type_of_vehicle",
+           "Delivery_Time_min", "City"]
+QUERIES = {
+    "all, by time desc":   Query(sort="Delivery_Time_min", desc=True),
+    "partner search":      Query(partner="BANGRES1", sort="distance_km"),
+    "filters, by rating":  Query(cities=("Bangalore", "Chennai"), vehicles=("Scooter",), orders=("Meal", "Snack"),
+                                 rating=(4.5, 5.0), distance=(2.0, 15.0), sort="Delivery_person_Ratings"),
+}
+
+
+def pandas_result(df, q):
+    m = np.ones(len(df), dtype=bool)
+    for field, col in (("cities", "City"), ("vehicles", "Type_of_vehicle"), ("orders", "Type_of_order")):
+        if getattr(q, field):
+            m &= df[col].isin(getattr(q, field)).to_numpy()
+    if q.partner:
+        m &= df["Delivery_person_ID"].astype(str).str.upper().str.contains(q.partner.upper()).to_numpy()
+    for field, col in (("rating", "Delivery_person_Ratings"), ("distance", "distance_km")):
+        if getattr(q, field):
+            m &= df[col].between(*getattr(q, field)).to_numpy()
+    return df[m].sort_values(q.sort, ascending=not q.desc, kind="stable")
+
+
+def ms(fn, repeat=3):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000, out
+
+
+def traced(fn):
+    """(seconds untraced, peak traced MB of a second run); tracing slows pandas' writers several-fold."""
+    t = time.perf_counter()
+    fn()
+    sec = time.perf_counter() - t
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return sec, peak / 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--scale", type=int, default=20)
+    ap.add_argument("--page-size", type=int, default=50)
+    ap.add_argument("--deep-page", type=int, default=100, help="page number for the cursor test")
+    args = ap.parse_args()
+
+    base = data_store.load_clean_frame()
+    df = pd.concat([base] * args.scale, ignore_index=True)
+    print(f"{len(df):,} rows ({args.scale}x dataset), page size {args.page_size}\n")
+    print(f"{'query':<20} {'matches':>9} {'pandas ms':>10} {'cold ms':>8} {'warm ms':>8} "
+          f"{'page ' + str(args.deep_page) + ' ms':>12}")
+    for name, q in QUERIES.items():
+        pd_ms, ref = ms(lambda: pandas_result(df, q).head(args.page_size)[COLUMNS])
+        ex = Explorer(df)
+        t = time.perf_counter()
+        page = ex.page(q, size=args.page_size, columns=COLUMNS)
+        cold = (time.perf_counter() - t) * 1000
+        warm, page = ms(lambda: ex.page(q, size=args.page_size, columns=COLUMNS))
+        assert page.rows.index.equals(ref.index), name
+
+        full = pandas_result(df, q)
+        cursor, n = None, 0
+        for _ in range(args.deep_page - 1):
+            p = ex.page(q, cursor, args.page_size)
+            cursor, n = p.cursor, n + len(p.rows)
+            if cursor is None:
+                break
+        deep = float("nan")
+        if cursor is not None:
+            deep, p = ms(lambda: ex.page(q, cursor, args.page_size, COLUMNS))
+            assert p.rows.index.equals(full.index[n:n + args.page_size]), name
+        print(f"{name:<20} {page.total:>9,} {pd_ms:>10.1f} {cold:>8.1f} {warm:>8.2f} {deep:>12.2f}")
+
+    q = QUERIES["all, by time desc"]
+    ex = Explorer(df)
+    print(f"\nexport of all {len(df):,} rows sorted by time, {len(COLUMNS)} columns")
+    print(f"{'path':<24} {'seconds':>8} {'rows/s':>11} {'peak MB':>8} {'file MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for suffix in (".csv.gz", ".parquet"):
+            path = os.path.join(tmp, "out" + suffix)
+            sec, peak = traced(lambda: ex.export(q, path, COLUMNS))
+            print(f"{'streamed ' + suffix:<24} {sec:>8.2f} {len(df) / sec:>11,.0f} {peak:>8.1f} "
+                  f"{os.path.getsize(path) / 1e6:>8.1f}")
+            back = pd.read_parquet(path) if suffix == ".parquet" else pd.read_csv(path)
+            assert len(back) == len(df) and back["Delivery_Time_min"].is_monotonic_decreasing
+            path = os.path.join(tmp, "whole" + suffix)
+            write = (lambda p=path: pandas_result(df, q)[COLUMNS].to_parquet(p, index=False)) if suffix == ".parquet" \
+                else (lambda p=path: pandas_result(df, q)[COLUMNS].to_csv(p, index=False))
+            sec, peak = traced(write)
+            print(f"{'materialized ' + suffix:<24} {sec:>8.2f} {len(df) / sec:>11,.0f} {peak:>8.1f} "
+                  f"{os.path.getsize(path) / 1e6:>8.1f}")
+    print("\nall Explorer pages match pandas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Old row-wise `load_data` feature path vs. the vectorized `features.clean_frame`.
+
+Rows are produced by tiling Delivery_Dataset.csv up to each target size.
+
+    python -m benchmarks.bench_features
+    python -m benchmarks.bench_features --sizes 45000 1000000 --legacy-max 1000000
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from features import haversine, extract_city, clean_frame
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def legacy_clean(df):
+    df.columns = df.columns.str.strip()
+    df.rename(columns={"Delivery Time_taken(min)": "Delivery_Time_min"}, inplace=True)
+    df["distance_km"] = df.apply(lambda r: haversine(
+        r["Restaurant_latitude"],      r["Restaurant_longitude"],
+        r["Delivery_location_latitude"], r["Delivery_location_longitude"]
+    ), axis=1)
+    df = df[df["distance_km"] <= 50].copy()
+    df["City"]            = df["Delivery_person_ID"].apply(extract_city)
+    df["Type_of_vehicle"] = df["Type_of_vehicle"].str.strip().str.title()
+    df["Type_of_order"]   = df["Type_of_order"].str.strip().str.title()
+    return df
+
+
+def tiled(raw, n):
+    reps = -(-n // len(raw))
+    return pd.concat([raw] * reps, ignore_index=True).iloc[:n].copy()
+
+
+def timed(fn, df):
+    t = time.perf_counter()
+    out = fn(df)
+    return out, time.perf_counter() - t
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[45_000, 1_000_000, 10_000_000])
+    ap.add_argument("--legacy-max", type=int, default=1_000_000,
+                    help="skip the row-wise path above this many rows")
+    args = ap.parse_args()
+
+    raw = pd.read_csv(os.path.join(BASE, "Delivery_Dataset.csv"))
+    print(f"{'rows':>12} {'legacy s':>10} {'vector s':>10} {'speedup':>9}")
+    for n in args.sizes:
+        src = tiled(raw, n)
+        new, t_new = timed(clean_frame, src.copy())
+        if n <= args.legacy_max:
+            old, t_old = timed(legacy_clean, src.copy())
+            pd.testing.assert_frame_equal(old, new)
+            print(f"{n:>12,} {t_old:>10.3f} {t_new:>10.3f} {t_old / t_new:>8.1f}x")
+        else:
+            print(f"{n:>12,} {'skipped':>10} {t_new:>10.3f} {'-':>9}")
+        del src, new
+
+
+if __name__ == "__main__":
+    main()
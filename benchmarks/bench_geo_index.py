@@ -0,0 +1,96 @@
+"""
+Radius, bounding-box and nearest-neighbour queries: `geo_index.GeoIndex` vs a full-frame scan.
+
+Query centers are drawn from the dataset's own restaurant locations, jittered by up
+to ~3 km, so most queries land in a dense area. Per index kind ("pickup" and "drop"):
+
+  * build time of the index (the Analytics tab pays it once per snapshot)
+  * radius query + zone summary (orders, avg ETA, delayed %) at `--km`
+  * bbox query of the same extent, and the k nearest locations
+  * the same radius summary done as a haversine mask over every row
+
+Every index answer is checked against brute force before timings are printed.
+
+    python -m benchmarks.bench_geo_index
+    python -m benchmarks.bench_geo_index --queries 5000 --km 5
+"""
+import argparse
+import time
+
+import numpy as np
+
+import data_store
+from features import haversine_np
+from geo_index import COLUMNS, KM_PER_DEG, GeoIndex
+
+
+def timed(fn, args):
+    times = np.empty(len(args))
+    out = []
+    for i, a in enumerate(args):
+        t = time.perf_counter()
+        out.append(fn(*a))
+        times[i] = time.perf_counter() - t
+    return out, times
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--km", type=float, default=2.0)
+    ap.add_argument("--k", type=int, default=5)
+    args = ap.parse_args()
+
+    df = data_store.load_clean_frame()
+    rng = np.random.default_rng(0)
+    lat_col, lon_col = COLUMNS["pickup"]
+    src = df[(df[lat_col].abs() > 1) & (df[lon_col].abs() > 1)].sample(args.queries, replace=True, random_state=0)
+    centers = list(zip(src[lat_col].to_numpy() + rng.uniform(-0.03, 0.03, args.queries),
+                       src[lon_col].to_numpy() + rng.uniform(-0.03, 0.03, args.queries)))
+    print(f"{len(df):,} rows, {args.queries:,} queries, radius {args.km:g} km, k={args.k}\n")
+
+    print(f"{'kind':<7} {'points':>7} {'build ms':>9} {'query':<16} {'p50 us':>8} {'p99 us':>8} {'vs scan':>8}")
+    for kind, (lat_col, lon_col) in COLUMNS.items():
+        t = time.perf_counter()
+        geo = GeoIndex.build(df, kind)
+        build = time.perf_counter() - t
+        lat, lon = geo.lat, geo.lon
+        row_lat, row_lon = df[lat_col].to_numpy(np.float64), df[lon_col].to_numpy(np.float64)
+        delayed = (df["Delivery_Time_min"] > 35).to_numpy()
+
+        def radius_summary(a, b):
+            pos, _ = geo.radius(a, b, args.km)
+            return geo.summary(pos)
+
+        def scan_summary(a, b):
+            m = haversine_np(a, b, row_lat, row_lon) <= args.km
+            return int(m.sum()), float(delayed[m].mean() * 100) if m.any() else 0.0
+
+        dlat = args.km / KM_PER_DEG
+        boxes = [(a - dlat, b - dlat, a + dlat, b + dlat) for a, b in centers]
+        idx, idx_t = timed(radius_summary, centers)
+        ref, scan_t = timed(scan_summary, centers)
+        box, box_t = timed(geo.bbox, boxes)
+        near, near_t = timed(lambda a, b: geo.nearest(a, b, args.k), centers)
+
+        # parity with brute force over every point / row
+        for (a, b), s, (n, late) in zip(centers, idx, ref):
+            assert s["n"] == n and (n == 0 or abs(s["delayed_pct"] - late) < 1e-9)
+        for (a0, b0, a1, b1), p in zip(boxes, box):
+            want = np.flatnonzero((lat >= a0) & (lat <= a1) & (lon >= b0) & (lon <= b1))
+            assert np.array_equal(np.sort(p), want)
+        for (a, b), (p, d) in zip(centers, near):
+            all_d = np.sort(haversine_np(a, b, lat, lon))[:args.k]
+            assert np.allclose(d, all_d[:len(d)]) and (len(d) == args.k or all_d[len(d)] > 50)
+
+        scan50 = np.percentile(scan_t, 50)
+        for name, t in (("radius+summary", idx_t), ("bbox", box_t), (f"nearest k={args.k}", near_t),
+                        ("full scan", scan_t)):
+            p50 = np.percentile(t, 50)
+            print(f"{kind:<7} {len(geo):>7,} {build * 1000:>9.1f} {name:<16} {p50 * 1e6:>8.1f} "
+                  f"{np.percentile(t, 99) * 1e6:>8.1f} {scan50 / p50:>7.0f}x")
+    print("\nall index answers match brute force")
+
+
+if __name__ == "__main__":
+    main()
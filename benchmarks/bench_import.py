@@ -0,0 +1,79 @@
+"""
+Import cost of the headless core vs app.py's import stack (`python -X importtime`).
+
+Each scenario runs in a fresh interpreter. "before" is what app.py does at
+import: its top-level imports plus `load_model()`. "import time" is the sum
+of the self times `-X importtime` reports (module execution only); "wall"
+also includes interpreter startup and any call in the snippet. The heaviest
+top-level packages are listed per scenario, and the core scenarios are
+checked to never load streamlit or plotly.
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --runs 5 --top 3
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+APP_STACK = ("import streamlit, pandas, numpy, json, requests, dotenv, plotly.express, "
+             "plotly.graph_objects, joblib, httpx, features, inference, cube, ingest, llm_cache, "
+             "email_report, integrations, ops_ai, streaming")
+SCENARIOS = [
+    ("app.py startup (before)", APP_STACK + "; inference.load_model()"),
+    ("delivery_core", "import delivery_core"),
+    ("core: flat-kernel scoring", "import delivery_core as c; c.FlatEnsemble"),
+    ("core: OpsAI / prompts", "import delivery_core as c; c.OpsAI; c.build_context"),
+    ("core: analytics (cube)", "import delivery_core as c; c.StatsCube; c.build_signals"),
+    ("core: load_model()", "import delivery_core as c; c.load_model()"),
+]
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+PROBE = "; import sys; print('@@', 'streamlit' in sys.modules, 'plotly' in sys.modules)"
+
+
+def measure(code):
+    t = time.perf_counter()
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", code + PROBE],
+                       capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - t
+    self_us, top = 0, {}
+    for m in LINE.finditer(p.stderr):
+        self_us += int(m.group(1))
+        if len(m.group(3)) == 1:  # direct import of the snippet: cumulative time of that package
+            pkg = m.group(4).split(".")[0]
+            if pkg in ("site", "encodings") or pkg.startswith("_"):  # interpreter startup
+                continue
+            top[pkg] = top.get(pkg, 0) + int(m.group(2))
+    flags = p.stdout.split("@@")[-1].split()
+    return wall, self_us / 1e6, top, "True" in flags  # streamlit or plotly loaded
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--top", type=int, default=4)
+    args = ap.parse_args()
+
+    print(f"median of {args.runs} fresh interpreters")
+    print(f"  {'scenario':<27} {'import s':>8} {'wall s':>7}  heaviest packages (cumulative s)")
+    base = None
+    for name, code in SCENARIOS:
+        runs = [measure(code) for _ in range(args.runs)]
+        wall = statistics.median(r[0] for r in runs)
+        imp = statistics.median(r[1] for r in runs)
+        top = sorted(runs[-1][2].items(), key=lambda kv: -kv[1])[:args.top]
+        ui_loaded = runs[-1][3]
+        base = base or imp
+        heavy = ", ".join(f"{k} {v / 1e6:.2f}" for k, v in top)
+        print(f"  {name:<27} {imp:>8.3f} {wall:>7.2f}  {heavy}"
+              + ("" if name.startswith("app") else f"   ({imp / base:.0%} of app)"))
+        if not name.startswith("app"):
+            assert not ui_loaded, f"{name} imported streamlit/plotly"
+    imp = statistics.median(measure("import delivery_core")[1] for _ in range(args.runs))
+    assert imp < base * 0.1, "bare `import delivery_core` should be a small fraction of the app stack"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+`integrations.Integrations` against the local fake Groq / Resend servers.
+
+    python -m benchmarks.bench_integrations
+    python -m benchmarks.bench_integrations --jobs 64 --concurrency 8 --latency-ms 200
+
+Checks, with timings:
+  * submit() returns immediately (the Streamlit thread never waits)
+  * the global semaphore caps in-flight requests at --concurrency
+  * transient 503/429 responses are retried to success
+  * hung upstream calls are cut off by the per-call timeout and the deadline
+  * retried emails are delivered once (Idempotency-Key)
+"""
+import argparse
+import time
+
+import httpx
+
+from benchmarks.fake_apis import FakeApis
+from integrations import ApiError, Integrations
+
+MSG = [{"role": "user", "content": "ping"}]
+
+
+def run_jobs(clients, n, coro_fn):
+    t = time.perf_counter()
+    futs = [clients.submit(lambda: clients.call(coro_fn())) for _ in range(n)]
+    submit_ms = (time.perf_counter() - t) * 1000
+    ok = err = 0
+    for f in futs:
+        try:
+            f.result()
+            ok += 1
+        except (ApiError, TimeoutError, httpx.HTTPError):
+            err += 1
+    return ok, err, submit_ms, time.perf_counter() - t
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--jobs", type=int, default=40)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--latency-ms", type=float, default=200)
+    args = ap.parse_args()
+    lat = args.latency_ms / 1000
+
+    print(f"{args.jobs} jobs, concurrency {args.concurrency}, upstream latency {args.latency_ms:g} ms")
+    print(f"  {'scenario':<22} {'ok':>4} {'err':>4} {'submit ms':>10} {'wall s':>7} "
+          f"{'retries':>8} {'peak':>5}")
+    scenarios = [
+        ("healthy",         dict(latency_s=lat),                   dict()),
+        ("30% 503/429",     dict(latency_s=lat, fail_rate=0.3),    dict(backoff=0.05, retries=6)),
+        ("all hang",        dict(latency_s=lat, hang_rate=1.0),    dict(timeout=0.5, retries=1, backoff=0)),
+        ("hang, deadline",  dict(latency_s=lat, hang_rate=1.0),    dict(timeout=30, deadline=0.3)),
+    ]
+    for name, fake_kw, client_kw in scenarios:
+        with FakeApis(**fake_kw) as fake:
+            clients = Integrations(fake.groq_url, fake.resend_url, concurrency=args.concurrency,
+                                   job_workers=args.jobs, **client_kw)
+            ok, err, submit_ms, wall = run_jobs(
+                clients, args.jobs, lambda: clients.groq_chat("k", "m", MSG))
+            peak = clients.stats["peak_in_flight"]  # server count includes abandoned hung calls
+            print(f"  {name:<22} {ok:>4} {err:>4} {submit_ms:>10.2f} {wall:>7.2f} "
+                  f"{clients.stats['retries']:>8} {peak:>5}")
+            assert peak <= args.concurrency, "semaphore exceeded"
+            if name == "healthy":
+                ideal = -(-args.jobs // args.concurrency) * lat
+                assert err == 0 and wall < ideal * 2 + 0.5, "healthy run too slow"
+            if name.startswith("30%"):
+                assert err == 0, "transient errors should be retried away"
+            if name == "all hang":  # waves of `concurrency` calls, each timing out (retries + 1) times
+                bound = -(-args.jobs // args.concurrency) * 0.5 * 2 + 1
+                assert ok == 0 and wall < bound, "hung calls must be cut off by the call timeout"
+            if name == "hang, deadline":
+                assert ok == 0 and wall < 1, "hung calls must be cut off by the deadline"
+            clients.close()
+
+    with FakeApis(latency_s=0.3) as fake:
+        clients = Integrations(fake.groq_url, fake.resend_url, timeout=0.1, retries=3, backoff=0.35)
+        try:  # every attempt times out client-side, but the server still records each one
+            clients.call(clients.resend_send("k", {"to": ["a@b.c"], "subject": "s", "html": "h"}))
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+        print(f"  email: {len(fake.requests)} attempts -> {len(fake.emails)} delivered")
+        assert len(fake.emails) == 1, "retries must reuse the idempotency key"
+        clients.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+`llm_cache` against a local stub of the Groq client (no network, no API key).
+
+Replays a click stream like the AI tab's: Run AI Analysis and the four
+preset Copilot questions, repeated across a few city selections, with
+free-text re-typings of the same questions. It reports the hit rate and
+latency for each backend, then checks TTL expiry, LRU eviction and that
+failed or invalid answers are not cached.
+
+    python -m benchmarks.bench_llm_cache
+    python -m benchmarks.bench_llm_cache --latency-ms 800 --clicks 200
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+from cube import StatsCube, build_signals
+from data_store import load_clean_frame
+from llm_cache import LLMCache, MemoryBackend, SQLiteBackend, make_key
+
+MODEL = "llama-3.3-70b-versatile"
+PRESETS = ["Why are deliveries slow today?",
+           "Which vehicle type causes most delays?",
+           "How can we reduce avg delivery time?",
+           "Which city needs most attention?"]
+
+
+class StubGroq:
+    """Just enough of `groq.Groq` for `client.chat.completions.create(...)`."""
+
+    def __init__(self, latency_s=0.5, reply='{"status":"GOOD","reason":"stub"}'):
+        self.latency_s, self.reply, self.calls = latency_s, reply, 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, temperature=None, **kw):
+        self.calls += 1
+        time.sleep(self.latency_s)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.reply))])
+
+
+def ask(cache, client, kind, signals, question=""):
+    key = make_key(MODEL, kind, 1, signals, question, temperature=0.3)
+    call = lambda: client.chat.completions.create(
+        model=MODEL, messages=[{"role": "user", "content": json.dumps(signals) + question}],
+        temperature=0.3).choices[0].message.content
+    return cache.get_or_call(key, call)
+
+
+def click_stream(cube, n, seed=0):
+    rng = random.Random(seed)
+    cities = cube.cities
+    selections = [cities[:5], cities, cities[2:4]]
+    for _ in range(n):
+        sel = rng.choice(selections)
+        q = rng.choice(PRESETS + [None])
+        if q and rng.random() < 0.3:  # typed by hand: different case / spacing / punctuation
+            q = "  " + q.lower().rstrip("?") + " "
+        yield build_signals(cube, sel), q
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--clicks", type=int, default=100)
+    ap.add_argument("--latency-ms", type=float, default=300)
+    args = ap.parse_args()
+
+    cube = StatsCube.build(load_clean_frame())
+    clicks = list(click_stream(cube, args.clicks))
+    tmp = tempfile.mkdtemp()
+    print(f"{args.clicks} clicks, stub latency {args.latency_ms:g} ms")
+    print(f"  {'backend':<8} {'calls':>6} {'hit rate':>9} {'total s':>8} {'hit ms':>8}")
+    for name, backend in [("none", None), ("memory", MemoryBackend()),
+                          ("sqlite", SQLiteBackend(os.path.join(tmp, "c.sqlite")))]:
+        client = StubGroq(args.latency_ms / 1000)
+        cache = LLMCache(backend) if backend is not None else None
+        t = time.perf_counter()
+        for signals, q in clicks:
+            if cache is None:
+                client.chat.completions.create(model=MODEL, messages=[], temperature=0.3)
+            else:
+                ask(cache, client, "copilot" if q else "decision", signals, q or "")
+        total = time.perf_counter() - t
+        if cache is None:
+            print(f"  {name:<8} {client.calls:>6} {'-':>9} {total:>8.2f} {'-':>8}")
+            continue
+        s = cache.stats()
+        signals, q = clicks[0]
+        t = time.perf_counter()
+        for _ in range(200):
+            ask(cache, client, "copilot" if q else "decision", signals, q or "")
+        hit_ms = (time.perf_counter() - t) / 200 * 1000
+        print(f"  {name:<8} {client.calls:>6} {s['hit_rate']:>9.1%} {total:>8.2f} {hit_ms:>8.3f}")
+
+    # behaviour checks
+    signals = clicks[0][0]
+    client = StubGroq(0)
+    cache = LLMCache(MemoryBackend(max_entries=2), ttl=0.05)
+    ask(cache, client, "copilot", signals, "a"); ask(cache, client, "copilot", signals, "A?")
+    assert client.calls == 1, "normalized questions should share an entry"
+    time.sleep(0.06)
+    ask(cache, client, "copilot", signals, "a")
+    assert client.calls == 2 and cache.stats()["expired"] == 1, "TTL"
+    for q in "bcd":
+        ask(cache, client, "copilot", signals, q)
+    assert cache.stats()["evictions"] == 2 and len(cache.backend) == 2, "LRU"
+    sq = LLMCache(SQLiteBackend(os.path.join(tmp, "lru.sqlite"), max_entries=2))
+    for q in "abc":
+        ask(sq, client, "copilot", signals, q)
+    assert len(sq.backend) == 2 and sq.stats()["evictions"] == 1, "sqlite LRU"
+    bad = StubGroq(0, reply="not json")
+    key = make_key(MODEL, "decision", 1, signals)
+    is_json = lambda t: t.startswith("{")
+    fn = lambda: bad.chat.completions.create(model=MODEL, messages=[]).choices[0].message.content
+    cache.get_or_call(key, fn, is_json); cache.get_or_call(key, fn, is_json)
+    assert bad.calls == 2, "invalid answers must not be cached"
+    print("ttl / lru / normalization / validation checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Overhead of `metrics` instrumentation: is it cheap enough to leave on?
+
+  * a bare `perf_counter` pair (the floor), `with timer(...)`, a `@timer`
+    decorated call vs the same undecorated call, `observe` and `inc`
+  * `observe` from several threads at once (lock contention)
+  * `render()` (one /metrics scrape) with the app's series registered
+  * a real /metrics request against `metrics.serve` on a free port
+
+The last line puts the cost per rerun (the app times about a dozen stages)
+next to a typical rerun.
+
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_metrics --n 1000000 --threads 8
+"""
+import argparse
+import threading
+import time
+import urllib.request
+
+import metrics
+
+APP_STAGES = ["load_model", "load_data", "city_filter", "sidebar_metrics", "charts_predict", "explorer_page",
+              "charts_analytics", "signals", "model_predict", "llama", "email_send", "rerun"]
+
+
+def per_op_ns(fn, n):
+    t = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t) / n * 1e9
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--n", type=int, default=300_000)
+    ap.add_argument("--threads", type=int, default=4)
+    args = ap.parse_args()
+
+    reg = metrics.Registry()
+    pc = time.perf_counter
+
+    def floor():
+        t0 = pc()
+        pc() - t0
+
+    def with_timer():
+        with reg.timer("bench"):
+            pass
+
+    def plain():
+        return None
+
+    decorated = reg.timer("bench_deco")(plain)
+    h = reg.histogram("bench_observe")
+    rows = [
+        ("perf_counter pair", per_op_ns(floor, args.n)),
+        ("with timer(...)", per_op_ns(with_timer, args.n)),
+        ("plain call", per_op_ns(plain, args.n)),
+        ("@timer call", per_op_ns(decorated, args.n)),
+        ("Histogram.observe", per_op_ns(lambda: h.observe(0.003), args.n)),
+        ("observe(name, labels)", per_op_ns(lambda: reg.observe("bench_labels", 0.003, service="groq"), args.n)),
+        ("inc(name, labels)", per_op_ns(lambda: reg.inc("bench_events", outcome="ok"), args.n)),
+    ]
+
+    def worker(k):
+        for _ in range(k):
+            with reg.timer("bench_threads"):
+                pass
+    per = args.n // args.threads
+    threads = [threading.Thread(target=worker, args=(per,)) for _ in range(args.threads)]
+    t = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    rows.append((f"with timer, {args.threads} threads", (time.perf_counter() - t) / (per * args.threads) * 1e9))
+    assert reg.histogram("stage_seconds", stage="bench_threads").count == per * args.threads
+
+    print(f"{'operation':<28} {'ns/op':>8}")
+    for name, ns in rows:
+        print(f"{name:<28} {ns:>8.0f}")
+
+    app = metrics.Registry()
+    for s in APP_STAGES:
+        for _ in range(100):
+            app.observe("stage_seconds", 0.004, stage=s)
+    for svc in ("groq", "resend"):
+        app.observe("http_request_seconds", 0.3, service=svc, outcome="ok")
+    app.collector("predict_memo", lambda: {"hits": 10, "misses": 2, "hit_rate": 0.83, "entries": 12})
+    render_ms = per_op_ns(app.render, 200) / 1e6
+    text = app.render()
+    server = metrics.serve(0, registry=app)
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    assert urllib.request.urlopen(url).read().decode() == text
+    t = time.perf_counter()
+    for _ in range(50):
+        urllib.request.urlopen(url).read()
+    scrape_ms = (time.perf_counter() - t) / 50 * 1000
+    server.shutdown()
+    print(f"\nrender(): {render_ms:.2f} ms for {len(text.splitlines())} lines ({len(text) / 1024:.1f} kB); "
+          f"GET /metrics {scrape_ms:.2f} ms")
+    per_rerun_us = dict(rows)["with timer(...)"] * len(APP_STAGES) / 1000
+    print(f"per rerun: {len(APP_STAGES)} timed stages ~ {per_rerun_us:.0f} us, vs a 50-200 ms rerun "
+          f"({per_rerun_us / 50_000:.3%} of 50 ms)")
+
+
+if __name__ == "__main__":
+    main()
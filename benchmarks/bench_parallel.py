@@ -0,0 +1,50 @@
+"""
+Scaling of `ParallelScorer` from 1 to N worker processes against serial `model.predict`.
+
+    python -m benchmarks.bench_parallel
+    python -m benchmarks.bench_parallel --rows 5000000 --workers 1 2 4 8 16 32
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import clean_frame, encode_features
+from inference import BASE_DIR, load_model
+from parallel_predict import ParallelScorer
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--workers", type=int, nargs="+",
+                    default=sorted({1, *[2 ** i for i in range(1, cpus.bit_length())], cpus}))
+    args = ap.parse_args()
+
+    model, features = load_model()
+    X = encode_features(clean_frame(pd.read_csv(os.path.join(BASE_DIR, "Delivery_Dataset.csv"))), features)
+    X = pd.concat([X] * -(-args.rows // len(X)), ignore_index=True).iloc[:args.rows]
+
+    t = time.perf_counter()
+    ref = model.predict(X)
+    t_serial = time.perf_counter() - t
+    print(f"{args.rows:,} rows, {cpus} cpus")
+    print(f"{'workers':>8} {'seconds':>9} {'rows/s':>12} {'speedup':>8}")
+    print(f"{'serial':>8} {t_serial:>9.3f} {args.rows / t_serial:>12,.0f} {1.0:>7.2f}x")
+
+    Xn = X.to_numpy(np.float64)
+    for w in args.workers:
+        with ParallelScorer(workers=w, capacity=len(Xn)) as ps:
+            ps.predict(Xn[:1000])  # warm the pool
+            t = time.perf_counter()
+            out = ps.predict(Xn)
+            el = time.perf_counter() - t
+        assert np.array_equal(out, ref), f"parallel output differs at {w} workers"
+        print(f"{w:>8} {el:>9.3f} {args.rows / el:>12,.0f} {t_serial / el:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Hit rate and latency of `predict_memo.PredictionMemo` on a Predict-tab-like click stream.
+
+Two click streams over the tab's input lattice:
+
+  * "sessions": each user starts from the tab's defaults (30, 4.5, 5.0 km, Meal,
+    Motorcycle) and nudges one input a few steps per click, as the sliders do
+  * "broad": independent draws (ages around 30, ratings around 4.5, log-normal
+    distances, weighted order / vehicle types); few inputs ever repeat
+
+Each click goes through:
+
+  * `inference.predict_one` (a DataFrame + `model.predict` per click; the old path)
+  * the memo's LRU alone, at several sizes
+  * the memo with the dense grid (`--grid-km`)
+
+Every memoized answer is checked against `inference.predict_one` before the
+timings are printed.
+
+    python -m benchmarks.bench_predict_memo
+    python -m benchmarks.bench_predict_memo --clicks 50000 --grid-km 20
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+import inference
+from predict_memo import PredictionMemo
+
+ORDERS   = (["Buffet", "Drinks", "Meal", "Snack"], [0.15, 0.2, 0.4, 0.25])
+VEHICLES = (["Bicycle", "Electric Scooter", "Motorcycle", "Scooter"], [0.05, 0.15, 0.55, 0.25])
+ATOL = 1e-9
+
+
+def sessions(n, seed=0, clicks_per_session=6):
+    rng = np.random.default_rng(seed)
+    out = []
+    while len(out) < n:
+        age, rating, dist, order, vehicle = 30, 45, 50, "Meal", "Motorcycle"
+        for _ in range(clicks_per_session):
+            field = rng.integers(5)
+            if field == 0:
+                age = int(np.clip(age + rng.integers(-2, 3), 18, 60))
+            elif field == 1:
+                rating = int(np.clip(rating + rng.integers(-2, 3), 10, 50))
+            elif field == 2:
+                dist = int(np.clip(dist + rng.integers(-10, 11), 1, 500))
+            elif field == 3:
+                order = str(rng.choice(ORDERS[0], p=ORDERS[1]))
+            else:
+                vehicle = str(rng.choice(VEHICLES[0], p=VEHICLES[1]))
+            out.append((age, rating / 10, dist / 10, order, vehicle))
+    return out[:n]
+
+
+def broad(n, seed=0):
+    rng = np.random.default_rng(seed)
+    age = np.clip(np.rint(rng.normal(30, 5, n)), 18, 60).astype(int)
+    rating = np.clip(np.rint(rng.normal(45, 3, n)), 10, 50) / 10
+    dist = np.clip(np.rint(rng.lognormal(np.log(50), 0.5, n)), 1, 500) / 10
+    order = rng.choice(ORDERS[0], n, p=ORDERS[1])
+    vehicle = rng.choice(VEHICLES[0], n, p=VEHICLES[1])
+    return [(int(a), float(r), float(d), str(o), str(v))
+            for a, r, d, o, v in zip(age, rating, dist, order, vehicle)]
+
+
+def run(fn, stream):
+    times, out = np.empty(len(stream)), np.empty(len(stream))
+    for i, args in enumerate(stream):
+        t = time.perf_counter()
+        out[i] = fn(*args)
+        times[i] = time.perf_counter() - t
+    return out, times
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--clicks", type=int, default=20000)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[256, 4096, 65536])
+    ap.add_argument("--grid-km", type=float, default=10.0)
+    args = ap.parse_args()
+
+    model, features = inference.load_model()
+    for name, gen in (("sessions", sessions), ("broad", broad)):
+        stream = gen(args.clicks)
+        print(f"── {name}: {len(stream):,} clicks, {len(set(stream)):,} distinct inputs, "
+              f"{sum(s[2] <= args.grid_km for s in stream) / len(stream):.1%} within {args.grid_km:g} km")
+        bench_stream(model, features, stream, args)
+
+
+def bench_stream(model, features, stream, args):
+    ref, base_t = run(lambda *a: inference.predict_one(model, features, *a), stream)
+    rows = [("predict_one (no memo)", None, base_t)]
+    for size in args.sizes:
+        memo = PredictionMemo(model, features, max_entries=size)
+        y, t = run(memo.predict_one, stream)
+        assert np.abs(y - ref).max() <= ATOL
+        rows.append((f"LRU {size:,}", memo.stats(), t))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        memo = PredictionMemo(model, features, max_entries=args.sizes[-1], grid_km=args.grid_km, grid_dir=tmp)
+        build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        PredictionMemo(model, features, grid_km=args.grid_km, grid_dir=tmp)
+        reload = time.perf_counter() - t0
+        y, t = run(memo.predict_one, stream)
+        assert np.abs(y - ref).max() <= ATOL
+        s = memo.stats()
+        rows.append((f"LRU {args.sizes[-1]:,} + grid", s, t))
+    print(f"grid {args.grid_km:g} km: {s['grid_mb']:.1f} MB, built in {build:.2f}s, "
+          f"mapped from disk in {reload * 1000:.1f} ms (registry models)")
+
+    print(f"{'path':<24} {'hit rate':>8} {'grid':>7} {'evicted':>8} {'p50 us':>8} {'p99 us':>8} {'mean us':>8}")
+    for name, st, t in rows:
+        hr = f"{st['hit_rate']:.1%}" if st else "-"
+        grid = f"{st['grid_hits'] / len(stream):.0%}" if st else "-"
+        ev = f"{st['evictions']:,}" if st else "-"
+        print(f"{name:<24} {hr:>8} {grid:>7} {ev:>8} {np.percentile(t, 50) * 1e6:>8.1f} "
+              f"{np.percentile(t, 99) * 1e6:>8.1f} {t.mean() * 1e6:>8.1f}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Prompt size and end-to-end latency, before vs after `prompt_context`.
+
+"before" is the old single user message: instructions plus the full signals
+dict as indent=2 JSON. "after" is the static system prompt plus the compact,
+budgeted snapshot. Sizes are reported per city selection, split into the
+static prefix and the per-call dynamic part.
+
+Latency runs against the fake Groq server, which charges `--prefill-ms` per
+~4-char prompt token before the first output token. `--live` sends the same
+prompts to the real Groq API instead (needs GROQ_API_KEY).
+
+    python -m benchmarks.bench_prompt_context
+    python -m benchmarks.bench_prompt_context --budget 150 --prefill-ms 2 --runs 10
+    python -m benchmarks.bench_prompt_context --live --runs 3
+"""
+import argparse
+import os
+import statistics
+import time
+
+from benchmarks.fake_apis import FakeApis
+from cube import StatsCube, build_signals
+from data_store import load_clean_frame
+from integrations import Integrations
+from prompt_context import (COPILOT_SYSTEM, DECISION_SYSTEM, build_context, copilot_messages,
+                            count_tokens, decision_messages, legacy_context, messages_tokens)
+
+MODEL = "llama-3.3-70b-versatile"
+QUESTION = "Which city needs the most attention right now and why?"
+SELECTIONS = [("all cities", None), ("3 cities", ["Bangalore", "Chennai", "Mysore"]), ("1 city", ["Pune"])]
+
+
+def legacy_decision(signals, status="WARNING"):
+    return [{"role": "user", "content": f"{DECISION_SYSTEM}\n\n## Live Operations Snapshot\n"
+                                        f"{legacy_context(signals)}\n\n## Classification\n"
+                                        f"Status is already determined as: {status}"}]
+
+
+def legacy_copilot(signals, question=QUESTION):
+    return [{"role": "user", "content": f"{COPILOT_SYSTEM}\n\n## Live Operations Data\n"
+                                        f"{legacy_context(signals)}\n\n"
+                                        f"## Question from Operations Manager\n{question}"}]
+
+
+def compact_decision(signals, budget):
+    return decision_messages(build_context(signals, budget)[0], "WARNING")
+
+
+def compact_copilot(signals, budget):
+    return copilot_messages(build_context(signals, budget, mention=QUESTION)[0], QUESTION)
+
+
+def chars(messages):
+    return sum(len(m["content"]) for m in messages)
+
+
+def timed(clients, key, messages, runs):
+    out = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        clients.call(clients.groq_chat(key, MODEL, messages, temperature=0.3))
+        out.append(time.perf_counter() - t)
+    return statistics.median(out)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--budget", type=int, default=300, help="snapshot token budget")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--ttft-ms", type=float, default=150, help="fake server fixed latency")
+    ap.add_argument("--prefill-ms", type=float, default=1.0, help="fake server time per prompt token")
+    ap.add_argument("--token-ms", type=float, default=5, help="fake server time per output token")
+    ap.add_argument("--live", action="store_true", help="call the real Groq API")
+    args = ap.parse_args()
+
+    cube = StatsCube.build(load_clean_frame())
+    signals = {name: build_signals(cube, cities) for name, cities in SELECTIONS}
+
+    print(f"prompt size (chars / tokens), snapshot budget {args.budget} tokens")
+    print(f"  {'prompt':<9} {'selection':<11} {'before':>13} {'after':>13} "
+          f"{'static tok':>10} {'dynamic tok':>11} {'saved':>6}")
+    for label, old, new in [("decision", legacy_decision, compact_decision),
+                            ("copilot", legacy_copilot, compact_copilot)]:
+        for name, s in signals.items():
+            a, b = old(s), new(s, args.budget)
+            ta, tb = messages_tokens(a), messages_tokens(b)
+            static = count_tokens(b[0]["content"])
+            print(f"  {label:<9} {name:<11} {chars(a):>6} / {ta:>4} {chars(b):>6} / {tb:>4} "
+                  f"{static:>10} {tb - static:>11} {1 - tb / ta:>6.0%}")
+            assert static + count_tokens(b[1]["content"]) <= tb
+            assert count_tokens(build_context(s, args.budget)[0]) <= max(args.budget, 130)
+
+    s = signals["all cities"]
+    t = time.perf_counter()
+    for _ in range(200):
+        compact_copilot(s, args.budget)
+    print(f"  context build: {(time.perf_counter() - t) / 200 * 1e6:.0f} µs per call")
+
+    if args.live:
+        key = os.getenv("GROQ_API_KEY")
+        assert key, "--live needs GROQ_API_KEY"
+        clients, fake = Integrations(), None
+        print(f"\nend-to-end latency, real Groq ({MODEL}), median of {args.runs} (s)")
+    else:
+        key = "k"
+        fake = FakeApis(latency_s=args.ttft_ms / 1000, token_s=args.token_ms / 1000,
+                        prompt_token_s=args.prefill_ms / 1000).__enter__()
+        clients = Integrations(fake.groq_url, fake.resend_url)
+        print(f"\nend-to-end latency, fake Groq ({args.ttft_ms:g} ms + {args.prefill_ms:g} ms/prompt "
+              f"token + {args.token_ms:g} ms/output token), median of {args.runs} (s)")
+    print(f"  {'prompt':<9} {'before':>7} {'after':>7}")
+    for label, old, new in [("decision", legacy_decision, compact_decision),
+                            ("copilot", legacy_copilot, compact_copilot)]:
+        before = timed(clients, key, old(s), args.runs)
+        after = timed(clients, key, new(s, args.budget), args.runs)
+        print(f"  {label:<9} {before:>7.3f} {after:>7.3f}")
+    clients.close()
+    if fake is not None:
+        fake.__exit__(None, None, None)
+
+
+if __name__ == "__main__":
+    main()
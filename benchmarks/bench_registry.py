@@ -0,0 +1,139 @@
+"""
+`model_registry` load time, parity, page sharing and version handling.
+
+  * cold load in a fresh interpreter: joblib unpickle (imports sklearn) vs
+    registry mmap load
+  * predictions match the sklearn estimator on the whole dataset, through both the
+    flat-kernel (small batch) and the estimator (large batch) paths
+  * N processes loading the same version share its pages (/proc smaps)
+  * two versions loaded side by side, promote switches CURRENT
+  * a tampered payload is refused; an sklearn version mismatch falls back to
+    the flat kernel
+
+    python -m benchmarks.bench_registry
+    python -m benchmarks.bench_registry --procs 8 --runs 5
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from features import clean_frame, encode_features
+from model_registry import DEFAULT_ROOT, Registry, RegistryError
+
+COLD = {
+    "joblib unpickle": "import joblib; joblib.load('delivery_time_model.joblib')",
+    "registry mmap": "import model_registry; model_registry.Registry().load()",
+}
+TIMED = "import time; t = time.perf_counter(); {code}; print(time.perf_counter() - t)"
+
+
+def cold_load(code):
+    out = subprocess.run([sys.executable, "-c", TIMED.format(code=code)], capture_output=True,
+                         text=True, check=True, cwd=os.path.dirname(DEFAULT_ROOT))
+    return float(out.stdout.split()[-1])
+
+
+def _touch_and_report(root, barrier, q):
+    m = Registry(root).load()
+    vdir = m.path
+    float(sum(np.asarray(getattr(m.flat, k)).sum() for k in ("feature", "threshold", "value")))
+    barrier.wait()  # every process has the pages mapped and touched
+    rss = shared = 0
+    with open("/proc/self/smaps") as f:
+        inside = False
+        for line in f:
+            if not line[0].isupper() or "-" in line.split()[0]:
+                inside = vdir in line
+            elif inside and line.startswith("Rss:"):
+                rss += int(line.split()[1])
+            elif inside and line.startswith("Shared_Clean:"):
+                shared += int(line.split()[1])
+    q.put((rss, shared))
+    barrier.wait()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--procs", type=int, default=4)
+    args = ap.parse_args()
+
+    reg = Registry()
+    print("cold load in a fresh interpreter (median of", args.runs, "runs):")
+    for name, code in COLD.items():
+        print(f"  {name:<16} {statistics.median(cold_load(code) for _ in range(args.runs)) * 1000:8.1f} ms")
+    t = time.perf_counter()
+    m = Registry().load()
+    print(f"  warm registry load (checksums + mmap, in process): {(time.perf_counter() - t) * 1000:.1f} ms")
+
+    X = encode_features(clean_frame(pd.read_csv(os.path.join(os.path.dirname(DEFAULT_ROOT),
+                                                             "Delivery_Dataset.csv"))), m.features)
+    ref = m.estimator().predict(X)
+    small = np.concatenate([m.predict(X.iloc[i:i + 200]) for i in range(0, len(X), 200)])
+    big = m.predict(X)
+    print(f"parity vs sklearn on {len(X):,} rows: flat path max err {np.abs(small - ref).max():.1e}, "
+          f"estimator path max err {np.abs(big - ref).max():.1e}")
+    assert np.abs(small - ref).max() < 1e-9 and np.array_equal(big, ref)
+
+    if os.path.exists("/proc/self/smaps"):
+        ctx = mp.get_context("spawn")
+        barrier, q = ctx.Barrier(args.procs), ctx.Queue()
+        procs = [ctx.Process(target=_touch_and_report, args=(reg.root, barrier, q))
+                 for _ in range(args.procs)]
+        for p in procs:
+            p.start()
+        stats = [q.get() for _ in procs]
+        for p in procs:
+            p.join()
+        print(f"{args.procs} processes mapping v{reg.current()}: payload Rss {stats[0][0]} kB each, "
+              f"of which shared {min(s for _, s in stats)}-{max(s for _, s in stats)} kB")
+        assert all(s > 0 for _, s in stats), "payload pages should be shared across processes"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "models")
+        shutil.copytree(DEFAULT_ROOT, root)
+        r = Registry(root)
+        est = r.load().estimator()
+        v2 = r.register(est, m.features, metrics={"note": "side-by-side copy"}, promote=False)
+        a, b = r.load("eta", 1), r.load("eta", v2)
+        assert a is not b and a is r.load("eta", 1) and np.array_equal(a.predict(X[:50]), b.predict(X[:50]))
+        r.promote("eta", v2)
+        print(f"side by side: v1 and v{v2} loaded together; CURRENT -> v{r.current()}")
+
+        d = r._dir("eta", v2)
+        with open(os.path.join(d, "threshold.npy"), "r+b") as f:
+            f.seek(-8, os.SEEK_END)
+            f.write(b"\x00" * 8)
+        try:
+            Registry(root).load("eta", v2)
+            raise AssertionError("tampered payload was loaded")
+        except RegistryError as e:
+            print(f"tampered v{v2}: refused ({e})")
+
+        man = os.path.join(r._dir("eta", 1), "manifest.json")
+        with open(man) as f:
+            doc = json.load(f)
+        doc["sklearn_version"] = "0.0"
+        with open(man, "w") as f:
+            json.dump(doc, f)
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            old = Registry(root).load("eta", 1, verify=False)
+            y = old.predict(X)
+        assert old.estimator() is None and np.abs(y - ref).max() < 1e-9 and w
+        print("sklearn version mismatch: estimator not unpickled, flat kernel served all rows")
+
+
+if __name__ == "__main__":
+    main()
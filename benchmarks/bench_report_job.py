@@ -0,0 +1,83 @@
+"""
+`report_job` against the fake Groq / Resend servers.
+
+Checks, with timings:
+  * importing report_job does not import Streamlit (and costs far less)
+  * city groups run in parallel: --groups groups take ~1 group's latency
+  * a second tick with unchanged signals sends nothing ("unchanged")
+  * re-running a slot (e.g. after a crash) does not deliver twice
+  * every run lands in the SQLite history
+
+    python -m benchmarks.bench_report_job
+    python -m benchmarks.bench_report_job --latency-ms 400 --groups 6
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_apis import FakeApis
+from integrations import Integrations
+
+IMPORT = ("import sys, time; t = time.perf_counter(); import {mod}; "
+          "print(time.perf_counter() - t, 'streamlit' in sys.modules)")
+CITIES = ["Bangalore", "Chennai", "Coimbatore", "Hyderabad", "Indore", "Mysore", "Pune", "Ranchi"]
+
+
+def import_cost(mod):
+    out = subprocess.run([sys.executable, "-c", IMPORT.format(mod=mod)], capture_output=True,
+                         text=True, check=True).stdout.split()
+    return float(out[0]), out[1] == "True"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--groups", type=int, default=4)
+    ap.add_argument("--latency-ms", type=float, default=300)
+    args = ap.parse_args()
+
+    for mod in ("report_job", "streamlit, plotly.express, pandas"):  # the latter: app.py's UI stack
+        s, st_loaded = import_cost(mod)
+        print(f"import {mod:<34} {s:6.2f}s  streamlit loaded: {st_loaded}")
+        if mod == "report_job":
+            assert not st_loaded, "report_job must not import streamlit"
+
+    from ingest import LiveData
+    from ops_ai import OpsAI
+    from report_job import Job, RunHistory, run_all
+    live = LiveData()
+    jobs = [Job(f"g{i}", CITIES[i::args.groups], [f"lead{i}@example.com", "ops@example.com"])
+            for i in range(args.groups)]
+
+    with FakeApis(latency_s=args.latency_ms / 1000) as fake, tempfile.TemporaryDirectory() as tmp:
+        clients = Integrations(fake.groq_url, fake.resend_url)
+        ai = OpsAI(clients, cache=None, groq_key="k", resend_key="k", resend_rate=50)
+        history = RunHistory(os.path.join(tmp, "runs.sqlite"))
+        print(f"\n{args.groups} city groups, upstream {args.latency_ms:g} ms per call (Groq + Resend)")
+        print(f"  {'tick':<26} {'wall s':>7} {'requests':>8}  outcomes")
+
+        def tick(label, **kw):
+            n, t = len(fake.requests), time.perf_counter()
+            runs = run_all(jobs, live, ai, history, **kw)
+            wall = time.perf_counter() - t
+            print(f"  {label:<26} {wall:>7.2f} {len(fake.requests) - n:>8}  "
+                  f"{sorted({r['outcome'] for r in runs})}")
+            return runs, wall
+
+        _, serial = tick("serial (1 worker), forced", slot="s1", workers=1, force=True)
+        _, parallel = tick("parallel", slot="s2", workers=args.groups, force=True)
+        runs, _ = tick("next tick, same data", slot="s3", workers=args.groups)
+        assert all(r["outcome"] == "unchanged" for r in runs), "unchanged signals must be skipped"
+        delivered = len(fake.emails)
+        tick("slot s2 retried, forced", slot="s2", workers=args.groups, force=True)
+        assert len(fake.emails) == delivered, "a retried slot must not deliver twice"
+        assert parallel < serial / min(args.groups, 2) * 1.2, "groups did not run in parallel"
+        print(f"  speed-up {serial / parallel:.1f}x, {delivered} emails delivered, "
+              f"{len(history.recent(100))} runs in history")
+        clients.close()
+
+
+if __name__ == "__main__":
+    main()
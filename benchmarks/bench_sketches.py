@@ -0,0 +1,72 @@
+"""
+`sketches.BinnedSketch` vs exact pandas quantiles / histogram.
+
+Data is Delivery_Dataset.csv tiled to each size with a little jitter on
+distance, split into `--partitions` pieces that are sketched separately and
+merged, as a streaming or partitioned job would.
+
+    python -m benchmarks.bench_sketches
+    python -m benchmarks.bench_sketches --sizes 45000 1000000 10000000 --partitions 64
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from cube import SKETCHES
+from data_store import load_clean_frame
+from inference import BASE_DIR
+from sketches import BinnedSketch
+
+QS = (0.5, 0.9, 0.99)
+
+
+def timed(fn):
+    t = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[45_000, 1_000_000, 10_000_000])
+    ap.add_argument("--partitions", type=int, default=16)
+    args = ap.parse_args()
+
+    base = load_clean_frame(os.path.join(BASE_DIR, "Delivery_Dataset.csv"))
+    rng = np.random.default_rng(0)
+    for n in args.sizes:
+        idx = np.arange(n) % len(base)
+        cols = {"Delivery_Time_min": base["Delivery_Time_min"].to_numpy()[idx].astype(np.int64),
+                "distance_km": np.clip(base["distance_km"].to_numpy()[idx] + rng.normal(0, 0.05, n), 0, 50)}
+        print(f"\n{n:,} rows, {args.partitions} partitions")
+        print(f"  {'column':<18} {'exact s':>8} {'sketch s':>9} {'query ms':>9} "
+              f"{'max q err':>10} {'bound':>6} {'hist err':>9}")
+        for name, (col, spec) in SKETCHES.items():
+            v = cols[col]
+            s = pd.Series(v)
+            exact, t_exact = timed(lambda: (s.quantile(list(QS)).to_numpy(),
+                                            np.histogram(v, bins=30)))
+
+            def build():
+                parts = [BinnedSketch(**spec).add(p) for p in np.array_split(v, args.partitions)]
+                out = parts[0]
+                for p in parts[1:]:
+                    out = out.merge(p)
+                return out
+            sk, t_build = timed(build)
+            est, t_query = timed(lambda: [sk.quantile(q) for q in QS])
+
+            q_err = np.abs(np.array(est) - exact[0]).max()
+            edges, counts = sk.histogram(30)
+            ref_counts, _ = np.histogram(v, bins=edges)
+            h_err = int(np.abs(ref_counts - counts).sum())
+            print(f"  {col:<18} {t_exact:>8.3f} {t_build:>9.3f} {t_query * 1000:>9.3f} "
+                  f"{q_err:>10.4f} {sk.error_bound:>6.2f} {h_err:>9}")
+            assert q_err <= sk.error_bound + 1e-9, f"{col}: quantile error {q_err} exceeds bound"
+
+
+if __name__ == "__main__":
+    main()
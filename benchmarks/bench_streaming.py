@@ -0,0 +1,71 @@
+"""
+Blocking vs streamed completions against the fake Groq server.
+
+For the Copilot (prose) it reports time-to-first-token and total latency.
+For the AI decision (JSON) it reports when each field becomes renderable
+via `streaming.JsonFieldStream`; in blocking mode everything waits for
+the full reply.
+
+    python -m benchmarks.bench_streaming
+    python -m benchmarks.bench_streaming --ttft-ms 400 --token-ms 25 --runs 10
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.fake_apis import FakeApis
+from integrations import Integrations
+from streaming import JsonFieldStream
+
+COPILOT = [{"role": "user", "content": "Which city needs most attention?"}]
+DECISION = [{"role": "user", "content": 'Return format: {"status":"","reason":"",'
+                                        '"immediate_action":"","long_term_recommendation":""}'}]
+FIELDS = ["reason", "immediate_action", "long_term_recommendation"]
+
+
+def blocking(clients, messages):
+    t = time.perf_counter()
+    clients.call(clients.groq_chat("k", "m", messages))
+    total = time.perf_counter() - t
+    return {"first": total, "total": total, **{f: total for f in FIELDS}}
+
+
+def streamed(clients, messages):
+    t = time.perf_counter()
+    out, parser = {}, JsonFieldStream()
+    for tok in clients.iterate(clients.groq_stream("k", "m", messages)):
+        now = time.perf_counter() - t
+        out.setdefault("first", now)
+        for f in parser.feed(tok):
+            out.setdefault(f, now)
+    out["total"] = time.perf_counter() - t
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--ttft-ms", type=float, default=300, help="fake server time to first token")
+    ap.add_argument("--token-ms", type=float, default=20, help="fake server time per ~4-char token")
+    args = ap.parse_args()
+
+    with FakeApis(latency_s=args.ttft_ms / 1000, token_s=args.token_ms / 1000) as fake:
+        clients = Integrations(fake.groq_url, fake.resend_url)
+        print(f"fake Groq: {args.ttft_ms:g} ms to first token, {args.token_ms:g} ms/token, "
+              f"median of {args.runs} runs (seconds)")
+        print(f"  {'prompt':<9} {'mode':<9} {'first tok':>9} {'reason':>7} {'action':>7} "
+              f"{'long-term':>9} {'total':>7}")
+        for label, messages in [("copilot", COPILOT), ("decision", DECISION)]:
+            for mode, fn in [("blocking", blocking), ("stream", streamed)]:
+                runs = [fn(clients, messages) for _ in range(args.runs)]
+                med = lambda k: statistics.median(r[k] for r in runs) if k in runs[0] else float("nan")
+                cols = [med(k) for k in ("first", *FIELDS, "total")]
+                if label == "copilot":
+                    cols[1:4] = [float("nan")] * 3
+                print(f"  {label:<9} {mode:<9} {cols[0]:>9.3f} {cols[1]:>7.3f} {cols[2]:>7.3f} "
+                      f"{cols[3]:>9.3f} {cols[4]:>7.3f}")
+        clients.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+`train.py` pipeline: dataset cache, search scaling over workers, reproducibility.
+
+  * encode + fold the cleaned frame cold vs reuse the on-disk cache
+  * wall-clock and fits/s of the same grid on 1..N worker processes
+  * two registrations of the same config produce identical predictions, and
+    the registered version is what `load_model()` serves
+
+Registrations go to a temporary registry; models/ is not touched.
+
+    python -m benchmarks.bench_train
+    python -m benchmarks.bench_train --workers 1 2 4 --folds 3
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import data_store
+import inference
+import train
+from backends import BACKENDS
+from model_registry import Registry
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--folds", type=int, default=3)
+    ap.add_argument("--workers", type=int, nargs="+", default=sorted({1, cpus}))
+    args = ap.parse_args()
+
+    df = data_store.load_clean_frame()
+    with tempfile.TemporaryDirectory() as tmp:
+        t = time.perf_counter()
+        cache = train.prepare(df, folds=args.folds, cache_dir=os.path.join(tmp, "train"))
+        cold = time.perf_counter() - t
+        t = time.perf_counter()
+        assert train.prepare(df, folds=args.folds, cache_dir=os.path.join(tmp, "train")) == cache
+        warm = time.perf_counter() - t
+        print(f"{len(df):,} rows: encode + folds {cold * 1000:.1f} ms cold, {warm * 1000:.1f} ms cached")
+
+        configs = train.expand_grid(BACKENDS["gbr"].grids["quick"])
+        n_fits = len(configs) * args.folds
+        print(f"{len(configs)} configs x {args.folds} folds, {cpus} cpus")
+        print(f"{'workers':>8} {'seconds':>9} {'fits/s':>8} {'speedup':>8}")
+        base = ranking = None
+        for w in args.workers:
+            t = time.perf_counter()
+            results = train.search(cache, configs, w)
+            wall = time.perf_counter() - t
+            base = base or wall
+            order = [r["params"] for r in results]
+            assert ranking is None or order == ranking, "ranking should not depend on worker count"
+            ranking = order
+            print(f"{w:>8} {wall:>9.2f} {n_fits / wall:>8.2f} {base / wall:>7.2f}x")
+
+        reg = Registry(os.path.join(tmp, "models"))
+        versions = []
+        for _ in range(2):
+            model, _ = train.fit_final(cache, results[0]["params"])
+            versions.append(reg.register(model, train.FEATURES, metrics={"cv_rmse": results[0]["cv_rmse"]}))
+        X = np.load(os.path.join(cache, "X.npy"))[:5000]
+        a, b = (reg.load("eta", v).predict(X) for v in versions)
+        served, features = inference.load_model(tmp)
+        assert np.array_equal(a, b), "same data + config should give the same model"
+        assert served.manifest["version"] == versions[-1] and features == train.FEATURES
+        print(f"refit twice: identical predictions; load_model() serves v{served.manifest['version']} "
+              f"({served.manifest['metrics']['cv_rmse']:.3f} CV RMSE)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Parity and latency of the flat-array `tree_kernel` against `model.predict`.
+
+Parity (`benchmarks.check_tree_kernel`, runnable on its own) is asserted on
+every cleaned row of Delivery_Dataset.csv before any timing; latency
+compares the Predict tab's single-row DataFrame call with the kernel at
+several batch sizes.
+
+    python -m benchmarks.bench_tree_kernel
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from benchmarks.check_tree_kernel import ATOL, check_parity
+from features import clean_frame, encode_features
+from inference import BASE_DIR, load_model
+from tree_kernel import compile_model
+
+
+def per_call_us(fn, arg, repeat):
+    for _ in range(min(repeat, 50)):
+        fn(arg)
+    t = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - t) / repeat * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=2000)
+    args = ap.parse_args()
+
+    model, features = load_model()
+    if hasattr(model, "estimator"):  # registry model: compare against the sklearn estimator itself
+        model = model.estimator()
+    t = time.perf_counter()
+    flat = compile_model(model)
+    print(f"compiled {flat.n_trees} trees / {flat.n_nodes} nodes (depth {flat.depth}) "
+          f"in {(time.perf_counter() - t) * 1000:.1f} ms")
+
+    X = encode_features(clean_frame(pd.read_csv(os.path.join(BASE_DIR, "Delivery_Dataset.csv"))), features)
+    _, err, single = check_parity(model, X)
+    print(f"parity: {len(X):,} rows, max abs err {err:.2e}, single rows {single:.2e} (tol {ATOL:g})\n")
+
+    print(f"{'batch':>7} {'sklearn us':>12} {'kernel us':>11} {'ratio':>7}")
+    for n in (1, 8, 64, 512, 4096):
+        Xdf, Xnp = X.iloc[:n], X.to_numpy()[:n]
+        rep = max(10, args.repeat // n)
+        sk, fk = per_call_us(model.predict, Xdf, rep), per_call_us(flat.predict, Xnp, rep)
+        print(f"{n:>7} {sk:>12.1f} {fk:>11.1f} {fk / sk:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Regression check: malformed batches must not break the store or `LiveData`.
+
+On a temporary copy of the column store:
+  * rows missing (or with non-numeric) time, rating, age or coordinates are
+    dropped; the rest of their batch is appended
+  * a file with its columns in another order is ingested
+  * a file lacking a column moves to inbox/failed/, a submitted frame
+    lacking one lands in `LiveData.rejected`; neither raises from `poll()`
+  * the store still loads (cube included) in a fresh `LiveData`
+
+    python -m benchmarks.check_ingest
+"""
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import data_store
+from features import clean_frame
+from ingest import LiveData
+
+TIME_COL = "Delivery Time_taken(min)"
+
+
+def main():
+    raw = pd.read_csv(data_store.DEFAULT_CSV, nrows=200)
+    if data_store.read_manifest(data_store.DEFAULT_DIR) is None:
+        data_store.build_store()
+    with tempfile.TemporaryDirectory() as tmp:
+        store, inbox = os.path.join(tmp, "store"), os.path.join(tmp, "inbox")
+        shutil.copytree(data_store.DEFAULT_DIR, store)
+        os.makedirs(inbox)
+        live = LiveData(data_store.DEFAULT_CSV, store, inbox)
+        rows0 = len(live.snapshot()[0])
+
+        holes = raw.iloc[:40].copy()
+        holes[TIME_COL] = holes[TIME_COL].astype(object)
+        holes.loc[holes.index[:5], TIME_COL] = np.nan
+        holes.loc[holes.index[5:8], TIME_COL] = "n/a"
+        holes.loc[holes.index[8:11], "Delivery_person_Ratings"] = np.nan
+        holes.loc[holes.index[11:14], "Delivery_person_Age"] = np.nan
+        holes.loc[holes.index[14:16], "Restaurant_latitude"] = np.nan
+        holes.to_csv(os.path.join(inbox, "a_holes.csv"), index=False)
+        raw.iloc[40:80][raw.columns[::-1]].to_csv(os.path.join(inbox, "b_reordered.csv"), index=False)
+        raw.iloc[80:90].drop(columns=["Type_of_order"]).to_csv(os.path.join(inbox, "c_missing.csv"), index=False)
+        live.submit(raw.iloc[90:100].drop(columns=[TIME_COL]))
+
+        added = live.poll()
+        frame = live.snapshot()[0]
+        failed = sorted(os.listdir(os.path.join(inbox, "failed")))
+        done = sorted(os.listdir(os.path.join(inbox, "done")))
+        print(f"appended {added} rows; done {done}; failed {failed}")
+        for msg in live.rejected:
+            print(f"  rejected  {msg}")
+
+        expected = len(clean_frame(raw.iloc[16:80].copy()))  # the first 16 rows have holes
+        assert added == len(frame) - rows0 == expected, (added, expected)
+        assert failed == ["c_missing.csv"] and done == ["a_holes.csv", "b_reordered.csv"]
+        assert len(live.rejected) == 2
+        assert frame["Delivery_Time_min"].notna().all() and frame.index.is_unique
+
+        again = LiveData(data_store.DEFAULT_CSV, store, inbox)  # what the app does at startup
+        assert len(again.snapshot()[0]) == len(frame)
+        print("ok: bad rows dropped, bad files quarantined, store still loads")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Parity of the flat-array `tree_kernel` with `model.predict`, without timings.
+
+Checks the shipped model plus a small GBR and HistGradientBoosting model fit
+here, each on the whole cleaned dataset as one batch and on single rows.
+
+    python -m benchmarks.check_tree_kernel
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from backends import BACKENDS
+from features import clean_frame, encode_features
+from inference import BASE_DIR, load_model
+from tree_kernel import compile_model
+
+ATOL = 1e-9
+SINGLE_ROWS = 200
+
+
+def check_parity(model, X: pd.DataFrame, single_rows=SINGLE_ROWS):
+    """Max abs error of the kernel vs `model.predict` (batch, then row by row); asserts <= ATOL."""
+    flat = compile_model(model)
+    Xnp = X.to_numpy()
+    err = np.abs(model.predict(X) - flat.predict(Xnp)).max()
+    assert err <= ATOL, f"batch: flat kernel diverges from model.predict (max abs err {err:.3g})"
+    rows = np.linspace(0, len(X) - 1, min(single_rows, len(X))).astype(int)
+    single = max(abs(model.predict(X.iloc[[i]])[0] - flat.predict(Xnp[i:i + 1])[0]) for i in rows)
+    assert single <= ATOL, f"single row: flat kernel diverges from model.predict (max abs err {single:.3g})"
+    return flat, err, single
+
+
+def main():
+    df = clean_frame(pd.read_csv(os.path.join(BASE_DIR, "Delivery_Dataset.csv")))
+    model, features = load_model()
+    if hasattr(model, "estimator"):  # registry model: compare against the sklearn estimator itself
+        model = model.estimator()
+    X, y = encode_features(df, features), df["Delivery_Time_min"]
+    fit = X.sample(5000, random_state=0).index
+    models = {"shipped": model,
+              "gbr": BACKENDS["gbr"].make(n_estimators=50, max_depth=4).fit(X.loc[fit], y.loc[fit]),
+              "hist": BACKENDS["hist"].make(max_iter=50, max_leaf_nodes=31).fit(X.loc[fit], y.loc[fit])}
+    for name, m in models.items():
+        flat, err, single = check_parity(m, X)
+        print(f"{name:<8} {type(m).__name__:<30} {flat.n_trees:>4} trees  batch {len(X):,} rows "
+              f"max err {err:.1e}  single rows max err {single:.1e}")
+    print(f"ok: kernel matches model.predict within {ATOL:g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Local stand-ins for the Groq and Resend HTTP APIs.
+
+`FakeApis` runs a stdlib HTTP server on a background thread that answers
+POST /openai/v1/chat/completions, POST /emails and POST /emails/batch with
+the same JSON shapes as the real services. Latency, a transient-failure rate (503 / 429 with
+Retry-After) and hangs can be dialled in to exercise timeouts and retries.
+
+Chat completions model generation time: `latency_s` plus `prompt_token_s`
+per ~4-character prompt token (prefill) before the first token, then
+`token_s` per ~4-character output token. With `"stream": true` the tokens are
+sent as server-sent events as they are "generated"; otherwise the whole
+reply is returned once the last token is done, like the real API.
+
+    with FakeApis(latency_s=0.2, fail_rate=0.3) as fake:
+        clients = Integrations(groq_url=fake.groq_url, resend_url=fake.resend_url)
+
+    python -m benchmarks.fake_apis --port 8600       # serve until Ctrl+C
+    GROQ_BASE_URL=http://127.0.0.1:8600/openai/v1 RESEND_BASE_URL=http://127.0.0.1:8600 \\
+        GROQ_API_KEY=x RESEND_API_KEY=x streamlit run app.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DECISION_REPLY = json.dumps({
+    "status": "GOOD",
+    "reason": "Stub analysis: 26.3 min average ETA and 17.4% delayed.",
+    "immediate_action": "Audit motorcycle dispatch in the slowest city.",
+    "long_term_recommendation": "Rebalance fleet mix to reduce delayed_pct by ~3%.",
+})
+COPILOT_REPLY = ("Stub answer: Metropolitian orders average 27.1 min against 26.3 min overall, "
+                 "and motorcycles run 2.4 min slower than scooters. Shift evening motorcycle "
+                 "capacity to scooters in the slowest city first.")
+
+
+def default_reply(body):
+    """Decision JSON for the AI-analysis prompt, prose for Copilot questions."""
+    prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+    return DECISION_REPLY if "long_term_recommendation" in prompt else COPILOT_REPLY
+
+
+class FakeApis:
+    def __init__(self, host="127.0.0.1", port=0, latency_s=0.0, fail_rate=0.0,
+                 hang_rate=0.0, token_s=0.0, prompt_token_s=0.0, reply=default_reply, seed=0):
+        self.latency_s, self.fail_rate, self.hang_rate, self.token_s = latency_s, fail_rate, hang_rate, token_s
+        self.prompt_token_s = prompt_token_s
+        self.reply = reply if callable(reply) else (lambda body: reply)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests, self.in_flight, self.peak_in_flight = [], 0, 0
+        self.request_times = []  # monotonic arrival time of each request
+        self.emails = {}  # Idempotency-Key -> message
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *a):
+                pass
+
+            def _send(self, code, body, headers=()):
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(code)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    for k, v in headers:
+                        self.send_header(k, v)
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True  # client already timed out and left
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake.lock:
+                    fake.requests.append((self.path, body))
+                    fake.request_times.append(time.monotonic())
+                    fake.in_flight += 1
+                    fake.peak_in_flight = max(fake.peak_in_flight, fake.in_flight)
+                    roll = fake.rng.random()
+                try:
+                    fake.handle(self, body, roll)
+                finally:
+                    with fake.lock:
+                        fake.in_flight -= 1
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self.groq_url, self.resend_url = self.url + "/openai/v1", self.url
+
+    def handle(self, h, body, roll):
+        if roll < self.hang_rate:
+            time.sleep(3600)  # client timeout fires first; daemon thread dies with the server
+        time.sleep(self.latency_s)
+        if roll < self.hang_rate + self.fail_rate:
+            if roll < self.hang_rate + self.fail_rate / 2:
+                return h._send(503, {"error": {"message": "upstream overloaded"}})
+            return h._send(429, {"error": {"message": "rate limited"}}, [("Retry-After", "0.05")])
+        if h.path.endswith("/chat/completions"):
+            return self.chat(h, body)
+        if h.path == "/emails":
+            key = h.headers.get("Idempotency-Key") or uuid.uuid4().hex
+            with self.lock:
+                self.emails.setdefault(key, body)
+            return h._send(200, {"id": key})
+        if h.path == "/emails/batch":
+            key = h.headers.get("Idempotency-Key") or uuid.uuid4().hex
+            ids = [f"{key}-{i}" for i in range(len(body))]
+            with self.lock:
+                for i, message in zip(ids, body):
+                    self.emails.setdefault(i, message)
+            return h._send(200, {"data": [{"id": i} for i in ids]})
+        h._send(404, {"error": {"message": f"no route {h.path}"}})
+
+    def chat(self, h, body):
+        prompt = sum(len(m.get("content", "")) for m in body.get("messages", []))
+        time.sleep(self.prompt_token_s * -(-prompt // 4))
+        tokens = re.findall(r".{1,4}", self.reply(body), re.S)
+        if not body.get("stream"):
+            time.sleep(self.token_s * len(tokens))
+            return h._send(200, {"id": "chatcmpl-fake", "object": "chat.completion", "model": body.get("model"),
+                                 "choices": [{"index": 0, "finish_reason": "stop",
+                                              "message": {"role": "assistant", "content": "".join(tokens)}}]})
+        try:
+            h.send_response(200)
+            h.send_header("Content-Type", "text/event-stream")
+            h.send_header("Connection", "close")
+            h.end_headers()
+            h.close_connection = True
+            for tok in tokens:
+                time.sleep(self.token_s)
+                event = {"id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {"content": tok}, "finish_reason": None}]}
+                h.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                h.wfile.flush()
+            h.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve fake Groq + Resend endpoints.")
+    ap.add_argument("--port", type=int, default=8600)
+    ap.add_argument("--latency-ms", type=float, default=300)
+    ap.add_argument("--token-ms", type=float, default=15, help="generation time per ~4-char token")
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    args = ap.parse_args()
+    with FakeApis(port=args.port, latency_s=args.latency_ms / 1000, fail_rate=args.fail_rate,
+                  token_s=args.token_ms / 1000) as fake:
+        print(f"fake Groq at {fake.groq_url}, fake Resend at {fake.resend_url} (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Closed-loop load generator for `serve.py`: p50/p95/p99 latency and requests/s.
+
+Each of `--concurrency` clients keeps one keep-alive connection and sends
+requests back to back until `--requests` have completed in total.
+
+    python serve.py --max-wait-ms 2 &
+    python -m benchmarks.loadgen --requests 20000 --concurrency 64
+    python -m benchmarks.loadgen --bulk 100 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+ORDERS   = ["Buffet", "Drinks", "Meal", "Snack"]
+VEHICLES = ["Bicycle", "Electric Scooter", "Motorcycle", "Scooter"]
+
+
+def _order(rng):
+    return {"Delivery_person_Age": rng.randint(18, 60),
+            "Delivery_person_Ratings": round(rng.uniform(2.5, 5.0), 1),
+            "distance_km": round(rng.uniform(0.5, 25.0), 1),
+            "Type_of_order": rng.choice(ORDERS),
+            "Type_of_vehicle": rng.choice(VEHICLES)}
+
+
+def _request(host, path, payload):
+    body = json.dumps(payload).encode()
+    return (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+
+
+async def _client(host, port, path, bulk, todo, latencies, errors, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while todo[0] > 0:
+            todo[0] -= 1
+            payload = _order(rng) if not bulk else {"orders": [_order(rng) for _ in range(bulk)]}
+            t = time.perf_counter()
+            writer.write(_request(host, path, payload))
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while (h := await reader.readline()) != b"\r\n":
+                k, _, v = h.decode().partition(":")
+                if k.lower() == "content-length":
+                    length = int(v)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t)
+            if status != 200:
+                errors[0] += 1
+    finally:
+        writer.close()
+
+
+async def run(host, port, requests, concurrency, bulk=0):
+    path = "/predict/bulk" if bulk else "/predict"
+    todo, latencies, errors = [requests], [], [0]
+    t = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, path, bulk, todo, latencies, errors, i)
+                           for i in range(concurrency)))
+    wall = time.perf_counter() - t
+    ms = np.array(latencies) * 1000
+    return {"requests": len(ms), "errors": errors[0], "seconds": wall,
+            "rps": len(ms) / wall, "rows_per_sec": len(ms) * max(bulk, 1) / wall,
+            "p50_ms": np.percentile(ms, 50), "p95_ms": np.percentile(ms, 95),
+            "p99_ms": np.percentile(ms, 99), "max_ms": ms.max()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8502)
+    ap.add_argument("--requests", type=int, default=10_000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--bulk", type=int, default=0, help="orders per /predict/bulk request (0 = single)")
+    args = ap.parse_args()
+
+    r = asyncio.run(run(args.host, args.port, args.requests, args.concurrency, args.bulk))
+    print(f"{r['requests']:,} requests ({r['errors']} errors) in {r['seconds']:.2f}s "
+          f"@ concurrency {args.concurrency}")
+    print(f"  {r['rps']:,.0f} req/s   {r['rows_per_sec']:,.0f} rows/s")
+    print(f"  p50 {r['p50_ms']:.2f} ms   p95 {r['p95_ms']:.2f} ms   "
+          f"p99 {r['p99_ms']:.2f} ms   max {r['max_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
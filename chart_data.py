@@ -0,0 +1,112 @@
+"""
+Server-side chart payloads and a figure cache for the Analytics tab.
+
+Plotly figures built from raw rows carry those rows to the browser:
+`px.box` ships every Delivery_Time_min value of the selection, and the
+scatter plots ship whatever sample they were given. This module turns the
+selection into what the chart actually draws:
+
+  * box plots: `box_summary` reads quartiles, whisker fences and outliers
+    from a cube time sketch. That sketch is lossless for integer minutes,
+    so the box equals `px.box` on the raw rows (numpy/pandas linear
+    quartiles, 1.5 IQR fences). Outliers are sent as distinct values with
+    counts, not as one point per row.
+  * histograms: bin counts from `BinnedSketch.histogram` (already exact).
+  * scatter plots: `stratified_sample` draws a fixed-size sample with a
+    quota per group (the color dimension), so every vehicle or city stays
+    visible, in O(rows) without shuffling the frame.
+
+`FigureCache` keeps the built figures and their JSON, keyed by
+(chart, selected cities, dataset version). A rerun with an unchanged
+selection reuses the figure instead of rebuilding it; appended rows change
+the version and so rebuild. Per-entry JSON bytes and build time are kept
+for the payload caption and `benchmarks/bench_chart_data.py`.
+
+    charts = FigureCache()
+    fig = charts.get(("box", ("Pune",), live.version), lambda: build_box(...)).figure
+    charts.stats()      # entries, hits, misses, payload bytes, build ms
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from sketches import BinnedSketch
+
+CachedFigure = namedtuple("CachedFigure", "figure json build_ms")
+
+
+def box_summary(sk: BinnedSketch, whis=1.5) -> dict:
+    """Quartiles, whisker fences, mean and outliers (distinct value, count) of a sketch."""
+    counts = sk.counts[1:-1]
+    present = np.flatnonzero(counts)
+    values, counts = sk.lo + sk.width * present, counts[present]
+    q1, median, q3 = (sk.quantile(q) for q in (0.25, 0.5, 0.75))
+    lo, hi = q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)
+    inside = (values >= lo) & (values <= hi)
+    return {
+        "n": int(counts.sum()), "mean": float((values * counts).sum() / counts.sum()),
+        "q1": q1, "median": median, "q3": q3,
+        "lowerfence": float(values[inside].min()), "upperfence": float(values[inside].max()),
+        "outliers": values[~inside].tolist(), "outlier_counts": counts[~inside].tolist(),
+    }
+
+
+def stratified_sample(df: pd.DataFrame, by: str, n: int, min_per=50, seed=0) -> pd.DataFrame:
+    """About `n` rows, allocated to each `by` group in proportion to its size but at least `min_per`."""
+    if len(df) <= n:
+        return df
+    codes, _ = pd.factorize(df[by])
+    sizes = np.bincount(codes)
+    quota = np.minimum(sizes, np.maximum(min_per, np.round(n * sizes / sizes.sum()).astype(np.int64)))
+    # a random key per row; each group keeps its `quota` smallest keys (no sort of the frame)
+    keys = np.random.default_rng(seed).random(len(codes))
+    take = []
+    for g, q in enumerate(quota):
+        rows = np.flatnonzero(codes == g)
+        take.append(rows if q >= len(rows) else rows[np.argpartition(keys[rows], q)[:q]])
+    return df.iloc[np.sort(np.concatenate(take))]
+
+
+class FigureCache:
+    """Bounded LRU of built figures and their JSON; thread-safe, shared by every session."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._d = OrderedDict()
+        self._lock = threading.Lock()
+        self._n = {"hits": 0, "misses": 0, "build_s": 0.0}
+
+    def get(self, key, build) -> CachedFigure:
+        """The cached entry for `key`, or `build()`'s figure after caching it."""
+        with self._lock:
+            hit = self._d.get(key)
+            if hit is not None:
+                self._d.move_to_end(key)
+                self._n["hits"] += 1
+                return hit
+        t = time.perf_counter()
+        fig = build()
+        js = fig.to_json()
+        elapsed = time.perf_counter() - t
+        entry = CachedFigure(fig, js, elapsed * 1000)
+        with self._lock:
+            self._d[key] = entry
+            self._n["misses"] += 1
+            self._n["build_s"] += elapsed
+            while len(self._d) > self.max_entries:
+                self._d.popitem(last=False)
+        return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._n)
+            s["entries"] = len(self._d)
+            s["bytes"] = sum(len(e.json) for e in self._d.values())
+        return s
+
+    def clear(self):
+        with self._lock:
+            self._d.clear()
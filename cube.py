@@ -0,0 +1,176 @@
+"""
+Pre-aggregated City x Type_of_vehicle x Type_of_order statistics cube.
+
+Each cell holds mergeable sufficient statistics (row count, sums and
+threshold counts). Every KPI the sidebar, the Analytics tab and the Copilot
+`signals` dict need is derived by summing the cells of the selected cities:
+a few hundred cells at most, instead of a scan over every delivery row per
+rerun. Delivery_Time_min is an integer column, so its sums and therefore the
+ETA means and rates are exact; float sums (rating, distance) agree with a
+row scan to float rounding. Each cell also carries `sketches.BinnedSketch`
+counts for delivery time (lossless) and distance (0.01 km bins), which
+serve the median/percentile KPIs and the time histogram.
+
+    cube = StatsCube.build(df_full)
+    cube.totals(["Pune", "Indore"])["delayed_pct"]
+    cube.breakdown("Type_of_vehicle", ["Pune"])["avg_time"]
+    cube.sketch("distance", ["Pune"]).median()
+    cube.sketches_by("Type_of_vehicle", "time", ["Pune"])["Scooter"].quantile(0.75)
+"""
+import numpy as np
+import pandas as pd
+
+from sketches import BinnedSketch
+
+DIMS = ["City", "Type_of_vehicle", "Type_of_order"]
+DELAY_MIN, FAST_MIN, LOW_RATING = 35, 25, 4.0
+
+STAT_COLS = ["n", "time_sum", "delayed_n", "fast_n",
+             "rating_sum", "low_rating_n", "distance_sum"]
+
+# Per-cell quantile/histogram sketches: name -> (source column, BinnedSketch binning).
+SKETCHES = {
+    "time":     ("Delivery_Time_min", dict(lo=0, width=1,    nbins=180,  discrete=True)),
+    "distance": ("distance_km",       dict(lo=0, width=0.01, nbins=5001)),  # 50 km filter -> < 50.01
+}
+
+
+def _cell_frame(df: pd.DataFrame) -> pd.DataFrame:
+    t = df["Delivery_Time_min"].astype("int64")
+    r = df["Delivery_person_Ratings"]
+    return pd.DataFrame({
+        **{d: df[d] for d in DIMS},
+        "n":            1,
+        "time_sum":     t,
+        "delayed_n":    (t > DELAY_MIN).astype("int64"),
+        "fast_n":       (t < FAST_MIN).astype("int64"),
+        "rating_sum":   r.astype("float64"),
+        "low_rating_n": (r < LOW_RATING).astype("int64"),
+        "distance_sum": df["distance_km"].astype("float64"),
+    })
+
+
+def cell_stats(df: pd.DataFrame):
+    """(cells, sketches) for a cleaned frame or a slice of new rows.
+
+    `cells` holds one row of STAT_COLS sums per (City, vehicle, order) key;
+    `sketches[name]` is an (n_cells, nbins + 2) count matrix aligned with it.
+    """
+    g = _cell_frame(df).groupby(DIMS, observed=True, sort=True)
+    cells = g[STAT_COLS].sum()
+    cell_of_row = g.ngroup().to_numpy()
+    sketches = {}
+    for name, (col, spec) in SKETCHES.items():
+        width = spec["nbins"] + 2
+        slots = cell_of_row * width + BinnedSketch(**spec).bin_index(df[col].to_numpy())
+        sketches[name] = np.bincount(slots, minlength=len(cells) * width).reshape(len(cells), width)
+    return cells, sketches
+
+
+def _derive(s):
+    """Stacked sums (last axis = STAT_COLS) -> the means and percentages the UI shows."""
+    n = s[..., 0]
+    return {
+        "n":             n,
+        "avg_time":      s[..., 1] / n,
+        "delayed_pct":   s[..., 2] / n * 100,
+        "fast_pct":      s[..., 3] / n * 100,
+        "avg_rating":    s[..., 4] / n,
+        "low_rated_pct": s[..., 5] / n * 100,
+        "avg_distance":  s[..., 6] / n,
+    }
+
+
+class StatsCube:
+    """`cells` is the canonical table; NumPy mirrors of it answer the queries."""
+
+    def __init__(self, cells: pd.DataFrame, sketches: dict):
+        self.cells, self.sketches = cells, sketches
+        self._stats = cells[STAT_COLS].to_numpy(np.float64)  # int sums stay exact below 2**53
+        self._codes, self._labels = {}, {}
+        for d in DIMS:
+            codes, labels = pd.factorize(cells.index.get_level_values(d), sort=True)
+            self._codes[d], self._labels[d] = codes, list(labels)
+        self._city_code = {c: i for i, c in enumerate(self._labels["City"])}
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "StatsCube":
+        return cls(*cell_stats(df))
+
+    def merge(self, other: "StatsCube") -> "StatsCube":
+        """Cube of the union of both inputs' rows."""
+        g = pd.concat([self.cells, other.cells]).groupby(level=DIMS, observed=True, sort=True)
+        cells, codes = g.sum(), g.ngroup().to_numpy()
+        sketches = {}
+        for name in SKETCHES:
+            stacked = np.concatenate([self.sketches[name], other.sketches[name]])
+            sketches[name] = np.zeros((len(cells), stacked.shape[1]), dtype=np.int64)
+            np.add.at(sketches[name], codes, stacked)
+        return StatsCube(cells, sketches)
+
+    @property
+    def cities(self):
+        return list(self._labels["City"])
+
+    def _mask(self, cities):
+        if not cities:  # None / empty selection means all cities, like the sidebar
+            return slice(None)
+        wanted = [self._city_code[c] for c in cities if c in self._city_code]
+        return np.isin(self._codes["City"], wanted)
+
+    def select(self, cities=None) -> pd.DataFrame:
+        """Cells of the given cities."""
+        return self.cells[self._mask(cities)]
+
+    def totals(self, cities=None) -> dict:
+        m = self._mask(cities)
+        out = {k: float(v) for k, v in _derive(self._stats[m].sum(axis=0)).items()}
+        out["n"] = int(out["n"])
+        out["cities"] = int(np.unique(self._codes["City"][m]).size)
+        return out
+
+    def sketch(self, name, cities=None) -> BinnedSketch:
+        """Merged `SKETCHES[name]` sketch over the selected cities."""
+        counts = self.sketches[name][self._mask(cities)].sum(axis=0)
+        return BinnedSketch(**SKETCHES[name][1], counts=counts)
+
+    def sketches_by(self, dim, name, cities=None) -> dict:
+        """{value of `dim`: merged `SKETCHES[name]` sketch} over the selected cities, sorted by value."""
+        m = self._mask(cities)
+        counts = np.zeros((len(self._labels[dim]), self.sketches[name].shape[1]), dtype=np.int64)
+        np.add.at(counts, self._codes[dim][m], self.sketches[name][m])
+        return {label: BinnedSketch(**SKETCHES[name][1], counts=c)
+                for label, c in zip(self._labels[dim], counts) if c.any()}
+
+    def _grouped(self, dim, cities):
+        m = self._mask(cities)
+        sums = np.zeros((len(self._labels[dim]), len(STAT_COLS)))
+        np.add.at(sums, self._codes[dim][m], self._stats[m])
+        present = sums[:, 0] > 0
+        return [l for l, p in zip(self._labels[dim], present) if p], _derive(sums[present])
+
+    def breakdown(self, dim, cities=None) -> pd.DataFrame:
+        """Derived stats per value of one dimension, sorted by that value."""
+        labels, stats = self._grouped(dim, cities)
+        return pd.DataFrame(stats, index=pd.Index(labels, name=dim))
+
+
+def build_signals(cube: StatsCube, cities=None) -> dict:
+    """The Copilot / email `signals` snapshot, answered from the cube."""
+    t = cube.totals(cities)
+    by_v, by_c, by_o = (cube._grouped(d, cities) for d in ("Type_of_vehicle", "City", "Type_of_order"))
+    eta = lambda g: dict(zip(g[0], np.round(g[1]["avg_time"], 2).tolist()))
+    return {
+        "total_deliveries":       t["n"],
+        "avg_delivery_time_min":  round(t["avg_time"], 2),
+        "delayed_pct":            round(t["delayed_pct"], 2),
+        "fast_pct":               round(t["fast_pct"], 2),
+        "avg_partner_rating":     round(t["avg_rating"], 2),
+        "avg_distance_km":        round(t["avg_distance"], 2),
+        "cities_covered":         t["cities"],
+        "low_rated_partners_pct": round(t["low_rated_pct"], 2),
+        "avg_eta_by_vehicle":     eta(by_v),
+        "avg_eta_by_city":        eta(by_c),
+        "avg_eta_by_order_type":  eta(by_o),
+        "delay_rate_by_city":     {k: round(v, 2) for k, v in zip(by_c[0], by_c[1]["delayed_pct"].tolist())},
+    }
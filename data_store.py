@@ -0,0 +1,323 @@
+"""
+Columnar on-disk cache of the cleaned delivery frame.
+
+`build_store` runs `features.clean_frame` and `compact.compact_frame` once and
+writes every column as its own .npy file: numerics as (downcast) typed
+arrays, category columns as their integer codes plus a fixed-width
+`categories` array, other strings dictionary-encoded the same way. A
+manifest records the SHA-256 of the source CSV and the cleaning version.
+
+`load_store` memory-maps those files, so numeric columns and category codes
+come back zero-copy. `load_clean_frame` is what the app calls: it uses the store when
+it matches the CSV's content hash and otherwise falls back to parsing the
+CSV (and rebuilds the store for next time).
+
+`append_frame` adds already-cleaned rows in place (see `ingest.py`): array
+files grow at the end, new category/dictionary values rewrite only that
+column under a new file name, and the manifest's `rows` is the commit point
+that readers slice to.
+
+    python data_store.py build           # writes .cache/delivery_store/
+    python data_store.py info
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not serialized across processes
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from compact import compact_frame
+from features import clean_frame
+
+BASE_DIR    = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(BASE_DIR, "Delivery_Dataset.csv")
+DEFAULT_DIR = os.path.join(BASE_DIR, ".cache", "delivery_store")
+
+# Bump whenever clean_frame/compact_frame output changes so old stores are rebuilt.
+CLEAN_VERSION = 2
+MANIFEST = "manifest.json"
+INDEX_COL = "__index__"
+LOCK = ".lock"
+
+
+def file_sha256(path, block=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while chunk := fh.read(block):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _is_string(s: pd.Series):
+    return pd.api.types.is_string_dtype(s.dtype) or s.dtype == object
+
+
+def write_frame(df: pd.DataFrame, store_dir, meta=None):
+    """Write `df` as a column store, replacing `store_dir`.
+
+    The new store is written beside it and swapped in by rename: the old
+    directory is renamed aside first and deleted afterwards, so readers see
+    either store, or none only between those two renames (not for a whole
+    delete). Open maps of the old files stay valid.
+    """
+    parent = os.path.dirname(os.path.abspath(store_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".store-", dir=parent)
+    columns = []
+    for i, (name, s) in enumerate([(INDEX_COL, df.index.to_series())] + list(df.items())):
+        col = {"name": name, "file": f"c{i:03d}", "dtype": str(s.dtype)}
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(tmp, col["file"] + ".codes.npy"), s.cat.codes.to_numpy())
+            np.save(os.path.join(tmp, col["file"] + ".cats.npy"), np.asarray(s.cat.categories, dtype=str))
+            col["kind"] = "category"
+        elif _is_string(s):
+            codes, cats = pd.factorize(s, use_na_sentinel=False)
+            np.save(os.path.join(tmp, col["file"] + ".codes.npy"), codes.astype(np.int32))
+            np.save(os.path.join(tmp, col["file"] + ".cats.npy"), np.asarray(cats, dtype=str))
+            col["kind"] = "dict"
+        else:
+            np.save(os.path.join(tmp, col["file"] + ".npy"), np.ascontiguousarray(s.to_numpy()))
+            col["kind"] = "array"
+        columns.append(col)
+    manifest = {"rows": len(df), "columns": columns, **(meta or {})}
+    _write_manifest(tmp, manifest)
+    aside = None
+    if os.path.exists(store_dir):
+        aside = tempfile.mkdtemp(prefix=".store-old-", dir=parent)
+        os.replace(store_dir, aside)  # an empty directory may be replaced by rename
+    os.replace(tmp, store_dir)
+    if aside is not None:
+        shutil.rmtree(aside, ignore_errors=True)
+    return manifest
+
+
+def _write_manifest(store_dir, manifest):
+    tmp = os.path.join(store_dir, MANIFEST + ".tmp")
+    with open(tmp, "w") as fh:
+        json.dump(manifest, fh, indent=1)
+    os.replace(tmp, os.path.join(store_dir, MANIFEST))
+
+
+def read_manifest(store_dir):
+    try:
+        with open(os.path.join(store_dir, MANIFEST)) as fh:
+            return json.load(fh)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def read_frame(store_dir, manifest=None) -> pd.DataFrame:
+    """Memory-map a column store back into a DataFrame (numerics zero-copy)."""
+    manifest = manifest or read_manifest(store_dir)
+    rows = manifest["rows"]  # files may hold a torn tail from an interrupted append
+    cols = {}
+    for col in manifest["columns"]:
+        path = os.path.join(store_dir, col["file"])
+        if col["kind"] == "category":
+            codes = np.load(path + ".codes.npy", mmap_mode="r").view(np.ndarray)[:rows]
+            cols[col["name"]] = pd.Categorical.from_codes(codes, categories=np.load(path + ".cats.npy"))
+        elif col["kind"] == "dict":
+            codes = np.load(path + ".codes.npy", mmap_mode="r")[:rows]
+            cats  = np.load(path + ".cats.npy")
+            cols[col["name"]] = pd.array(cats.take(codes), dtype=col["dtype"])
+        else:
+            # plain ndarray view over the map: zero-copy, but no memmap subclass
+            # leaking into pandas results
+            cols[col["name"]] = np.load(path + ".npy", mmap_mode="r").view(np.ndarray)[:rows]
+    index = pd.Index(np.asarray(cols.pop(INDEX_COL)))
+    return pd.DataFrame(cols, index=index, copy=False)
+
+
+# ── in-place append ──
+def _append_npy(path, values, rows):
+    """Truncate the .npy at `path` to `rows` items, append `values`, fix up the header.
+
+    numpy pads headers so the shape can grow without moving the data
+    (GROWTH_AXIS_MAX_DIGITS); anything else is refused rather than corrupting the file.
+    """
+    fmt = np.lib.format
+    with open(path, "r+b") as fh:
+        version = fmt.read_magic(fh)
+        read_header, write_header = ((fmt.read_array_header_1_0, fmt.write_array_header_1_0)
+                                     if version == (1, 0) else
+                                     (fmt.read_array_header_2_0, fmt.write_array_header_2_0))
+        shape, fortran, dtype = read_header(fh)
+        offset = fh.tell()
+        if fortran or len(shape) != 1 or values.dtype != dtype:
+            raise ValueError(f"{path}: cannot append {values.dtype} to {dtype}{shape}")
+        fh.truncate(offset + rows * dtype.itemsize)
+        fh.seek(0, os.SEEK_END)
+        fh.write(np.ascontiguousarray(values).tobytes())
+        fh.seek(0)
+        write_header(fh, {"descr": fmt.dtype_to_descr(dtype), "fortran_order": False,
+                          "shape": (rows + len(values),)})
+        if fh.tell() != offset:
+            raise ValueError(f"{path}: header grew past its padding")
+
+
+def _fits(values, dtype):
+    cast = values.astype(dtype)
+    return np.array_equal(cast.astype(values.dtype), values, equal_nan=values.dtype.kind == "f")
+
+
+def _append_column(store_dir, col, s, rows, gen):
+    """Append Series `s` to one manifest column; returns the (possibly renamed) entry."""
+    path = os.path.join(store_dir, col["file"])
+    if col["kind"] == "array":
+        values, dtype = s.to_numpy(), np.dtype(col["dtype"])
+        if _fits(values, dtype):
+            _append_npy(path + ".npy", values.astype(dtype), rows)
+            return col
+        # widen: rewrite this one column under a new name
+        old = np.load(path + ".npy", mmap_mode="r")[:rows]
+        merged = np.concatenate([old, values]).astype(np.result_type(old.dtype, values.dtype))
+        if merged.dtype.kind in "iu":  # keep it as narrow as compact_frame would
+            merged = pd.to_numeric(merged, downcast="integer")
+        col = {**col, "file": f"{col['file'].split('.')[0]}.{gen}", "dtype": str(merged.dtype)}
+        np.save(os.path.join(store_dir, col["file"] + ".npy"), merged)
+        return col
+
+    cats = np.load(path + ".cats.npy")
+    values = s.astype(object).where(s.notna(), None).to_numpy()
+    idx = pd.Index(cats).get_indexer(values)
+    new = pd.unique(values[(idx < 0) & pd.notna(values)])
+    if col["kind"] == "dict":
+        if len(new):  # dictionary order is arbitrary: just extend it
+            cats = np.asarray(np.concatenate([cats.astype(object), new]), dtype=str)
+            idx = pd.Index(cats).get_indexer(values)
+            col = {**col, "file": f"{col['file'].split('.')[0]}.{gen}"}
+            old = np.load(path + ".codes.npy", mmap_mode="r")[:rows]
+            np.save(os.path.join(store_dir, col["file"] + ".codes.npy"),
+                    np.concatenate([old, idx.astype(np.int32)]))
+            np.save(os.path.join(store_dir, col["file"] + ".cats.npy"), cats)
+        else:
+            _append_npy(path + ".codes.npy", idx.astype(np.int32), rows)
+        return col
+
+    # category: categories stay sorted, so new values re-code the whole column
+    old_codes = np.load(path + ".codes.npy", mmap_mode="r")
+    if not len(new):
+        _append_npy(path + ".codes.npy", idx.astype(old_codes.dtype), rows)
+        return col
+    old = pd.Categorical.from_codes(old_codes[:rows], categories=cats)
+    merged = pd.Categorical(np.concatenate([np.asarray(old, dtype=object), values]),
+                            categories=sorted(set(cats) | set(new)))
+    col = {**col, "file": f"{col['file'].split('.')[0]}.{gen}"}
+    np.save(os.path.join(store_dir, col["file"] + ".codes.npy"), merged.codes)
+    np.save(os.path.join(store_dir, col["file"] + ".cats.npy"), np.asarray(merged.categories, dtype=str))
+    return col
+
+
+def append_frame(df: pd.DataFrame, store_dir, meta=None, raw_rows=None):
+    """Append cleaned rows to an existing store in place; returns the new manifest.
+
+    `df` must have the store's columns. Rows become visible to readers only
+    when the manifest is replaced at the end, and concurrent appenders are
+    serialized with a lock file. With `raw_rows`, `df`'s index is taken as
+    positions in a raw batch of that many rows: it is shifted past the
+    manifest's `next_index`, which then advances by `raw_rows`, all under
+    the lock, so concurrent appenders never reuse index labels.
+    """
+    with open(os.path.join(store_dir, LOCK), "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        manifest = read_manifest(store_dir)
+        names = [c["name"] for c in manifest["columns"][1:]]
+        if list(df.columns) != names:
+            raise ValueError(f"column mismatch: store has {names}, got {list(df.columns)}")
+        if raw_rows is not None:
+            start = manifest.get("next_index")
+            if start is None:  # store built before next_index was recorded: after its largest label
+                index = np.load(os.path.join(store_dir, manifest["columns"][0]["file"] + ".npy"), mmap_mode="r")
+                start = int(index[:manifest["rows"]].max()) + 1 if manifest["rows"] else 0
+            df = df.set_axis(df.index + start)
+            meta = {**(meta or {}), "next_index": start + raw_rows}
+        if not len(df):
+            manifest = {**manifest, **(meta or {})}
+            _write_manifest(store_dir, manifest)
+            return manifest
+        rows, gen = manifest["rows"], manifest.get("appends", 0) + 1
+        columns = [_append_column(store_dir, col, df.index.to_series() if col["name"] == INDEX_COL
+                                  else df[col["name"]], rows, gen)
+                   for col in manifest["columns"]]
+        stale = {c["file"] for c in manifest["columns"]} - {c["file"] for c in columns}
+        manifest = {**manifest, **(meta or {}), "rows": rows + len(df), "columns": columns, "appends": gen}
+        _write_manifest(store_dir, manifest)
+        for f in stale:  # superseded column files; open maps keep their inode
+            for ext in (".npy", ".codes.npy", ".cats.npy"):
+                if os.path.exists(os.path.join(store_dir, f + ext)):
+                    os.remove(os.path.join(store_dir, f + ext))
+        return manifest
+
+
+def build_store(csv_path=DEFAULT_CSV, store_dir=DEFAULT_DIR):
+    """Parse + clean `csv_path` and write it as a column store."""
+    digest = file_sha256(csv_path)
+    raw = pd.read_csv(csv_path)
+    df = compact_frame(clean_frame(raw))
+    write_frame(df, store_dir, {"source_sha256": digest, "clean_version": CLEAN_VERSION,
+                                "next_index": len(raw)})
+    return df
+
+
+def is_fresh(manifest, csv_path):
+    return (manifest is not None
+            and manifest.get("clean_version") == CLEAN_VERSION
+            and manifest.get("source_sha256") == file_sha256(csv_path))
+
+
+def load_store(csv_path=DEFAULT_CSV, store_dir=DEFAULT_DIR):
+    """Mapped frame if the store matches the CSV's content hash, else None."""
+    manifest = read_manifest(store_dir)
+    if not is_fresh(manifest, csv_path):
+        return None
+    return read_frame(store_dir, manifest)
+
+
+def load_clean_frame(csv_path=DEFAULT_CSV, store_dir=DEFAULT_DIR, rebuild=True):
+    """Cleaned frame from the store when fresh, else from the CSV (rebuilding the store)."""
+    df = load_store(csv_path, store_dir)
+    if df is not None:
+        return df
+    if rebuild:
+        try:
+            build_store(csv_path, store_dir)
+            return read_frame(store_dir)
+        except OSError:
+            pass  # read-only checkout: fall through to the plain CSV path
+    return compact_frame(clean_frame(pd.read_csv(csv_path)))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build or inspect the columnar delivery cache.")
+    ap.add_argument("cmd", choices=["build", "info"])
+    ap.add_argument("--csv", default=DEFAULT_CSV)
+    ap.add_argument("--dir", default=DEFAULT_DIR)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "build":
+        df = build_store(args.csv, args.dir)
+        print(f"{len(df):,} rows x {df.shape[1]} columns -> {args.dir}")
+    else:
+        m = read_manifest(args.dir)
+        if m is None:
+            print(f"no store at {args.dir}")
+            return
+        fresh = "fresh" if is_fresh(m, args.csv) else "STALE"
+        print(f"{args.dir}: {m['rows']:,} rows, {len(m['columns']) - 1} columns, {fresh}, "
+              f"{m.get('appends', 0)} appended batches")
+        for c in m["columns"][1:]:
+            print(f"  {c['name']:<30} {c['kind']:<6} {c['dtype']}")
+
+
+if __name__ == "__main__":
+    main()
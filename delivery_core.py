@@ -0,0 +1,56 @@
+"""
+Headless entry point to the prediction, feature and analytics code.
+
+Importing this module loads nothing heavy: each name below resolves to its
+defining module on first access (PEP 562 `__getattr__`), so a caller pays
+only for what it uses. Touching `predict_frame` costs numpy; `clean_frame`
+or `StatsCube` add pandas; `load_model()` adds joblib + sklearn while
+unpickling; the first `Integrations()` adds httpx. Nothing here imports
+Streamlit or plotly. Those are needed only by app.py.
+
+    import delivery_core as core
+    model, features = core.load_model()
+    core.predict_one(model, features, 30, 4.5, 5.0, "Meal", "Motorcycle")
+    signals = core.build_signals(core.StatsCube.build(core.load_clean_frame()), ["Pune"])
+
+`python -m benchmarks.bench_import` compares these paths with app.py's
+import stack.
+"""
+import importlib
+
+_EXPORTS = {
+    # features
+    "ORDER_MAP": "features", "VEHICLE_MAP": "features", "haversine": "features",
+    "clean_frame": "features", "encode_features": "features", "normalize_label": "features",
+    # prediction
+    "load_model": "inference", "predict_frame": "inference", "predict_one": "inference",
+    "FlatEnsemble": "tree_kernel", "compile_model": "tree_kernel",
+    "BACKENDS": "backends", "feature_importances": "backends",
+    "PredictionMemo": "predict_memo", "ParallelScorer": "parallel_predict", "score_file": "batch_predict",
+    # data + analytics
+    "load_clean_frame": "data_store", "append_frame": "data_store",
+    "StatsCube": "cube", "build_signals": "cube", "BinnedSketch": "sketches",
+    "FigureCache": "chart_data", "box_summary": "chart_data", "stratified_sample": "chart_data",
+    "LiveData": "ingest", "ingest_frame": "ingest", "GeoIndex": "geo_index",
+    "Explorer": "explorer", "Query": "explorer",
+    # AI / email
+    "OpsAI": "ops_ai", "classify": "ops_ai", "build_context": "prompt_context",
+    "render_report": "email_report", "bulk_send": "email_report",
+    "Integrations": "integrations", "LLMCache": "llm_cache",
+    # instrumentation
+    "timer": "metrics",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
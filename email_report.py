@@ -0,0 +1,247 @@
+"""
+HTML email report rendering and bulk fan-out over Resend.
+
+The report markup is split into format templates bound once at import
+(page shell, breakdown tables, one row template each). `render_report`
+fills them with joined row lists (text from the model is HTML-escaped) and
+memoizes the result per `decision`/`signals` snapshot, so sending one
+report to many recipients, or re-sending an unchanged one, renders it once.
+
+`send_bulk` fans a rendered report out to a recipient list through Resend's
+batch endpoint: recipients are chunked into `batch_size` messages per
+request (each recipient gets their own message, so nobody sees the list),
+requests are paced by a token bucket (`rate` per second, Resend's default
+account limit is 2) and at most `concurrency` are in flight. Every
+recipient ends up with a status: "sent" (with the Resend id), "failed"
+(with the error) or "invalid" (rejected before sending).
+
+    report = render_report(decision, signals)
+    valid, invalid = parse_recipients("a@x.com, b@y.com")
+    status = bulk_send(clients, RESEND_API_KEY, "Delivery AI <ops@x.com>", report, valid + invalid)
+    summarize(status)   # {"sent": 2}
+
+Against a local mock: `benchmarks/fake_apis.py` serves /emails/batch.
+"""
+import asyncio
+import hashlib
+import html
+import json
+import re
+import threading
+import uuid
+from collections import Counter, OrderedDict, namedtuple
+
+from integrations import RateLimiter
+
+STATUS_COLORS = {"GOOD": "#10b981", "WARNING": "#f59e0b", "CRITICAL": "#ef4444", "ERROR": "#6b7280"}
+MAX_BATCH = 100   # Resend's limit per /emails/batch request
+EMAIL_RE = re.compile(r"^[^@\s,;]+@[^@\s,;]+\.[^@\s,;]+$")
+
+Report = namedtuple("Report", "key subject html")
+
+# ── templates ──
+_CITY_ROW = """
+        <tr>
+          <td style="padding:10px 14px;color:#e8f0fe;font-size:13px;border-bottom:1px solid #1a2d45;">{city}</td>
+          <td style="padding:10px 14px;color:#00c8f0;font-family:monospace;font-size:13px;border-bottom:1px solid #1a2d45;">{eta} min</td>
+          <td style="padding:10px 14px;font-family:monospace;font-size:13px;border-bottom:1px solid #1a2d45;color:{delay_color};">{delay}%</td>
+        </tr>""".format
+
+_VEHICLE_ROW = """
+        <tr>
+          <td style="padding:10px 14px;color:#e8f0fe;font-size:13px;border-bottom:1px solid #1a2d45;">{vehicle}</td>
+          <td style="padding:10px 14px;color:#00c8f0;font-family:monospace;font-size:13px;border-bottom:1px solid #1a2d45;">{eta} min</td>
+        </tr>""".format
+
+_TH = '<th style="padding:10px 14px;text-align:left;color:#7a8fad;font-size:10px;letter-spacing:1.2px;text-transform:uppercase;border-bottom:1px solid #1a2d45;">'
+_TABLE = '<div style="margin-bottom:22px;"><p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">{title}</p><table style="width:100%;border-collapse:collapse;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;overflow:hidden;"><thead><tr>{head}</tr></thead><tbody>{rows}</tbody></table></div>'.format
+_CITY_HEAD = "".join(f"{_TH}{h}</th>" for h in ("City", "Avg ETA", "Delay Rate"))
+_VEHICLE_HEAD = "".join(f"{_TH}{h}</th>" for h in ("Vehicle", "Avg ETA"))
+
+_PAGE = """
+<div style="font-family:Arial,sans-serif;max-width:680px;margin:0 auto;background:#080d18;padding:36px;border-radius:18px;border:1px solid #1a2d45;">
+  <div style="height:3px;background:linear-gradient(90deg,#00c8f0,#6d28d9,#f59e0b);border-radius:3px;margin-bottom:28px;"></div>
+
+  <h1 style="color:#e8f0fe;font-size:22px;margin:0 0 5px 0;font-family:monospace;letter-spacing:-0.5px;">Delivery Performance Report</h1>
+  <p style="color:#7a8fad;font-size:12px;margin:0 0 22px 0;">Smart Delivery AI Platform &nbsp;·&nbsp; Auto-generated alert</p>
+
+  <div style="display:inline-block;background:{c}22;color:{c};padding:5px 18px;border-radius:20px;font-size:11px;font-weight:700;letter-spacing:2px;text-transform:uppercase;border:1px solid {c}55;margin-bottom:26px;font-family:monospace;">{status}</div>
+
+  <!-- KPI row -->
+  <div style="display:flex;gap:12px;margin-bottom:22px;flex-wrap:wrap;">
+    <div style="flex:1;min-width:120px;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:16px 18px;">
+      <div style="color:#7a8fad;font-size:10px;letter-spacing:1.5px;text-transform:uppercase;margin-bottom:6px;">Avg ETA</div>
+      <div style="color:#00c8f0;font-family:monospace;font-size:22px;font-weight:700;">{avg_eta} min</div>
+    </div>
+    <div style="flex:1;min-width:120px;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:16px 18px;">
+      <div style="color:#7a8fad;font-size:10px;letter-spacing:1.5px;text-transform:uppercase;margin-bottom:6px;">Delayed &gt;35min</div>
+      <div style="color:#ef4444;font-family:monospace;font-size:22px;font-weight:700;">{delayed_pct}%</div>
+    </div>
+    <div style="flex:1;min-width:120px;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:16px 18px;">
+      <div style="color:#7a8fad;font-size:10px;letter-spacing:1.5px;text-transform:uppercase;margin-bottom:6px;">Avg Rating</div>
+      <div style="color:#10b981;font-family:monospace;font-size:22px;font-weight:700;">{rating}</div>
+    </div>
+    <div style="flex:1;min-width:120px;background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:16px 18px;">
+      <div style="color:#7a8fad;font-size:10px;letter-spacing:1.5px;text-transform:uppercase;margin-bottom:6px;">Total Orders</div>
+      <div style="color:#e8f0fe;font-family:monospace;font-size:22px;font-weight:700;">{total}</div>
+    </div>
+  </div>
+
+  <!-- Analysis -->
+  <div style="background:#0d1525;border:1px solid #1a2d45;border-radius:12px;padding:20px;margin-bottom:14px;">
+    <p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">AI Analysis</p>
+    <p style="color:#e8f0fe;font-size:14px;line-height:1.75;margin:0;">{reason}</p>
+  </div>
+
+  <!-- Immediate Action -->
+  <div style="background:#0d1525;border:1px solid #1a2d45;border-left:3px solid #f59e0b;border-radius:12px;padding:20px;margin-bottom:14px;">
+    <p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">Immediate Action (24h)</p>
+    <p style="color:#e8f0fe;font-size:14px;line-height:1.75;margin:0;">{action}</p>
+  </div>
+
+  <!-- Long-Term -->
+  <div style="background:#0d1525;border:1px solid #1a2d45;border-left:3px solid #00c8f0;border-radius:12px;padding:20px;margin-bottom:22px;">
+    <p style="color:#7a8fad;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;margin:0 0 10px 0;">Long-Term Strategy</p>
+    <p style="color:#e8f0fe;font-size:14px;line-height:1.75;margin:0;">{long_term}</p>
+  </div>
+
+  <!-- City Breakdown Table -->
+  {city_table}
+
+  <!-- Vehicle Breakdown Table -->
+  {vehicle_table}
+
+  <hr style="border:none;border-top:1px solid #1a2d45;margin:0 0 18px 0;"/>
+  <p style="color:#3a4a5c;font-size:11px;margin:0;">Powered by Gradient Boosting ML · Llama 3.3 70B · Smart Delivery AI</p>
+</div>""".format
+
+
+# ── rendering ──
+_RENDERED = OrderedDict()   # snapshot key -> Report
+_RENDERED_MAX = 16
+_RENDERED_LOCK = threading.Lock()   # report_job renders from a thread pool
+
+
+def _e(value):
+    return html.escape(str(value), quote=False)
+
+
+def _delay_color(delay):
+    return "#ef4444" if delay > 20 else "#f59e0b" if delay > 10 else "#10b981"
+
+
+def _render(decision, signals, key):
+    status = decision.get("status", "N/A")
+    c = STATUS_COLORS.get(decision.get("status", "ERROR"), "#6b7280")
+    delays = signals.get("delay_rate_by_city", {})
+    city_rows = "".join(
+        _CITY_ROW(city=_e(city), eta=eta, delay=delays.get(city, 0),
+                  delay_color=_delay_color(delays.get(city, 0)))
+        for city, eta in signals.get("avg_eta_by_city", {}).items())
+    vehicle_rows = "".join(
+        _VEHICLE_ROW(vehicle=_e(vehicle), eta=eta)
+        for vehicle, eta in signals.get("avg_eta_by_vehicle", {}).items())
+    total = signals.get("total_deliveries", "—")
+    page = _PAGE(
+        c=c, status=_e(status),
+        avg_eta=signals.get("avg_delivery_time_min", "—"),
+        delayed_pct=signals.get("delayed_pct", "—"),
+        rating=signals.get("avg_partner_rating", "—"),
+        total=f"{total:,}" if isinstance(total, (int, float)) else total,
+        reason=_e(decision.get("reason", "")),
+        action=_e(decision.get("immediate_action", "")),
+        long_term=_e(decision.get("long_term_recommendation", "")),
+        city_table=_TABLE(title="City Breakdown", head=_CITY_HEAD, rows=city_rows) if city_rows else "",
+        vehicle_table=_TABLE(title="Vehicle Breakdown", head=_VEHICLE_HEAD, rows=vehicle_rows) if vehicle_rows else "",
+    )
+    return Report(key, f"[{status}] Delivery Performance Alert — Action Required", page)
+
+
+def render_report(decision, signals) -> Report:
+    """Subject and HTML body for one snapshot; memoized on its content."""
+    key = hashlib.sha256(json.dumps([decision, signals], sort_keys=True, default=str).encode()).hexdigest()
+    with _RENDERED_LOCK:
+        report = _RENDERED.get(key)
+        if report is not None:
+            _RENDERED.move_to_end(key)
+            return report
+    report = _render(decision, signals, key)  # outside the lock: a race only renders twice
+    with _RENDERED_LOCK:
+        _RENDERED[key] = report
+        while len(_RENDERED) > _RENDERED_MAX:
+            _RENDERED.popitem(last=False)
+    return report
+
+
+# ── recipients ──
+def parse_recipients(text):
+    """Split a comma / semicolon / newline separated list into (valid, invalid), de-duplicated."""
+    items = text if isinstance(text, (list, tuple)) else re.split(r"[,;\s]+", text or "")
+    valid, invalid, seen = [], [], set()
+    for item in items:
+        addr = item.strip()
+        if not addr or addr.lower() in seen:
+            continue
+        seen.add(addr.lower())
+        (valid if EMAIL_RE.match(addr) else invalid).append(addr)
+    return valid, invalid
+
+
+def summarize(status) -> dict:
+    return dict(Counter(s["status"] for s in status.values()))
+
+
+# ── fan-out ──
+async def send_bulk(clients, api_key, sender, report, recipients, batch_size=50, rate=2.0,
+                    concurrency=2, run_id=None, on_status=None):
+    """Per-recipient status dict for sending `report` to `recipients`.
+
+    `run_id` seeds the per-batch idempotency keys: re-running the same
+    `run_id` (e.g. a retried scheduled job) does not deliver twice. By
+    default every call is a new run. `on_status(email, status)` is called
+    as each recipient's outcome is known.
+    """
+    valid, invalid = parse_recipients(recipients)
+    status = {addr: {"status": "invalid", "error": "malformed address"} for addr in invalid}
+    status.update({addr: {"status": "pending"} for addr in valid})
+    if on_status:
+        for addr in invalid:
+            on_status(addr, status[addr])
+
+    size = max(1, min(batch_size, MAX_BATCH))
+    batches = [valid[i:i + size] for i in range(0, len(valid), size)]
+    run_id = run_id or uuid.uuid4().hex
+    limiter, sem = RateLimiter(rate), asyncio.Semaphore(concurrency)
+
+    def mark(addr, **s):
+        status[addr] = s
+        if on_status:
+            on_status(addr, s)
+
+    async def send(batch):
+        key = hashlib.sha256(f"{run_id}:{report.key}:{','.join(batch)}".encode()).hexdigest()[:48]
+        messages = [{"from": sender, "to": [addr], "subject": report.subject, "html": report.html}
+                    for addr in batch]
+        async with sem:
+            await limiter.acquire()
+            try:
+                data = await clients.resend_batch(api_key, messages, idempotency_key=key)
+            except Exception as e:
+                for addr in batch:
+                    mark(addr, status="failed", error=str(e) or type(e).__name__)
+                return
+        ids = data.get("data") or []
+        for i, addr in enumerate(batch):
+            mark(addr, status="sent", id=ids[i].get("id") if i < len(ids) else None)
+
+    await asyncio.gather(*(send(b) for b in batches))
+    return status
+
+
+def bulk_send(clients, api_key, sender, report, recipients, batch_size=50, rate=2.0,
+              concurrency=2, run_id=None, on_status=None):
+    """Blocking `send_bulk`; the deadline is stretched by the time the rate limit needs."""
+    n = -(-len(parse_recipients(recipients)[0]) // max(1, min(batch_size, MAX_BATCH)))
+    return clients.call(send_bulk(clients, api_key, sender, report, recipients, batch_size, rate,
+                                  concurrency, run_id, on_status),
+                        timeout=clients.deadline + n / rate)
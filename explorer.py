@@ -0,0 +1,243 @@
+"""
+Query engine behind the Dataset Explorer tab: filter, sort, page, export.
+
+Works on the snapshot frame as it comes out of the column store (numeric
+columns are memory-mapped arrays, category columns integer codes). Queries
+never copy rows until a page is shown:
+
+  * predicates run column by column on the arrays. Category filters
+    (City, vehicle, order type, partner ID search) are matched against the
+    few hundred labels first and then compare integer codes. The result is
+    an array of matching row positions, cached per filter set so paging
+    does not re-filter.
+  * pages use a keyset cursor: (sort key, row position) of the last row
+    shown. The next page is the `size` smallest keys after the cursor,
+    picked with `np.argpartition`: O(matches) per page, never a full sort.
+    Ties are broken by row position, so pages are stable and disjoint.
+  * only the requested columns of the page rows are gathered (projection).
+  * `export` streams the whole result to CSV.gz or Parquet in chunks of
+    `chunk_rows` rows. A sorted export orders the row positions (ints
+    only); the rows themselves are gathered one chunk at a time.
+
+    ex = Explorer(df_full)
+    q = Query(partner="BANG", vehicles=("Scooter",), rating=(4.5, 5.0), sort="Delivery_Time_min", desc=True)
+    page = ex.page(q, size=50)                    # page.rows, page.total, page.cursor
+    ex.page(q, page.cursor, size=50)              # next page; cursor None when exhausted
+    ex.export(q, "late_scooters.csv.gz")          # or .parquet (pyarrow)
+
+    python explorer.py --partner BANG --vehicle Scooter --sort Delivery_Time_min --desc --out late.csv.gz
+"""
+import argparse
+import gzip
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+# (lo, hi) bounds are inclusive; None means "no constraint"
+Query = namedtuple("Query", "cities partner vehicles orders rating distance sort desc",
+                   defaults=((), "", (), (), None, None, None, False))
+Page = namedtuple("Page", "rows cursor total")
+
+RANGE_COLS = {"rating": "Delivery_person_Ratings", "distance": "distance_km"}
+SET_COLS = {"cities": "City", "vehicles": "Type_of_vehicle", "orders": "Type_of_order"}
+EXPORT_CHUNK_ROWS = 100_000
+
+
+class Explorer:
+    def __init__(self, frame: pd.DataFrame, cache_size=16):
+        self.frame = frame
+        self._codes, self._labels = {}, {}
+        for c in frame.columns:
+            if isinstance(frame[c].dtype, pd.CategoricalDtype):
+                self._codes[c] = frame[c].cat.codes.to_numpy()
+                self._labels[c] = [str(x) for x in frame[c].cat.categories]
+        self.sortable = [c for c in frame.columns if c in self._codes or pd.api.types.is_numeric_dtype(frame[c])]
+        self._matches, self._keys = OrderedDict(), {}
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.frame)
+
+    def labels(self, col):
+        """Category values of `col`, for filter widgets."""
+        return list(self._labels[col])
+
+    # ── filtering ──
+    def _label_codes(self, col, keep):
+        return np.array([i for i, label in enumerate(self._labels[col]) if keep(label)], dtype=np.int64)
+
+    def _filter(self, q: Query) -> np.ndarray:
+        m = np.ones(len(self.frame), dtype=bool)
+        for field, col in SET_COLS.items():
+            wanted = set(getattr(q, field) or ())
+            if wanted:
+                m &= np.isin(self._codes[col], self._label_codes(col, wanted.__contains__))
+        if q.partner:
+            needle = q.partner.strip().upper()
+            m &= np.isin(self._codes["Delivery_person_ID"],
+                         self._label_codes("Delivery_person_ID", lambda label: needle in label.upper()))
+        for field, col in RANGE_COLS.items():
+            bounds = getattr(q, field)
+            if bounds is not None:
+                v = self.frame[col].to_numpy()
+                if bounds[0] is not None:
+                    m &= v >= bounds[0]
+                if bounds[1] is not None:
+                    m &= v <= bounds[1]
+        return np.flatnonzero(m)
+
+    def matches(self, q: Query) -> np.ndarray:
+        """Ascending positions of the rows matching `q`'s filters (sort / cursor ignored)."""
+        key = (*(tuple(sorted(getattr(q, f) or ())) for f in SET_COLS), (q.partner or "").strip().upper(),
+               *(tuple(getattr(q, f)) if getattr(q, f) is not None else None for f in RANGE_COLS))
+        with self._lock:
+            hit = self._matches.get(key)
+            if hit is not None:
+                self._matches.move_to_end(key)
+                return hit
+        pos = self._filter(q)
+        with self._lock:
+            self._matches[key] = pos
+            while len(self._matches) > self._cache_size:
+                self._matches.popitem(last=False)
+        return pos
+
+    # ── ordering ──
+    def sort_key(self, col, desc=False) -> np.ndarray:
+        """float64 key per row: ascending order of `col`, negated for `desc`; missing values last."""
+        if (col, desc) not in self._keys:
+            if col in self._codes:  # rank of each label, so categories sort alphabetically
+                rank = np.empty(len(self._labels[col]) + 1)
+                rank[np.argsort(self._labels[col], kind="stable")] = np.arange(len(self._labels[col]))
+                rank[-1] = np.nan  # code -1
+                k = rank[self._codes[col]]
+            elif col in self.sortable:
+                k = self.frame[col].to_numpy(np.float64, na_value=np.nan)
+            else:
+                raise ValueError(f"cannot sort by {col!r}; sortable: {self.sortable}")
+            k = -k if desc else k.copy()
+            k[np.isnan(k)] = np.inf
+            self._keys[(col, desc)] = k
+        return self._keys[(col, desc)]
+
+    def _ordered(self, q, pos):
+        """(keys, positions) of the matches; natural order when unsorted."""
+        return (pos.astype(np.float64), pos) if q.sort is None else (self.sort_key(q.sort, q.desc)[pos], pos)
+
+    # ── pages ──
+    def page(self, q: Query, cursor=None, size=50, columns=None) -> Page:
+        """`size` rows after `cursor` (None = first page); `Page.cursor` resumes after the last row shown."""
+        pos = self.matches(q)
+        total = len(pos)
+        key, pos = self._ordered(q, pos)
+        if cursor is not None:
+            k0, p0 = cursor
+            after = (key > k0) | ((key == k0) & (pos > p0))
+            key, pos = key[after], pos[after]
+        take, keys = _smallest(key, pos, size)
+        more = len(pos) > len(take)
+        rows = self.project(take, columns)
+        return Page(rows, (float(keys[-1]), int(take[-1])) if more else None, total)
+
+    def project(self, positions, columns=None) -> pd.DataFrame:
+        """Only `columns` of the given rows."""
+        frame = self.frame if columns is None else self.frame[list(columns)]
+        return frame.iloc[positions]
+
+    # ── export ──
+    def iter_rows(self, q: Query, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        """Yield the full result in query order, `chunk_rows` rows at a time."""
+        key, pos = self._ordered(q, self.matches(q))
+        if q.sort is not None:
+            pos = pos[np.lexsort((pos, key))]
+        for lo in range(0, len(pos), chunk_rows):
+            yield self.project(pos[lo:lo + chunk_rows], columns)
+
+    def export(self, q: Query, path, columns=None, chunk_rows=EXPORT_CHUNK_ROWS) -> int:
+        """Write the full result to `path` (.csv, .csv.gz or .parquet); returns the row count."""
+        rows = 0
+        chunks = self.iter_rows(q, columns, chunk_rows)
+        if str(path).lower().endswith((".parquet", ".pq")):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise ImportError("Parquet export requires pyarrow (pip install pyarrow)") from e
+            writer = None
+            try:
+                for chunk in chunks:
+                    table = pa.Table.from_pandas(chunk, schema=writer.schema if writer else None,
+                                                 preserve_index=False)
+                    writer = writer or pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+                    rows += len(chunk)
+                if writer is None:  # no matches: still a valid, empty file
+                    pq.write_table(pa.Table.from_pandas(self.project([], columns), preserve_index=False), path)
+            finally:
+                if writer is not None:
+                    writer.close()
+            return rows
+        gz = str(path).lower().endswith(".gz")
+        # gzip level 6: about 3x faster than pandas' default 9 for a few % larger files
+        with (gzip.open(path, "wt", compresslevel=6, newline="") if gz else open(path, "w", newline="")) as fh:
+            header = True
+            for chunk in chunks:
+                chunk.to_csv(fh, header=header, index=False)
+                header, rows = False, rows + len(chunk)
+            if header:
+                self.project([], columns).to_csv(fh, index=False)
+        return rows
+
+
+def _smallest(key, pos, k):
+    """The k (key, pos)-smallest entries, in order; `pos` is ascending so ties keep row order."""
+    if len(key) > k:
+        kth = np.partition(key, k - 1)[k - 1]
+        below = np.flatnonzero(key < kth)
+        ties = np.flatnonzero(key == kth)[:k - len(below)]
+        idx = np.concatenate([below, ties])
+        key, pos = key[idx], pos[idx]
+    order = np.lexsort((pos, key))
+    return pos[order], key[order]
+
+
+def main(argv=None):
+    import data_store
+    ap = argparse.ArgumentParser(description="Filter, sort and export the cleaned delivery history.")
+    ap.add_argument("--city", nargs="*", default=[])
+    ap.add_argument("--partner", default="", help="substring of Delivery_person_ID (case-insensitive)")
+    ap.add_argument("--vehicle", nargs="*", default=[])
+    ap.add_argument("--order", nargs="*", default=[])
+    ap.add_argument("--rating", nargs=2, type=float, metavar=("MIN", "MAX"))
+    ap.add_argument("--distance", nargs=2, type=float, metavar=("MIN", "MAX"))
+    ap.add_argument("--sort")
+    ap.add_argument("--desc", action="store_true")
+    ap.add_argument("--columns", nargs="*")
+    ap.add_argument("--out", help=".csv, .csv.gz or .parquet; omitted: print the first page")
+    ap.add_argument("--limit", type=int, default=20, help="rows to print without --out")
+    args = ap.parse_args(argv)
+
+    ex = Explorer(data_store.load_clean_frame())
+    q = Query(tuple(args.city), args.partner, tuple(args.vehicle), tuple(args.order),
+              tuple(args.rating) if args.rating else None, tuple(args.distance) if args.distance else None,
+              args.sort, args.desc)
+    t = time.perf_counter()
+    if args.out:
+        n = ex.export(q, args.out, args.columns)
+        print(f"{n:,} rows -> {args.out} ({os.path.getsize(args.out) / 1e6:.1f} MB) in "
+              f"{time.perf_counter() - t:.2f}s", file=sys.stderr)
+    else:
+        page = ex.page(q, size=args.limit, columns=args.columns)
+        print(page.rows.to_string())
+        print(f"{len(page.rows)} of {page.total:,} matches in {(time.perf_counter() - t) * 1000:.1f} ms",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Vectorized feature engineering shared by the Streamlit app and offline jobs.
+
+Everything here works on whole columns at once: haversine runs as NumPy
+array math, and string work (city lookup, category normalization) is done
+once per *distinct* value and broadcast back through factorized codes, so
+cost grows with the number of unique partner IDs / categories, not rows.
+"""
+import numpy as np
+import pandas as pd
+from math import radians, sin, cos, sqrt, atan2
+
+EARTH_RADIUS_KM = 6371
+MAX_DISTANCE_KM = 50
+
+CITY_MAP = {
+    "BANG":"Bangalore","INDORE":"Indore","COIM":"Coimbatore",
+    "CHEN":"Chennai","HYD":"Hyderabad","RANCH":"Ranchi",
+    "MYS":"Mysore","DELHI":"Delhi","KOLKATA":"Kolkata",
+    "PUNE":"Pune","MUMBAI":"Mumbai","AHMD":"Ahmedabad"
+}
+ORDER_MAP   = {"Buffet":0,"Drinks":1,"Meal":2,"Snack":3}
+VEHICLE_MAP = {"Bicycle":0,"Electric Scooter":1,"Motorcycle":2,"Scooter":3}
+
+COORD_COLS = ["Restaurant_latitude", "Restaurant_longitude",
+              "Delivery_location_latitude", "Delivery_location_longitude"]
+
+
+# ─────────────────────────────────────────────
+# SCALAR REFERENCE
+# ─────────────────────────────────────────────
+def haversine(lat1, lon1, lat2, lon2):
+    R = EARTH_RADIUS_KM
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    dlat, dlon = lat2-lat1, lon2-lon1
+    a = sin(dlat/2)**2 + cos(lat1)*cos(lat2)*sin(dlon/2)**2
+    return R * 2 * atan2(sqrt(a), sqrt(1-a))
+
+def extract_city(did):
+    did = str(did).upper()
+    for k, v in CITY_MAP.items():
+        if k in did: return v
+    return "Other"
+
+
+# ─────────────────────────────────────────────
+# VECTORIZED
+# ─────────────────────────────────────────────
+def haversine_np(lat1, lon1, lat2, lon2):
+    """Array haversine in km; same formula as `haversine`, elementwise."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=np.float64))
+                              for x in (lat1, lon1, lat2, lon2))
+    dlat, dlon = lat2-lat1, lon2-lon1
+    a = np.sin(dlat/2)**2 + np.cos(lat1)*np.cos(lat2)*np.sin(dlon/2)**2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+def _map_unique(s: pd.Series, fn) -> pd.Series:
+    """Apply a vectorized `fn` to the distinct values of `s` only."""
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    mapped = np.asarray(fn(pd.Series(uniques, dtype=object)), dtype=object)
+    return pd.Series(mapped[codes], index=s.index).infer_objects()
+
+def _cities_of(uniques: pd.Series) -> pd.Series:
+    # First CITY_MAP key (in dict order) that occurs anywhere in the ID wins,
+    # exactly like `extract_city`.
+    ids = uniques.astype(str).str.upper()
+    out = pd.Series("Other", index=ids.index, dtype=object)
+    todo = np.ones(len(ids), dtype=bool)
+    for k, v in CITY_MAP.items():
+        hit = todo & ids.str.contains(k, regex=False).to_numpy()
+        out[hit] = v
+        todo &= ~hit
+    return out
+
+def extract_cities(ids) -> pd.Series:
+    """Vectorized `extract_city` over a Series of Delivery_person_ID values."""
+    return _map_unique(pd.Series(ids), _cities_of)
+
+def normalize_category(s: pd.Series) -> pd.Series:
+    """`.str.strip().str.title()`, evaluated once per distinct category."""
+    return _map_unique(s, lambda u: u.str.strip().str.title())
+
+def add_distance(df: pd.DataFrame) -> pd.DataFrame:
+    df["distance_km"] = haversine_np(*(df[c].to_numpy() for c in COORD_COLS))
+    return df
+
+def clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Raw Delivery_Dataset rows -> the cleaned frame used by every tab."""
+    df.columns = df.columns.str.strip()
+    df = df.rename(columns={"Delivery Time_taken(min)": "Delivery_Time_min"})
+    df = add_distance(df)
+    df = df[df["distance_km"] <= MAX_DISTANCE_KM].copy()
+    df["City"]            = extract_cities(df["Delivery_person_ID"])
+    df["Type_of_vehicle"] = normalize_category(df["Type_of_vehicle"])
+    df["Type_of_order"]   = normalize_category(df["Type_of_order"])
+    return df
+
+def normalize_label(label) -> str:
+    """'electric_scooter ' -> 'Electric Scooter', the ORDER_MAP/VEHICLE_MAP key form."""
+    return str(label).strip().replace("_", " ").title()
+
+def encode_category(s: pd.Series, mapping: dict) -> pd.Series:
+    """Map raw category labels ('electric_scooter ', 'Meal') to model codes."""
+    def norm(u):
+        return u.astype(str).str.strip().str.replace("_", " ").str.title().map(mapping)
+    codes = _map_unique(s, norm)
+    if codes.isna().any():
+        bad = sorted(set(s[codes.isna()].astype(str)))
+        raise ValueError(f"unknown {s.name or 'category'} values: {bad[:10]}")
+    return codes.astype(np.int64)
+
+def encode_features(df: pd.DataFrame, features) -> pd.DataFrame:
+    """Raw or cleaned order rows -> model input in `features` order."""
+    if "distance_km" not in df:
+        df = add_distance(df.copy())
+    cols = {
+        "Delivery_person_Age":     df["Delivery_person_Age"],
+        "Delivery_person_Ratings": df["Delivery_person_Ratings"],
+        "distance_km":             df["distance_km"],
+        "Type_of_order_encoded":   encode_category(df["Type_of_order"], ORDER_MAP),
+        "Type_of_vehicle_encoded": encode_category(df["Type_of_vehicle"], VEHICLE_MAP),
+    }
+    return pd.DataFrame({f: cols[f] for f in features}, index=df.index)
@@ -0,0 +1,161 @@
+"""
+Grid-bucketed spatial index over pickup and drop-off coordinates.
+
+Every point is put in a fixed lat/lon grid cell (geohash-style; `CELL_DEG`
+= 0.01 deg, about 1.1 km), keyed by one int64 `row * N_COLS + col`. Points
+are sorted by key, so each cell is a contiguous slice (CSR layout: sorted
+cell keys + offsets). A grid row's cells between two columns are then one
+`searchsorted` range. That is how a bounding box becomes a handful of
+slices, and only the points in them are checked exactly. Radius queries
+use the circle's bounding box, then a haversine filter. `nearest` widens
+a ring of cells until the k-th hit is provably closest.
+
+A point is a distinct location (a restaurant for "pickup", an address for
+"drop"; 391 and 4,371 of them for 41.5k located rows), carrying the summed
+stats of every order there. Those are the cube's sufficient statistics
+(`cube.STAT_COLS`: counts, time / rating / distance sums, delayed and fast
+counts), so any query result is summarized with the same means and rates
+as the KPI cards. They are also pre-summed per (cell, City), so the heatmap
+is a lookup and a city filter is a mask over cells rather than rows.
+
+Rows with a (0, 0) coordinate (about 8% of the dataset) have no usable
+location and are left out of that index; `skipped` counts them.
+
+    geo = GeoIndex.build(df, "pickup")           # or "drop"
+    pos, km = geo.radius(12.97, 77.59, 2.0)      # restaurants within 2 km, nearest first
+    geo.summary(pos)["avg_time"]                 # over all their orders
+    geo.nearest(12.97, 77.59, k=5)               # nearest historical restaurants
+    geo.radius(12.97, 77.59, 2.0, ["Bangalore"]) # only locations in these cities
+    geo.heatmap(["Bangalore"])                   # one row per cell: lat, lon, n, avg_time, delayed_pct, ...
+"""
+import numpy as np
+import pandas as pd
+
+from cube import STAT_COLS, _cell_frame, _derive
+from features import EARTH_RADIUS_KM, haversine_np
+
+CELL_DEG = 0.01
+KM_PER_DEG = np.pi * EARTH_RADIUS_KM / 180
+COLUMNS = {"pickup": ("Restaurant_latitude", "Restaurant_longitude"),
+           "drop":   ("Delivery_location_latitude", "Delivery_location_longitude")}
+
+
+class GeoIndex:
+    def __init__(self, lat, lon, stats, city, cell_deg=CELL_DEG, skipped=0):
+        self.cell_deg, self.skipped = cell_deg, skipped
+        self.n_cols = int(np.ceil(360 / cell_deg)) + 1
+        keys = self._key(*self._cell(lat, lon))
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.lat, self.lon = np.asarray(lat, np.float64)[order], np.asarray(lon, np.float64)[order]
+        self.stats = np.asarray(stats, np.float64)[order]
+        self.city_codes, self.city_labels = pd.factorize(pd.Series(np.asarray(city)[order]), sort=True)
+        self.city_labels = list(self.city_labels)
+        # CSR: cell i holds points offsets[i]:offsets[i + 1]
+        self.cell_keys, self.offsets = np.unique(self.keys, return_index=True)
+        self.offsets = np.append(self.offsets, len(self.keys))
+        # per (cell, city) sums for the heatmap
+        cell_of = np.repeat(np.arange(len(self.cell_keys)), np.diff(self.offsets))
+        pair = cell_of * max(1, len(self.city_labels)) + self.city_codes
+        pairs, inv = np.unique(pair, return_inverse=True)
+        self._hm_cell, self._hm_city = np.divmod(pairs, max(1, len(self.city_labels)))
+        self._hm_stats = np.zeros((len(pairs), len(STAT_COLS)))
+        np.add.at(self._hm_stats, inv, self.stats)
+
+    def __len__(self):
+        return len(self.keys)
+
+    # ── build ──
+    @classmethod
+    def build(cls, df: pd.DataFrame, kind="pickup", cell_deg=CELL_DEG) -> "GeoIndex":
+        """One point per distinct pickup (restaurant) or drop-off location, with the stats of its orders."""
+        lat_col, lon_col = COLUMNS[kind]
+        frame = _cell_frame(df)[["City", *STAT_COLS]]
+        frame["lat"], frame["lon"] = df[lat_col].to_numpy(np.float64), df[lon_col].to_numpy(np.float64)
+        ok = ~((frame["lat"].abs() < 1) & (frame["lon"].abs() < 1))
+        sums = frame[ok].groupby(["lat", "lon", "City"], observed=True, sort=False)[STAT_COLS].sum()
+        lat, lon, city = (sums.index.get_level_values(c) for c in ("lat", "lon", "City"))
+        return cls(lat.to_numpy(np.float64), lon.to_numpy(np.float64), sums.to_numpy(np.float64),
+                   city.to_numpy(), cell_deg, int((~ok).sum()))
+
+    # ── cells ──
+    def _cell(self, lat, lon):
+        return (np.floor((np.asarray(lat) + 90) / self.cell_deg).astype(np.int64),
+                np.floor((np.asarray(lon) + 180) / self.cell_deg).astype(np.int64))
+
+    def _key(self, row, col):
+        return row * self.n_cols + col
+
+    def _slices(self, r0, r1, c0, c1):
+        """Point index ranges of every cell in rows r0..r1, columns c0..c1."""
+        rows = np.arange(r0, r1 + 1, dtype=np.int64)
+        lo = np.searchsorted(self.keys, self._key(rows, c0), "left")
+        hi = np.searchsorted(self.keys, self._key(rows, c1), "right")
+        return [(a, b) for a, b in zip(lo.tolist(), hi.tolist()) if b > a]
+
+    def _city_ids(self, cities):
+        cities = set(cities)
+        return [i for i, c in enumerate(self.city_labels) if c in cities]
+
+    def _candidates(self, lat0, lon0, lat1, lon1):
+        (r0, c0), (r1, c1) = self._cell(lat0, lon0), self._cell(lat1, lon1)
+        sl = self._slices(int(r0), int(r1), int(c0), int(c1))
+        if not sl:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(a, b) for a, b in sl])
+
+    # ── queries ──
+    def bbox(self, lat0, lon0, lat1, lon1) -> np.ndarray:
+        """Positions of points with lat0 <= lat <= lat1 and lon0 <= lon <= lon1."""
+        pos = self._candidates(lat0, lon0, lat1, lon1)
+        la, lo = self.lat[pos], self.lon[pos]
+        return pos[(la >= lat0) & (la <= lat1) & (lo >= lon0) & (lo <= lon1)]
+
+    def radius(self, lat, lon, km, cities=None):
+        """(positions, distances in km) of points within `km` of (lat, lon), nearest first; `cities` filters."""
+        dlat = km / KM_PER_DEG
+        dlon = km / (KM_PER_DEG * max(np.cos(np.radians(min(abs(lat) + dlat, 89.9))), 1e-6))
+        pos = self._candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+        if cities:
+            pos = pos[np.isin(self.city_codes[pos], self._city_ids(cities))]
+        d = haversine_np(lat, lon, self.lat[pos], self.lon[pos])
+        keep = d <= km
+        pos, d = pos[keep], d[keep]
+        order = np.argsort(d, kind="stable")
+        return pos[order], d[order]
+
+    def nearest(self, lat, lon, k=5, max_km=50.0, cities=None):
+        """(positions, distances) of the k nearest points within `max_km` (in `cities`, if given)."""
+        km = self.cell_deg * KM_PER_DEG  # one cell
+        while True:
+            pos, d = self.radius(lat, lon, km, cities)
+            if len(pos) >= k or km >= max_km:
+                return pos[:k], d[:k]
+            km = min(km * 2, max_km)
+
+    def summary(self, pos=None) -> dict:
+        """KPI means and rates over the given points (all points if None)."""
+        s = self.stats if pos is None else self.stats[pos]
+        out = {k: float(v) for k, v in _derive(s.sum(axis=0)).items()} if len(s) else {"n": 0.0}
+        out["n"] = int(out["n"])
+        return out
+
+    def points(self, pos) -> pd.DataFrame:
+        """Query hits as a frame: lat, lon, City and derived stats per location."""
+        d = _derive(self.stats[pos])
+        return pd.DataFrame({"lat": self.lat[pos], "lon": self.lon[pos],
+                             "City": [self.city_labels[c] for c in self.city_codes[pos]], **d})
+
+    def heatmap(self, cities=None, min_n=1) -> pd.DataFrame:
+        """Per-cell center, order count and derived stats, from the pre-summed (cell, City) table."""
+        m = np.ones(len(self._hm_cell), dtype=bool)
+        if cities:
+            m = np.isin(self._hm_city, self._city_ids(cities))
+        cells, stats = self._hm_cell[m], self._hm_stats[m]
+        uniq, inv = np.unique(cells, return_inverse=True)
+        sums = np.zeros((len(uniq), len(STAT_COLS)))
+        np.add.at(sums, inv, stats)
+        row, col = np.divmod(self.cell_keys[uniq], self.n_cols)
+        out = pd.DataFrame({"lat": (row + 0.5) * self.cell_deg - 90, "lon": (col + 0.5) * self.cell_deg - 180,
+                            **_derive(sums)})
+        return out[out["n"] >= min_n].reset_index(drop=True)
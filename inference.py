@@ -0,0 +1,51 @@
+"""
+Model loading and vectorized ETA prediction without any Streamlit dependency.
+
+joblib (and through the pickle, sklearn) and pandas are imported on first
+use, so importing this module costs only numpy. With a `models/` registry
+(see model_registry.py) `load_model` maps the model's arrays instead of
+unpickling it and does not import sklearn at all.
+"""
+import os
+import pickle
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_model(base=BASE_DIR, version=None):
+    """(model, FEATURES): the registry's current (or `version`, or MODEL_VERSION) model, mmap-loaded.
+
+    Without a models/ registry, the joblib artifacts, falling back to the .pkl copies.
+    """
+    import model_registry
+    reg = model_registry.registry(os.path.join(base, "models"))
+    if reg.versions(model_registry.DEFAULT_NAME):
+        m = reg.load(model_registry.DEFAULT_NAME, version or os.getenv("MODEL_VERSION") or None)
+        return m, list(m.features)
+    import joblib
+    try:
+        m = joblib.load(os.path.join(base, "delivery_time_model.joblib"))
+        f = joblib.load(os.path.join(base, "model_features.joblib"))
+    except FileNotFoundError:
+        with open(os.path.join(base, "delivery_time_model.pkl"), "rb") as fh: m = pickle.load(fh)
+        with open(os.path.join(base, "model_features.pkl"),       "rb") as fh: f = pickle.load(fh)
+    return m, f
+
+
+def predict_frame(model, features, df) -> np.ndarray:
+    """Predicted minutes for every row of a raw/cleaned order frame."""
+    from features import encode_features
+    if len(df) == 0:
+        return np.empty(0, dtype=np.float64)
+    return model.predict(encode_features(df, features))
+
+
+def predict_one(model, features, age, rating, distance_km, order_type, vehicle_type) -> float:
+    """Predicted minutes for one order; `order_type` / `vehicle_type` are display labels ("Meal", "Electric Scooter")."""
+    import pandas as pd
+    from features import ORDER_MAP, VEHICLE_MAP
+    X = pd.DataFrame([[age, rating, distance_km, ORDER_MAP[order_type], VEHICLE_MAP[vehicle_type]]],
+                     columns=features)
+    return float(model.predict(X)[0])
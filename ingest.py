@@ -0,0 +1,246 @@
+"""
+Incremental, append-only ingestion of new delivery records.
+
+New rows arrive as raw dataset-shaped records (same columns as
+Delivery_Dataset.csv), either as files dropped into `inbox/` or as
+DataFrames put on an in-process queue with `LiveData.submit`. Only those
+rows go through `features.clean_frame` (haversine distance, 50 km filter,
+City, label normalization) and are appended to the column store with
+`data_store.append_frame`; nothing already ingested is re-read or re-cleaned.
+
+`LiveData` is what the app holds: the mapped frame plus a `StatsCube`
+(and, on first use, a `GeoIndex` per location kind and an `Explorer`). On
+`poll()` it ingests whatever is waiting, then picks up any rows appended
+since its last look (by itself or by another process such as
+`python ingest.py --watch`) and merges a cube built from just those rows
+into the running aggregates.
+
+File drops: write the file under a dot-name (or elsewhere) and rename it
+into `inbox/` when complete. Ingested files move to `inbox/done/`, files
+that fail to parse, clean or append to `inbox/failed/` (`LiveData.rejected`
+keeps the recent errors). Rows missing a time, rating, age or distance are
+dropped; columns may come in any order. Appended rows live in the store; if
+Delivery_Dataset.csv itself changes the store is rebuilt from it, and the
+files in `inbox/done/` can be dropped in again to replay them.
+
+    python ingest.py new_orders.csv        # append files now
+    python ingest.py --watch               # drain inbox/ every 2 s
+"""
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+import data_store
+from cube import StatsCube
+from explorer import Explorer
+from features import clean_frame
+from geo_index import GeoIndex
+
+DEFAULT_INBOX = os.path.join(data_store.BASE_DIR, "inbox")
+SUFFIXES = (".csv", ".parquet")
+# numeric fields every stored row needs: the cube sums them and casts the time to int
+REQUIRED = ("Delivery_Time_min", "Delivery_person_Ratings", "Delivery_person_Age", "distance_km")
+# what a malformed batch raises while being read, cleaned or appended
+BATCH_ERRORS = (ValueError, KeyError, TypeError, OSError)
+
+
+def read_batch(path) -> pd.DataFrame:
+    return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+
+
+def ingest_frame(raw: pd.DataFrame, store_dir=data_store.DEFAULT_DIR) -> pd.DataFrame:
+    """Clean `raw` and append it to the store; returns the cleaned rows.
+
+    Raw rows are numbered after everything the store has seen, so the
+    cleaned frame's index keeps meaning "source row number". Rows missing
+    a `REQUIRED` value are dropped like out-of-range ones; columns are put
+    in the store's order, and a batch lacking one raises ValueError.
+    """
+    manifest = data_store.read_manifest(store_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"no column store at {store_dir}; run `python data_store.py build`")
+    names = [c["name"] for c in manifest["columns"][1:]]
+    clean = clean_frame(raw.set_axis(pd.RangeIndex(len(raw))))
+    missing = [c for c in names if c not in clean.columns]
+    if missing:
+        raise ValueError(f"batch lacks columns {missing}")
+    for c in REQUIRED:
+        clean[c] = pd.to_numeric(clean[c], errors="coerce")
+    clean = clean.dropna(subset=list(REQUIRED))[names]
+    # the store numbers the rows under its lock, so concurrent ingesters get disjoint ranges
+    manifest = data_store.append_frame(clean, store_dir, raw_rows=len(raw))
+    return clean.set_axis(clean.index + (manifest["next_index"] - len(raw)))
+
+
+def claim_files(inbox=DEFAULT_INBOX):
+    """Move ready files from `inbox` to `inbox/done/` and return their new paths.
+
+    The rename is the claim: if two pollers race for a file only one wins.
+    """
+    done = os.path.join(inbox, "done")
+    try:
+        names = sorted(e.name for e in os.scandir(inbox)
+                       if e.is_file() and e.name.endswith(SUFFIXES) and not e.name.startswith("."))
+    except FileNotFoundError:
+        return []
+    claimed = []
+    for name in names:
+        os.makedirs(done, exist_ok=True)
+        dst = os.path.join(done, name)
+        try:
+            os.rename(os.path.join(inbox, name), dst)
+        except FileNotFoundError:
+            continue
+        claimed.append(dst)
+    return claimed
+
+
+def drain_inbox(inbox=DEFAULT_INBOX, store_dir=data_store.DEFAULT_DIR, log=None, on_error=None):
+    """Ingest every ready file in `inbox`; returns the number of rows kept.
+
+    A file that cannot be read, cleaned or appended moves to `inbox/failed/`
+    and its error goes to `on_error` (and `log`).
+    """
+    kept = 0
+    for path in claim_files(inbox):
+        try:
+            raw = read_batch(path)
+            clean = ingest_frame(raw, store_dir)
+        except BATCH_ERRORS as e:
+            failed = os.path.join(inbox, "failed")
+            os.makedirs(failed, exist_ok=True)
+            os.replace(path, os.path.join(failed, os.path.basename(path)))
+            for report in (log, on_error):
+                if report:
+                    report(f"{os.path.basename(path)}: {type(e).__name__}: {e}")
+            continue
+        kept += len(clean)
+        if log:
+            log(f"{os.path.basename(path)}: {len(clean):,}/{len(raw):,} rows kept")
+    return kept
+
+
+class LiveData:
+    """Store-backed frame + StatsCube, kept current by `poll()`.
+
+    Readers take `snapshot()`; it is swapped as a whole, so a session never
+    sees a frame and cube from different versions.
+    """
+
+    def __init__(self, csv_path=data_store.DEFAULT_CSV, store_dir=data_store.DEFAULT_DIR,
+                 inbox=DEFAULT_INBOX):
+        self.csv_path, self.store_dir, self.inbox = csv_path, store_dir, inbox
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self.rejected = deque(maxlen=50)  # "<source>: <error>" of batches that could not be ingested
+        frame = data_store.load_clean_frame(csv_path, store_dir)
+        self._manifest = data_store.read_manifest(store_dir)
+        if self._manifest is not None and self._manifest["rows"] != len(frame):  # appended meanwhile
+            frame = data_store.read_frame(store_dir, self._manifest)
+        self._snap = (frame, StatsCube.build(frame))
+        self._cache = (None, {})
+
+    def snapshot(self):
+        """(frame, cube) as of the last poll."""
+        return self._snap
+
+    def version(self, frame=None) -> str:
+        """Identifies a snapshot's data (source CSV digest, cleaning version, row count).
+
+        Pass the frame taken from `snapshot()` so the key matches that frame
+        even if another session has polled since.
+        """
+        m = self._manifest or {}
+        rows = len(self._snap[0] if frame is None else frame)
+        return f"{(m.get('source_sha256') or 'csv')[:12]}-{m.get('clean_version', 0)}-{rows}"
+
+    def _derived(self, name, build):
+        """`build(frame)` for the current snapshot, built on first use and dropped when it changes."""
+        frame = self._snap[0]
+        built_for, cache = self._cache
+        if built_for is not frame:
+            cache = {}
+            self._cache = (frame, cache)
+        if name not in cache:
+            cache[name] = build(frame)
+        return cache[name]
+
+    def geo(self, kind="pickup") -> GeoIndex:
+        """Spatial index ("pickup" or "drop") of the current snapshot."""
+        return self._derived(("geo", kind), lambda frame: GeoIndex.build(frame, kind))
+
+    def explorer(self) -> Explorer:
+        """Dataset Explorer query engine over the current snapshot."""
+        return self._derived("explorer", Explorer)
+
+    def submit(self, raw: pd.DataFrame):
+        """Queue raw records for the next `poll()`."""
+        self._queue.put(raw)
+
+    def _ingest_pending(self):
+        while True:
+            try:
+                raw = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                ingest_frame(raw, self.store_dir)
+            except BATCH_ERRORS as e:  # a bad submitted frame is dropped, not retried
+                self.rejected.append(f"submitted frame: {type(e).__name__}: {e}")
+        drain_inbox(self.inbox, self.store_dir, on_error=self.rejected.append)
+
+    def poll(self) -> int:
+        """Ingest waiting batches and refresh; returns the number of new rows."""
+        if self._manifest is None:  # no writable store: static CSV frame only
+            return 0
+        with self._lock:
+            self._ingest_pending()
+            manifest = data_store.read_manifest(self.store_dir)
+            old = self._manifest
+            if manifest is None or manifest["rows"] == old["rows"]:
+                return 0
+            frame = data_store.read_frame(self.store_dir, manifest)
+            if (manifest.get("source_sha256") != old.get("source_sha256")
+                    or manifest["rows"] < old["rows"]):  # store was rebuilt underneath us
+                cube, added = StatsCube.build(frame), len(frame)
+            else:
+                added = manifest["rows"] - old["rows"]
+                cube = self._snap[1].merge(StatsCube.build(frame.iloc[-added:]))
+            self._manifest, self._snap = manifest, (frame, cube)
+            return added
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Append new delivery records to the column store.")
+    ap.add_argument("files", nargs="*", help="CSV/Parquet files with Delivery_Dataset.csv columns")
+    ap.add_argument("--store", default=data_store.DEFAULT_DIR)
+    ap.add_argument("--inbox", default=DEFAULT_INBOX)
+    ap.add_argument("--watch", action="store_true", help="keep draining --inbox")
+    ap.add_argument("--interval", type=float, default=2.0, help="seconds between inbox scans")
+    args = ap.parse_args(argv)
+
+    if data_store.read_manifest(args.store) is None:
+        data_store.build_store(data_store.DEFAULT_CSV, args.store)
+    for path in args.files:
+        t = time.perf_counter()
+        raw = read_batch(path)
+        clean = ingest_frame(raw, args.store)
+        print(f"{path}: {len(clean):,}/{len(raw):,} rows kept in {(time.perf_counter() - t) * 1000:.1f} ms")
+    if not args.watch:
+        return
+    print(f"watching {args.inbox} every {args.interval:g}s (Ctrl+C to stop)")
+    try:
+        while True:
+            drain_inbox(args.inbox, args.store, log=print)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
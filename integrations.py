@@ -0,0 +1,263 @@
+"""
+Non-blocking clients for the Groq (LLM) and Resend (email) HTTP APIs.
+
+One `Integrations` object owns a private asyncio loop on a daemon thread
+with a single pooled `httpx.AsyncClient` (bounded connections, per-call
+timeouts), a global semaphore capping in-flight requests across both
+services, and a bounded thread pool for background jobs. Transient
+failures (connection errors, timeouts, 408/425/429/5xx) are retried with
+full-jitter exponential backoff, honouring `Retry-After`; other 4xx are
+raised immediately as `ApiError`.
+
+    clients = Integrations()
+    text = clients.call(clients.groq_chat(key, model, messages))      # blocking, with deadline
+    for tok in clients.iterate(clients.groq_stream(key, model, messages)):  # token deltas
+        ...
+    fut  = clients.submit(get_ai_decision, signals)                   # background job -> Future
+
+The Streamlit app submits jobs, keeps the Futures in `st.session_state`
+and moves results there when they finish, so a slow Groq or Resend
+response never holds the script thread. Base URLs come from
+GROQ_BASE_URL / RESEND_BASE_URL so both services can be pointed at local
+stand-ins (see benchmarks/fake_apis.py).
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import observe
+
+httpx = None  # imported by the first Integrations(); importing this module stays cheap
+
+
+def _load_httpx():
+    global httpx
+    if httpx is None:
+        import httpx as _httpx
+        httpx = _httpx
+    return httpx
+
+GROQ_BASE_URL   = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+RESEND_BASE_URL = os.getenv("RESEND_BASE_URL", "https://api.resend.com")
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class ApiError(RuntimeError):
+    def __init__(self, status, body):
+        super().__init__(f"HTTP {status}: {body[:300]}")
+        self.status, self.body = status, body
+
+
+class RateLimiter:
+    """Async token bucket: `acquire()` waits so calls average at most `rate` per second."""
+
+    def __init__(self, rate, burst=1):
+        self.rate, self.burst = rate, burst
+        self.tokens, self.t = float(burst), time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.t) * self.rate)
+            self.t = now
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.t = time.monotonic()
+                self.tokens = 1.0
+            self.tokens -= 1
+
+
+class Integrations:
+    def __init__(self, groq_url=GROQ_BASE_URL, resend_url=RESEND_BASE_URL,
+                 max_connections=16, concurrency=8, timeout=30.0, connect_timeout=5.0,
+                 retries=3, backoff=0.5, backoff_cap=8.0, deadline=90.0, job_workers=8):
+        _load_httpx()
+        self.groq_url, self.resend_url = groq_url.rstrip("/"), resend_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.retries, self.backoff, self.backoff_cap, self.deadline = retries, backoff, backoff_cap, deadline
+        self.stats = dict(requests=0, retries=0, failures=0, timeouts=0, in_flight=0, peak_in_flight=0)
+        self._jobs = ThreadPoolExecutor(max_workers=job_workers, thread_name_prefix="integrations")
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="integrations-loop", daemon=True).start()
+
+        async def setup():  # loop-bound objects are created on the loop
+            limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            return httpx.AsyncClient(limits=limits, timeout=self.timeout), asyncio.Semaphore(concurrency)
+        self._http, self._sem = asyncio.run_coroutine_threadsafe(setup(), self._loop).result()
+
+    # ── execution ──
+    def call(self, coro, timeout=None):
+        """Run `coro` on the client loop and wait for it (at most `timeout` / `deadline` s)."""
+        fut = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return fut.result(timeout if timeout is not None else self.deadline)
+        except TimeoutError:
+            fut.cancel()
+            self.stats["timeouts"] += 1
+            raise
+
+    def iterate(self, agen, idle_timeout=None):
+        """Drive an async generator on the client loop from a blocking caller.
+
+        `idle_timeout` (default: the per-call read timeout) bounds the wait for each item.
+        """
+        idle = idle_timeout if idle_timeout is not None else self.timeout.read
+
+        async def step():
+            return await agen.__anext__()
+
+        async def close():
+            await agen.aclose()
+        try:
+            while True:
+                try:
+                    yield self.call(step(), idle)
+                except StopAsyncIteration:
+                    return
+        finally:  # abandoned early: release the connection and the semaphore slot
+            asyncio.run_coroutine_threadsafe(close(), self._loop).result(5)
+
+    def submit(self, fn, *args, **kwargs):
+        """Run a blocking function (which may use `call`) on the bounded job pool."""
+        return self._jobs.submit(fn, *args, **kwargs)
+
+    def close(self):
+        self._jobs.shutdown(wait=False, cancel_futures=True)
+        asyncio.run_coroutine_threadsafe(self._http.aclose(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # ── HTTP ──
+    def _delay(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                pass  # HTTP-date form: fall back to backoff
+        return random.uniform(0, min(self.backoff_cap, self.backoff * 2 ** attempt))
+
+    def _enter(self):
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+
+    def _observe(self, url, t0, outcome):
+        """One attempt's latency, per service ("groq" / "resend") and outcome."""
+        service = ("groq" if url.startswith(self.groq_url) else
+                   "resend" if url.startswith(self.resend_url) else "other")
+        observe("http_request_seconds", time.perf_counter() - t0, service=service, outcome=outcome)
+
+    def _error(self, status, body):
+        """ApiError to retry, or raise it straight away if the status is not transient."""
+        err = ApiError(status, body)
+        if status not in TRANSIENT_STATUS:
+            self.stats["failures"] += 1
+            raise err
+        return err
+
+    async def _backoff(self, attempt, err, retry_after=None):
+        if attempt == self.retries:
+            self.stats["failures"] += 1
+            raise err
+        self.stats["retries"] += 1
+        await asyncio.sleep(self._delay(attempt, retry_after))
+
+    async def post_json(self, url, payload, headers=None, timeout=None):
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            async with self._sem:
+                self._enter()
+                t0, outcome = time.perf_counter(), "error"
+                try:
+                    r = await self._http.post(url, json=payload, headers=headers,
+                                              timeout=timeout or self.timeout)
+                except httpx.TransportError as e:  # includes connect/read timeouts
+                    err = e
+                else:
+                    if r.status_code < 400:
+                        outcome = "ok"
+                        return r.json()
+                    err = self._error(r.status_code, r.text)
+                    retry_after = r.headers.get("retry-after")
+                finally:
+                    self.stats["in_flight"] -= 1
+                    self._observe(url, t0, outcome)
+            await self._backoff(attempt, err, retry_after)
+
+    async def stream_sse(self, url, payload, headers=None, timeout=None):
+        """Async iterator over the JSON `data:` events of a server-sent-events response.
+
+        Retried like `post_json` only until the first event arrives; a stream
+        that breaks after that raises, since the caller has already seen output.
+        """
+        for attempt in range(self.retries + 1):
+            retry_after, started = None, False
+            async with self._sem:
+                self._enter()
+                t0, outcome = time.perf_counter(), "error"
+                try:
+                    async with self._http.stream("POST", url, json=payload, headers=headers,
+                                                 timeout=timeout or self.timeout) as r:
+                        if r.status_code >= 400:
+                            err = self._error(r.status_code, (await r.aread()).decode(errors="replace"))
+                            retry_after = r.headers.get("retry-after")
+                        else:
+                            async for line in r.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[5:].strip()
+                                if data == "[DONE]":
+                                    outcome = "ok"
+                                    return
+                                started = True
+                                yield json.loads(data)
+                            outcome = "ok"
+                            return
+                except httpx.TransportError as e:
+                    if started:
+                        self.stats["failures"] += 1
+                        raise
+                    err = e
+                finally:
+                    self.stats["in_flight"] -= 1
+                    self._observe(url, t0, outcome)
+            await self._backoff(attempt, err, retry_after)
+
+    async def groq_chat(self, api_key, model, messages, temperature=0.3, timeout=None):
+        """Text of the first choice of a Groq (OpenAI-compatible) chat completion."""
+        data = await self.post_json(f"{self.groq_url}/chat/completions",
+                                    {"model": model, "messages": messages, "temperature": temperature},
+                                    {"Authorization": f"Bearer {api_key}"}, timeout)
+        return data["choices"][0]["message"]["content"]
+
+    async def groq_stream(self, api_key, model, messages, temperature=0.3, timeout=None):
+        """Async iterator of content deltas from a streamed Groq chat completion."""
+        async for event in self.stream_sse(f"{self.groq_url}/chat/completions",
+                                           {"model": model, "messages": messages,
+                                            "temperature": temperature, "stream": True},
+                                           {"Authorization": f"Bearer {api_key}"}, timeout):
+            choices = event.get("choices") or [{}]
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
+
+    async def resend_send(self, api_key, message, timeout=None, idempotency_key=None):
+        """Send one email (`from`, `to`, `subject`, `html`); returns Resend's response (with `id`).
+
+        Retries reuse one Idempotency-Key, so a timed-out attempt that did go
+        through is not delivered twice.
+        """
+        headers = {"Authorization": f"Bearer {api_key}",
+                   "Idempotency-Key": idempotency_key or uuid.uuid4().hex}
+        return await self.post_json(f"{self.resend_url}/emails", message, headers, timeout)
+
+    async def resend_batch(self, api_key, messages, timeout=None, idempotency_key=None):
+        """Send up to 100 emails in one request; returns {"data": [{"id": ...}, ...]} in order."""
+        headers = {"Authorization": f"Bearer {api_key}",
+                   "Idempotency-Key": idempotency_key or uuid.uuid4().hex}
+        return await self.post_json(f"{self.resend_url}/emails/batch", messages, headers, timeout)
@@ -0,0 +1,200 @@
+"""
+Response cache for LLM completions.
+
+The AI decision and Copilot prompts are a pure function of the `signals`
+snapshot, the prompt template, the model and (for the Copilot) the
+question. So the cache key is built from those inputs, normalized, rather
+than from the rendered prompt text:
+
+* signals: canonical JSON (sorted keys, no whitespace, floats rounded)
+* question: case-folded, whitespace collapsed, trailing punctuation dropped,
+  so "Which city is slowest?" and "which city is  slowest" share an entry
+* template version: bump it whenever a prompt's wording changes
+
+Entries expire after `ttl` seconds and the least recently used ones are
+evicted beyond `max_entries`. Backends are pluggable: `MemoryBackend` (per
+process) and `SQLiteBackend` (on disk, survives restarts and is shared by
+every Streamlit session and worker process).
+
+    cache = LLMCache(SQLiteBackend(".cache/llm_cache.sqlite"), ttl=6 * 3600)
+    key = make_key("llama-3.3-70b-versatile", "copilot", 1, signals, question)
+    text = cache.get_or_call(key, lambda: call_the_model(prompt))
+    cache.stats()   # hits, misses, expired, evictions, hit_rate, saved_s
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+FLOAT_DIGITS = 4
+
+
+def _round_floats(obj):
+    if isinstance(obj, float):
+        return round(obj, FLOAT_DIGITS)
+    if isinstance(obj, dict):
+        return {str(k): _round_floats(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_round_floats(v) for v in obj]
+    return obj
+
+
+def normalize_question(q) -> str:
+    return re.sub(r"\s+", " ", str(q or "")).strip().casefold().rstrip("?.! ")
+
+
+def make_key(model, template, version, signals, question="", **params) -> str:
+    """Stable hex key for one (model, template version, signals, question, params) request."""
+    payload = {"model": model, "template": template, "version": version,
+               "signals": _round_floats(signals), "question": normalize_question(question),
+               "params": _round_floats(params)}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":"),
+                                     default=str).encode()).hexdigest()
+
+
+# ── backends ──
+# get(key) -> (value, created_at) | None;  put(key, value, created_at) -> n evicted;
+# delete(key);  clear();  __len__
+class MemoryBackend:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._d = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._d.get(key)
+            if hit is not None:
+                self._d.move_to_end(key)
+            return hit
+
+    def put(self, key, value, created):
+        with self._lock:
+            self._d[key] = (value, created)
+            self._d.move_to_end(key)
+            evicted = 0
+            while len(self._d) > self.max_entries:
+                self._d.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._d.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._d.clear()
+
+    def __len__(self):
+        return len(self._d)
+
+
+class SQLiteBackend:
+    """One table, LRU by `used` timestamp. Safe across threads and processes."""
+
+    def __init__(self, path, max_entries=1024):
+        self.path, self.max_entries = path, max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, "
+                             "value TEXT NOT NULL, created REAL NOT NULL, used REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_used ON llm_cache(used)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE llm_cache SET used = ? WHERE key = ?", (time.time(), key))
+            return row
+
+    def put(self, key, value, created):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+                             (key, value, created, time.time()))
+            return self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache "
+                "ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_entries,)).rowcount
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM llm_cache")
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+# ── cache ──
+class LLMCache:
+    def __init__(self, backend=None, ttl=6 * 3600):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._n = dict(hits=0, misses=0, expired=0, evictions=0, call_s=0.0)
+
+    def _count(self, **inc):
+        with self._lock:
+            for k, v in inc.items():
+                self._n[k] += v
+
+    def get(self, key):
+        hit = self.backend.get(key)
+        if hit is not None and time.time() - hit[1] > self.ttl:
+            self.backend.delete(key)
+            self._count(expired=1)
+            hit = None
+        return None if hit is None else hit[0]
+
+    def get_or_call(self, key, fn, validate=None):
+        """Cached text for `key`, else `fn()` (stored only if `validate(text)` passes).
+
+        Exceptions from `fn` propagate and are never cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            self._count(hits=1)
+            return value
+        t = time.perf_counter()
+        value = fn()
+        took = time.perf_counter() - t
+        self._count(misses=1, call_s=took)
+        if value is not None and (validate is None or validate(value)):
+            self._count(evictions=self.backend.put(key, value, time.time()))
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._n)
+        lookups = s["hits"] + s["misses"]
+        s["hit_rate"] = s["hits"] / lookups if lookups else 0.0
+        s["saved_s"] = s["hits"] * s["call_s"] / s["misses"] if s["misses"] else 0.0  # est., at mean call time
+        s["entries"] = len(self.backend)
+        return s
+
+
+def from_env(default_path):
+    """Cache configured by LLM_CACHE (sqlite | memory | off), LLM_CACHE_TTL, LLM_CACHE_MAX."""
+    kind = os.getenv("LLM_CACHE", "sqlite").lower()
+    ttl = float(os.getenv("LLM_CACHE_TTL", 6 * 3600))
+    size = int(os.getenv("LLM_CACHE_MAX", 1024))
+    if kind in ("off", "none", "0"):
+        return None
+    if kind == "sqlite":
+        try:
+            return LLMCache(SQLiteBackend(os.getenv("LLM_CACHE_PATH", default_path), size), ttl)
+        except (sqlite3.Error, OSError):
+            pass  # read-only checkout: fall back to a per-process cache
+    return LLMCache(MemoryBackend(size), ttl)
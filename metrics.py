@@ -0,0 +1,231 @@
+"""
+Per-stage timings, counters and latency histograms, exported as Prometheus text.
+
+Hot paths are wrapped in `timer(stage)`, usable as a context manager or a
+decorator. Each (metric, labels) series is a fixed-bucket histogram: one
+`perf_counter` pair, a `bisect` into 15 buckets and a locked add. That is
+about 1-2 µs per timed block (`benchmarks/bench_metrics.py`), or some 25 µs
+for a whole rerun's stages, so it stays on in production. Caches that already count their own hits and misses
+(`PredictionMemo`, `FigureCache`, `LLMCache`, `Integrations`) are not
+re-instrumented. They are registered as collectors and read only when
+/metrics is scraped or the debug panel is drawn.
+
+    from metrics import timer, inc
+    with timer("city_filter"):
+        ...
+    @timer("load_model")
+    def load_model(): ...
+    inc("report_emails", outcome="sent")
+    metrics.collector("predict_memo", memo.stats)      # counts as counters, levels as gauges
+    metrics.serve(9464)                                # GET http://127.0.0.1:9464/metrics
+
+Only the standard library is imported (http.server only by `serve`), so headless
+tools can use it for free.
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+PREFIX = "deliveryai_"
+# seconds; upper bounds of each bucket (Prometheus `le`), +Inf implied
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# collector keys that only grow, exported as `<name>_<key>_total` counters; other numbers are gauges
+CUMULATIVE = frozenset({"hits", "grid_hits", "misses", "expired", "evictions", "hit_calls", "hit_s",
+                        "miss_calls", "miss_s", "call_s", "build_s", "requests", "retries", "failures",
+                        "timeouts"})
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "last", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = self.last = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += seconds
+            self.last = seconds
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def quantile(self, q):
+        """Estimate, interpolated inside the bucket holding rank q * count (Prometheus-style)."""
+        counts = list(self.counts)
+        n = sum(counts)
+        if n == 0:
+            return float("nan")
+        rank, seen = q * n, 0
+        for i, c in enumerate(counts):
+            if seen + c >= rank and c:
+                lo = BUCKETS[i - 1] if i else 0.0
+                hi = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lo + (hi - lo) * (rank - seen) / c
+            seen += c
+        return BUCKETS[-1]
+
+
+class Timer:
+    """Observes the wall time of a `with` block (kept as `.elapsed`) or of each call of a decorated function."""
+    __slots__ = ("hist", "t0", "elapsed")
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.t0
+        self.hist.observe(self.elapsed)
+
+    def __call__(self, fn):
+        hist = self.hist
+
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - t0)
+        return timed
+
+
+class Registry:
+    def __init__(self):
+        self._hists, self._counters, self._collectors = {}, {}, {}
+        self._lock = threading.Lock()
+
+    # ── recording ──
+    def histogram(self, name, **labels) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        h = self._hists.get(key)
+        if h is None:
+            with self._lock:
+                h = self._hists.setdefault(key, Histogram())
+        return h
+
+    def timer(self, stage, name="stage_seconds", **labels) -> Timer:
+        return Timer(self.histogram(name, stage=stage, **labels))
+
+    def observe(self, name, seconds, **labels):
+        self.histogram(name, **labels).observe(seconds)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def collector(self, name, fn):
+        """Register (or replace) `fn() -> dict`; its numeric values become `<name>_<key>` series."""
+        with self._lock:
+            self._collectors[name] = fn
+
+    def collect(self) -> dict:
+        """{collector: its dict}, skipping collectors that fail."""
+        with self._lock:
+            collectors = dict(self._collectors)
+        out = {}
+        for name, fn in collectors.items():
+            try:
+                out[name] = dict(fn())
+            except Exception:  # a broken source must not take the scrape down
+                continue
+        return out
+
+    # ── export ──
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            hists, counters = sorted(self._hists.items()), sorted(self._counters.items())
+        lines, typed = [], set()
+        for (name, labels), h in hists:
+            full = PREFIX + name
+            if full not in typed:
+                lines.append(f"# TYPE {full} histogram")
+                typed.add(full)
+            with h._lock:
+                counts, total = list(h.counts), h.sum
+            cum = 0
+            for le, c in zip([*map(repr, BUCKETS), "+Inf"], counts):
+                cum += c
+                lines.append(f"{full}_bucket{_labels(labels + (('le', le),))} {cum}")
+            lines.append(f"{full}_sum{_labels(labels)} {total!r}")
+            lines.append(f"{full}_count{_labels(labels)} {cum}")
+        for (name, labels), v in counters:
+            full = PREFIX + name + "_total"
+            if full not in typed:
+                lines.append(f"# TYPE {full} counter")
+                typed.add(full)
+            lines.append(f"{full}{_labels(labels)} {v}")
+        for source, values in sorted(self.collect().items()):
+            for key, v in sorted(values.items()):
+                if isinstance(v, bool) or not isinstance(v, (int, float)):
+                    continue
+                kind = "counter" if key in CUMULATIVE else "gauge"
+                full = f"{PREFIX}{source}_{key}" + ("_total" if kind == "counter" else "")
+                lines.append(f"# TYPE {full} {kind}")
+                lines.append(f"{full} {float(v)!r}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> list:
+        """One dict per histogram series (calls, last / mean / p50 / p95 ms), for the debug panel."""
+        with self._lock:
+            hists = sorted(self._hists.items())
+        rows = []
+        for (name, labels), h in hists:
+            n = h.count
+            rows.append({"metric": name, **dict(labels), "calls": n, "last_ms": h.last * 1000,
+                         "mean_ms": h.sum / n * 1000 if n else 0.0,
+                         "p50_ms": h.quantile(0.5) * 1000, "p95_ms": h.quantile(0.95) * 1000})
+        return rows
+
+    def clear(self):
+        with self._lock:
+            self._hists.clear()
+            self._counters.clear()
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+REGISTRY = Registry()
+timer, observe, inc, collector = REGISTRY.timer, REGISTRY.observe, REGISTRY.inc, REGISTRY.collector
+render, snapshot = REGISTRY.render, REGISTRY.snapshot
+
+
+def serve(port, host="127.0.0.1", registry=REGISTRY):
+    """Serve `GET /metrics` on a daemon thread; returns the server, raises OSError if the port is taken."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # scrapes every few seconds; keep stderr quiet
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,320 @@
+"""
+Versioned on-disk model registry with memory-mapped, pickle-free loading.
+
+Layout (one directory per version, written to a temp dir and renamed into
+place, so a half-written version is never visible):
+
+    models/eta/CURRENT                  "2"  (the version `load()` returns by default)
+    models/eta/2/manifest.json          format, backend, sklearn version, feature schema, sha256 per file
+    models/eta/2/{feature,threshold,left,right,value,roots,importances}.npy
+    models/eta/2/estimator.joblib       the fitted sklearn estimator (optional, loaded on demand)
+
+The payload is `tree_kernel.FlatEnsemble`'s arrays stored as plain .npy
+files. `load()` checks every file's checksum and maps the arrays read-only with
+`np.load(mmap_mode="r")`. Nothing is unpickled and sklearn is not
+imported, so loading takes milliseconds. Every process serving the same
+version shares one copy of the pages through the OS page cache.
+
+`RegistryModel` is a drop-in for the sklearn estimator where the app uses
+one: `predict(X)` (DataFrame or array, columns in `features` order) and
+`feature_importances_`. Batches up to `flat_max_rows` go through the flat
+kernel, which agrees with sklearn to float rounding. Larger batches go to
+the stored estimator, where sklearn's compiled per-tree loop is faster.
+That path is taken only after its checksum matches and only if the
+installed sklearn is the version that wrote it; otherwise the flat kernel
+serves every batch.
+
+Several versions can be loaded side by side; `Registry.load` caches each
+(name, version) once per process.
+
+    reg = Registry()                      # ./models
+    v = reg.register(model, FEATURES)     # new version, promoted to CURRENT
+    m1, m2 = reg.load("eta", 1), reg.load("eta", 2)
+
+    python model_registry.py import       # delivery_time_model.joblib -> models/eta/<next>
+    python model_registry.py list
+    python model_registry.py verify eta 1
+    python model_registry.py promote eta 1
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from tree_kernel import FlatEnsemble
+
+BASE_DIR     = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROOT = os.path.join(BASE_DIR, "models")
+DEFAULT_NAME = "eta"
+FORMAT       = 1
+ARRAYS       = ("feature", "threshold", "left", "right", "value", "roots", "importances")
+ESTIMATOR    = "estimator.joblib"
+
+
+class RegistryError(RuntimeError):
+    pass
+
+
+def _sha256(path, block=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def feature_schema(features) -> dict:
+    """dtype and, for encoded categoricals, the label -> code map of each feature."""
+    from features import ORDER_MAP, VEHICLE_MAP
+    codes = {"Type_of_order_encoded": ORDER_MAP, "Type_of_vehicle_encoded": VEHICLE_MAP}
+    return {f: {"dtype": "int", "codes": codes[f]} if f in codes else {"dtype": "float"} for f in features}
+
+
+class RegistryModel:
+    """One loaded version: mmap'd flat trees plus its manifest."""
+
+    def __init__(self, path, manifest, flat, importances, flat_max_rows=256):
+        self.path, self.manifest, self.flat = path, manifest, flat
+        self.name, self.version = manifest["name"], manifest["version"]
+        self.features = list(manifest["features"])
+        self.feature_names_in_ = np.array(self.features, dtype=object)
+        self.n_features_in_ = len(self.features)
+        self.feature_importances_ = importances
+        self.flat_max_rows = flat_max_rows
+        self._estimator, self._lock = None, threading.Lock()
+
+    def __repr__(self):
+        return f"RegistryModel({self.name!r}, version={self.version}, backend={self.manifest['backend']!r})"
+
+    def estimator(self):
+        """The stored sklearn estimator (checksum-verified, same sklearn version), or None."""
+        with self._lock:
+            if self._estimator is None:
+                self._estimator = self._load_estimator() or False
+            return self._estimator or None
+
+    def _load_estimator(self):
+        sha = self.manifest["files"].get(ESTIMATOR)
+        path = os.path.join(self.path, ESTIMATOR)
+        if sha is None or not os.path.exists(path):
+            return None
+        import sklearn
+        if sklearn.__version__ != self.manifest.get("sklearn_version"):
+            warnings.warn(f"{self!r} was saved with sklearn {self.manifest.get('sklearn_version')}, "
+                          f"running {sklearn.__version__}; serving every batch from the flat kernel")
+            return None
+        if _sha256(path) != sha:
+            raise RegistryError(f"checksum mismatch for {path}")
+        import joblib
+        return joblib.load(path)
+
+    def predict(self, X) -> np.ndarray:
+        if hasattr(X, "columns"):
+            X = X[self.features]
+        if len(X) > self.flat_max_rows:
+            est = self.estimator()
+            if est is not None:
+                if not hasattr(X, "columns"):  # sklearn warns on unnamed input to a named fit
+                    import pandas as pd
+                    X = pd.DataFrame(np.asarray(X), columns=self.features)
+                return est.predict(X)
+        return self.flat.predict(np.asarray(X, dtype=np.float64))
+
+
+class Registry:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self._loaded, self._lock = {}, threading.Lock()
+
+    # ── layout ──
+    def _dir(self, name, version=None):
+        return os.path.join(self.root, name) if version is None else os.path.join(self.root, name, str(version))
+
+    def names(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(n for n in os.listdir(self.root) if self.versions(n))
+
+    def versions(self, name=DEFAULT_NAME):
+        d = self._dir(name)
+        if not os.path.isdir(d):
+            return []
+        return sorted(int(v) for v in os.listdir(d)
+                      if v.isdigit() and os.path.exists(os.path.join(d, v, "manifest.json")))
+
+    def current(self, name=DEFAULT_NAME):
+        """Promoted version (CURRENT), else the newest; None if the name has no versions."""
+        try:
+            with open(os.path.join(self._dir(name), "CURRENT")) as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            versions = self.versions(name)
+            return versions[-1] if versions else None
+
+    def manifest(self, name=DEFAULT_NAME, version=None):
+        version = self.current(name) if version is None else version
+        if version is None:
+            raise RegistryError(f"no versions of {name!r} under {self.root}")
+        try:
+            with open(os.path.join(self._dir(name, version), "manifest.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise RegistryError(f"{name!r} has no version {version} (have {self.versions(name)})") from None
+
+    # ── write ──
+    def register(self, model, features, name=DEFAULT_NAME, metrics=None, params=None,
+                 source=None, promote=True, keep_estimator=True) -> int:
+        """Store a fitted `backends` estimator as the next version of `name`; returns the version."""
+        import sklearn
+        from backends import feature_importances
+        from tree_kernel import compile_model
+        features = list(features)
+        if list(getattr(model, "feature_names_in_", features)) != features:
+            raise RegistryError(f"model was fit on {list(model.feature_names_in_)}, not {features}")
+        flat = compile_model(model)
+        arrays = {k: getattr(flat, k) for k in ARRAYS[:-1]}
+        arrays["importances"] = feature_importances(model)
+
+        os.makedirs(self._dir(name), exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".new-", dir=self._dir(name))
+        try:
+            files = {}
+            for k, a in arrays.items():
+                np.save(os.path.join(tmp, f"{k}.npy"), np.ascontiguousarray(a))
+                files[f"{k}.npy"] = _sha256(os.path.join(tmp, f"{k}.npy"))
+            if keep_estimator:
+                import joblib
+                joblib.dump(model, os.path.join(tmp, ESTIMATOR))
+                files[ESTIMATOR] = _sha256(os.path.join(tmp, ESTIMATOR))
+            manifest = {
+                "format": FORMAT, "name": name, "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "backend": f"sklearn.{type(model).__name__}", "sklearn_version": sklearn.__version__,
+                "features": features, "schema": feature_schema(features),
+                "flat": {"init": flat.init, "depth": flat.depth, "n_features": flat.n_features,
+                         "n_trees": flat.n_trees, "n_nodes": flat.n_nodes, "x_dtype": flat.x_dtype.name},
+                "params": params or {k: v for k, v in model.get_params().items()
+                                     if isinstance(v, (int, float, str, bool, type(None)))},
+                "metrics": metrics or {}, "source": source, "files": files,
+            }
+            os.chmod(tmp, 0o755)  # mkdtemp creates it private
+            while True:  # claim the next free version number; rename is atomic
+                version = (self.versions(name) or [0])[-1] + 1
+                manifest["version"] = version
+                with open(os.path.join(tmp, "manifest.json"), "w") as f:
+                    json.dump(manifest, f, indent=2)
+                try:
+                    os.rename(tmp, self._dir(name, version))
+                    break
+                except OSError:
+                    if not os.path.exists(self._dir(name, version)):
+                        raise
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        if promote:
+            self.promote(name, version)
+        return version
+
+    def promote(self, name, version):
+        self.manifest(name, version)  # must exist
+        tmp = os.path.join(self._dir(name), f".CURRENT.{os.getpid()}")
+        with open(tmp, "w") as f:
+            f.write(f"{version}\n")
+        os.replace(tmp, os.path.join(self._dir(name), "CURRENT"))
+
+    # ── read ──
+    def verify(self, name=DEFAULT_NAME, version=None) -> dict:
+        """Manifest of a version whose files all match their checksums; raises RegistryError otherwise."""
+        manifest = self.manifest(name, version)
+        if manifest.get("format") != FORMAT:
+            raise RegistryError(f"unsupported registry format {manifest.get('format')}")
+        d = self._dir(name, manifest["version"])
+        for fname, sha in manifest["files"].items():
+            if _sha256(os.path.join(d, fname)) != sha:
+                raise RegistryError(f"checksum mismatch for {os.path.join(d, fname)}")
+        return manifest
+
+    def load(self, name=DEFAULT_NAME, version=None, features=None, verify=True) -> RegistryModel:
+        """Memory-mapped model; cached per (name, version) so versions can be held side by side."""
+        version = self.current(name) if version is None else int(version)
+        key = (name, version)
+        with self._lock:
+            if key in self._loaded:
+                model = self._loaded[key]
+            else:
+                manifest = self.verify(name, version) if verify else self.manifest(name, version)
+                d = self._dir(name, version)
+                a = {k: np.load(os.path.join(d, f"{k}.npy"), mmap_mode="r") for k in ARRAYS}
+                fl = manifest["flat"]
+                flat = FlatEnsemble(*(a[k] for k in ARRAYS[:-1]), init=fl["init"], depth=fl["depth"],
+                                    n_features=fl["n_features"], x_dtype=fl.get("x_dtype", "float32"))
+                model = self._loaded[key] = RegistryModel(d, manifest, flat, a["importances"])
+        if features is not None and list(features) != model.features:
+            raise RegistryError(f"{model!r} expects features {model.features}, not {list(features)}")
+        return model
+
+    def unload(self, name=DEFAULT_NAME, version=None):
+        with self._lock:
+            self._loaded.pop((name, self.current(name) if version is None else int(version)), None)
+
+
+_REGISTRIES = {}
+
+
+def registry(root=DEFAULT_ROOT) -> Registry:
+    """Process-wide Registry for `root`, so loaded versions are shared by every caller."""
+    if root not in _REGISTRIES:
+        _REGISTRIES[root] = Registry(root)
+    return _REGISTRIES[root]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Manage the versioned model registry.")
+    ap.add_argument("--root", default=DEFAULT_ROOT)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="register a joblib/pickle model file as a new version")
+    imp.add_argument("--model", default=os.path.join(BASE_DIR, "delivery_time_model.joblib"))
+    imp.add_argument("--features", default=os.path.join(BASE_DIR, "model_features.joblib"))
+    imp.add_argument("--name", default=DEFAULT_NAME)
+    imp.add_argument("--no-promote", action="store_true")
+    sub.add_parser("list")
+    for cmd in ("verify", "promote"):
+        p = sub.add_parser(cmd)
+        p.add_argument("name", nargs="?", default=DEFAULT_NAME)
+        p.add_argument("version", nargs="?", type=int)
+    args = ap.parse_args(argv)
+    reg = Registry(args.root)
+
+    if args.cmd == "import":
+        import joblib
+        model, features = joblib.load(args.model), joblib.load(args.features)
+        v = reg.register(model, features, args.name, source=os.path.basename(args.model),
+                         promote=not args.no_promote)
+        print(f"registered {args.name} v{v} in {reg._dir(args.name, v)}")
+    elif args.cmd == "list":
+        for name in reg.names():
+            cur = reg.current(name)
+            for v in reg.versions(name):
+                m = reg.manifest(name, v)
+                print(f"{'*' if v == cur else ' '} {name} v{v}  {m['created']}  {m['backend']}  "
+                      f"sklearn {m['sklearn_version']}  {m['flat']['n_trees']} trees  {m.get('metrics') or ''}")
+    elif args.cmd == "verify":
+        t = time.perf_counter()
+        m = reg.verify(args.name, args.version)
+        print(f"{args.name} v{m['version']}: {len(m['files'])} files OK ({(time.perf_counter() - t) * 1000:.1f} ms)")
+    elif args.cmd == "promote":
+        if args.version is None:
+            ap.error("promote needs a version")
+        reg.promote(args.name, args.version)
+        print(f"{args.name} CURRENT -> v{args.version}")
+
+
+if __name__ == "__main__":
+    main()
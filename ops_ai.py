@@ -0,0 +1,164 @@
+"""
+AI analysis, Copilot answers and the email report, without Streamlit.
+
+`OpsAI` bundles what `get_ai_decision`, `ask_copilot` and
+`send_report_email` need (the shared `Integrations` client, the LLM
+cache, API keys) so the same code runs in the Streamlit app and in
+headless workers such as `report_job.py`.
+
+    ai = OpsAI(Integrations(), llm_cache.from_env(".cache/llm_cache.sqlite"))
+    decision = ai.decision(build_signals(cube, ["Pune"]))
+    status = ai.send_report(["ops@x.com"], decision, signals)   # per-recipient status
+
+Keys come from GROQ_API_KEY, RESEND_API_KEY, RESEND_FROM_EMAIL and
+RESEND_RATE unless passed explicitly.
+"""
+import json
+import os
+
+import email_report
+import llm_cache
+import prompt_context
+from integrations import Integrations
+from metrics import timer
+from streaming import JsonFieldStream, StreamBuffer
+
+GROQ_MODEL  = "llama-3.3-70b-versatile"
+TEMPERATURE = 0.3
+
+# Bump when the prompt text in prompt_context changes; cached answers to the old wording are then ignored.
+DECISION_PROMPT_VERSION = 2
+COPILOT_PROMPT_VERSION  = 2
+# Token budget for the signals snapshot sent with each call
+CONTEXT_BUDGET = int(os.getenv("LLM_CONTEXT_TOKENS", prompt_context.DEFAULT_BUDGET))
+
+
+def classify(signals) -> str:
+    """Rule-based status; Llama writes the narrative, not the verdict."""
+    delayed_pct = signals.get("delayed_pct", 0)
+    avg_eta     = signals.get("avg_delivery_time_min", 0)
+    if delayed_pct > 20 or avg_eta > 35:
+        return "CRITICAL"
+    if delayed_pct > 10 or avg_eta > 28:
+        return "WARNING"
+    return "GOOD"
+
+
+def decision_json(text):
+    t = text.replace("```json","").replace("```","").strip()
+    start, end = t.find("{"), t.rfind("}") + 1
+    if start != -1 and end > start:
+        t = t[start:end]
+    return json.loads(t)
+
+
+def is_decision_json(text):  # only well-formed answers are cached
+    try:
+        return isinstance(decision_json(text), dict)
+    except ValueError:
+        return False
+
+
+def report_message(status) -> str:
+    """One-line outcome of a `send_report` status dict, for the UI."""
+    sent = [a for a, r in status.items() if r["status"] == "sent"]
+    failed = {a: r.get("error", "") for a, r in status.items() if r["status"] != "sent"}
+    if not failed:
+        return f"Report sent to {', '.join(sent)}" if len(sent) <= 3 else f"Report sent to {len(sent)} recipients"
+    return f"Error: sent {len(sent)}/{len(status)}; failed: " + "; ".join(f"{a} ({e})" for a, e in failed.items())
+
+
+class OpsAI:
+    def __init__(self, clients=None, cache=None, groq_key=None, resend_key=None,
+                 resend_from=None, resend_rate=None):
+        self.clients = clients or Integrations()
+        self.cache = cache
+        self.groq_key = groq_key if groq_key is not None else os.getenv("GROQ_API_KEY", "")
+        self.resend_key = resend_key if resend_key is not None else os.getenv("RESEND_API_KEY", "")
+        self.resend_from = resend_from or os.getenv("RESEND_FROM_EMAIL", "onboarding@resend.dev")
+        self.resend_rate = resend_rate or float(os.getenv("RESEND_RATE", "2"))  # requests / second
+
+    @timer("llama")
+    def llama(self, messages, key=None, validate=None, on_token=None):
+        """Completion text; with `on_token`, streamed and passed on delta by delta as it arrives."""
+        c = self.clients
+        def call():
+            if on_token is None:
+                return c.call(c.groq_chat(self.groq_key, GROQ_MODEL, messages, temperature=TEMPERATURE))
+            parts = []
+            for tok in c.iterate(c.groq_stream(self.groq_key, GROQ_MODEL, messages, temperature=TEMPERATURE)):
+                parts.append(tok)
+                on_token(tok)
+            return "".join(parts)
+        if key is None or self.cache is None:
+            return call()
+        return self.cache.get_or_call(key, call, validate)
+
+    def decision(self, signals, stream: StreamBuffer = None):
+        """`stream` (optional) receives reason / immediate_action / ... as each field completes."""
+        if not self.groq_key:
+            result = {"status":"ERROR","error":True,"reason":"Groq API key not configured.",
+                      "immediate_action":"Add GROQ_API_KEY to .env",
+                      "long_term_recommendation":"Set up environment variables."}
+            if stream is not None:
+                stream.set_fields(result)
+                stream.finish()
+            return result
+
+        forced_status = classify(signals)
+        context, _ = prompt_context.build_context(signals, CONTEXT_BUDGET)
+        messages = prompt_context.decision_messages(context, forced_status)
+
+        key = llm_cache.make_key(GROQ_MODEL, "decision", DECISION_PROMPT_VERSION, signals,
+                                 temperature=TEMPERATURE, budget=CONTEXT_BUDGET)
+        on_token = None
+        if stream is not None:
+            parser = JsonFieldStream()
+            on_token = lambda tok: stream.set_fields({**parser.feed(tok), "status": forced_status})
+        try:
+            result = decision_json(self.llama(messages, key, is_decision_json, on_token))
+            result["status"] = forced_status  # enforce — never let model override
+        except Exception as e:  # no analysis to report: flagged so headless jobs neither send nor dedup it
+            result = {"status": "ERROR", "error": True, "reason": str(e),
+                      "immediate_action": "Check Groq API key and response format.",
+                      "long_term_recommendation": "Add response validation and retry logic."}
+        if stream is not None:
+            stream.set_fields(result)
+            stream.finish()
+        return result
+
+    def copilot(self, question, signals, stream: StreamBuffer = None):
+        """`stream` (optional) receives the answer token by token."""
+        if not self.groq_key:
+            if stream is not None:
+                stream.finish("Groq API key not configured.")
+            return "Groq API key not configured."
+
+        context, _ = prompt_context.build_context(signals, CONTEXT_BUDGET, mention=question)
+        messages = prompt_context.copilot_messages(context, question)
+
+        key = llm_cache.make_key(GROQ_MODEL, "copilot", COPILOT_PROMPT_VERSION, signals, question,
+                                 temperature=TEMPERATURE, budget=CONTEXT_BUDGET)
+        try:
+            answer = self.llama(messages, key, on_token=stream.write if stream is not None else None)
+        except Exception as e:
+            answer = f"Error: {e}"
+        if stream is not None:
+            stream.finish(answer)  # also covers cache hits, which never stream
+        return answer
+
+    @timer("email_send")
+    def send_report(self, to, decision, signals, run_id=None, on_status=None):
+        """Per-recipient status of emailing the report; `to` is one address or a list."""
+        if not self.resend_key:
+            raise RuntimeError("Resend API key not configured.")
+        report = email_report.render_report(decision, signals)
+        return email_report.bulk_send(self.clients, self.resend_key, f"Delivery AI <{self.resend_from}>",
+                                      report, to, rate=self.resend_rate, run_id=run_id, on_status=on_status)
+
+    def send_report_email(self, to_email, decision, signals):
+        """`to_email`: one address or a comma / newline separated list; returns a status line."""
+        try:
+            return report_message(self.send_report(to_email, decision, signals))
+        except Exception as e:
+            return f"Error: {e}"
@@ -0,0 +1,85 @@
+"""
+Multi-process ETA scoring over a shared-memory feature matrix.
+
+`ParallelScorer` starts a process pool once; every worker loads the model a
+single time in its initializer and attaches to two shared-memory blocks (the
+encoded feature matrix and the output vector). A `predict` call copies the
+batch into shared memory once and hands workers only (start, stop) row
+ranges, so no feature data is pickled across process boundaries. Each row
+goes through the same `model.predict`, so results equal the serial call
+bit for bit.
+
+    with ParallelScorer(workers=8, capacity=1_000_000) as ps:
+        y = ps.predict(encode_features(df, ps.features).to_numpy())
+"""
+import os
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from inference import BASE_DIR, load_model
+
+_W = {}  # per-worker state: model, features, x, out
+
+
+def _init_worker(x_name, out_name, capacity, n_features, base):
+    m, f = load_model(base)
+    x_shm, out_shm = shared_memory.SharedMemory(x_name), shared_memory.SharedMemory(out_name)
+    _W.update(model=m, features=f, shm=(x_shm, out_shm),
+              x=np.ndarray((capacity, n_features), np.float64, buffer=x_shm.buf),
+              out=np.ndarray((capacity,), np.float64, buffer=out_shm.buf))
+
+
+def _score_range(bounds):
+    start, stop = bounds
+    X = pd.DataFrame(_W["x"][start:stop], columns=_W["features"])
+    _W["out"][start:stop] = _W["model"].predict(X)
+    return stop - start
+
+
+class ParallelScorer:
+    def __init__(self, workers=None, capacity=1_000_000, base=BASE_DIR, min_shard=10_000):
+        self.workers  = workers or os.cpu_count() or 1
+        self.capacity = capacity
+        self.min_shard = min_shard
+        _, self.features = load_model(base)
+        n_features = len(self.features)
+
+        self._x_shm   = shared_memory.SharedMemory(create=True, size=capacity * n_features * 8)
+        self._out_shm = shared_memory.SharedMemory(create=True, size=capacity * 8)
+        self._x   = np.ndarray((capacity, n_features), np.float64, buffer=self._x_shm.buf)
+        self._out = np.ndarray((capacity,), np.float64, buffer=self._out_shm.buf)
+        self._pool = get_context().Pool(
+            self.workers, initializer=_init_worker,
+            initargs=(self._x_shm.name, self._out_shm.name, capacity, n_features, base))
+
+    def _shards(self, n):
+        k = max(1, min(self.workers, n // self.min_shard))
+        edges = np.linspace(0, n, k + 1, dtype=np.int64)
+        return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+    def predict(self, X) -> np.ndarray:
+        """Predict for an (n, len(FEATURES)) matrix; batches above `capacity` are split."""
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) > self.capacity:
+            return np.concatenate([self.predict(X[i:i + self.capacity])
+                                   for i in range(0, len(X), self.capacity)])
+        n = len(X)
+        self._x[:n] = X
+        self._pool.map(_score_range, self._shards(n))
+        return self._out[:n].copy()
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+        del self._x, self._out
+        for shm in (self._x_shm, self._out_shm):
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,152 @@
+"""
+Compact LLM context for the AI decision and the Copilot.
+
+`build_context` turns the `signals` dict into minified JSON with floats
+rounded to one decimal. The per-city ETA and delay maps are merged into one
+`by_city` table of [avg_eta_min, delay_pct] pairs limited to the `top_k`
+cities with the highest delay rate, plus any city the question names. The
+result is kept under a token budget by dropping cities first, then the
+order-type and vehicle breakdowns.
+
+The long instruction blocks are static `*_SYSTEM` prompts sent as the system
+message; only the snapshot (and question / status) changes per call. That
+keeps the re-sent prefix byte-identical, which is what provider-side prompt
+caching keys on, and makes the dynamic part easy to measure.
+
+    text, tokens = build_context(signals, budget=DEFAULT_BUDGET)
+    messages = decision_messages(text, "WARNING")
+
+Token counts use `tiktoken` (cl100k, close to Llama 3's tokenizer) when it
+is installed and a regex estimate otherwise.
+"""
+import json
+import re
+
+DEFAULT_BUDGET = 300   # tokens for the snapshot JSON
+DEFAULT_TOP_K  = 5
+
+DECISION_SYSTEM = """You are an elite operations intelligence engine for a food delivery SaaS platform used by operations managers and C-suite executives. Your analysis must be data-driven, specific, and immediately actionable — never generic.
+
+The user message holds the Live Operations Snapshot (minified JSON; `by_city` maps city -> [avg_eta_min, delay_pct] for the cities with the highest delay rate) and the Classification.
+
+## Your Task
+Analyze the snapshot and return a JSON object with exactly these fields:
+
+1. "status" → Must be exactly the status given under Classification
+
+2. "reason" → 3 sentences MAX. Must:
+   - Reference AT LEAST 2 specific numbers from the snapshot
+   - Identify the single biggest bottleneck (city, vehicle type, or order type) using the breakdown data provided
+   - State the business impact (customer satisfaction, revenue risk, or retention)
+   - Sound like a McKinsey ops analyst wrote it, not a chatbot
+
+3. "immediate_action" → 1 sentence. Must:
+   - Be executable within 24 hours by an ops manager
+   - Name a specific city or vehicle type pulled from the breakdown data
+   - Start with an action verb (e.g., "Reallocate", "Flag", "Dispatch", "Audit")
+
+4. "long_term_recommendation" → 1 sentence. Must:
+   - Be a strategic initiative (weeks/months horizon)
+   - Reference a specific pattern visible in the breakdown data
+   - Mention expected outcome (e.g., "reduce delayed_pct by ~X%")
+
+## Hard Rules
+- Return STRICT JSON ONLY — no markdown, no explanation outside JSON
+- Every claim must trace back to a number in the snapshot
+- No filler phrases like "it is important to", "we recommend considering", "as shown"
+- If delayed_pct > 15, the reason MUST call it out as a retention risk
+- Use the city-level and vehicle-level breakdown data — do not give generic advice
+
+Return format:
+{"status":"","reason":"","immediate_action":"","long_term_recommendation":""}"""
+
+COPILOT_SYSTEM = """You are an expert operations analyst for a food delivery platform. You have access to real-time operational data, given in the user message as minified JSON (`by_city` maps city -> [avg_eta_min, delay_pct] for the cities with the highest delay rate).
+
+## Instructions
+- Answer in 3-5 sentences MAX
+- You MUST cite at least 2 specific numbers from the data in your answer
+- If the question is about a specific city or vehicle type, pull the exact figure from the breakdown data
+- Give a concrete recommendation at the end of your answer
+- Do not use filler phrases like "Great question" or "Based on the data provided"
+- Write like a senior analyst briefing a VP — direct, confident, specific"""
+
+
+# ── token counting ──
+_TOKEN_RE = re.compile(r"\n[ \t]*|[A-Za-z]+|\d{1,3}|\S")
+_ENCODER = False  # not looked up yet
+
+
+def _encoder():
+    global _ENCODER
+    if _ENCODER is False:
+        try:
+            import tiktoken
+            _ENCODER = tiktoken.get_encoding("cl100k_base")
+        except Exception:  # not installed, or no cached vocabulary offline
+            _ENCODER = None
+    return _ENCODER
+
+
+def count_tokens(text) -> int:
+    enc = _encoder()
+    if enc is not None:
+        return len(enc.encode(text))
+    # words ~1 token per 6 letters, numbers in 3-digit groups, 1 per symbol or line indent
+    return sum(-(-len(m) // 6) if m[0].isalpha() else 1 for m in _TOKEN_RE.findall(text))
+
+
+def messages_tokens(messages) -> int:
+    return sum(count_tokens(m["content"]) + 4 for m in messages)  # + role/format overhead
+
+
+# ── context ──
+def _r(x, digits):
+    return round(x, digits) if isinstance(x, float) else x
+
+
+def compact_signals(signals, top_k=DEFAULT_TOP_K, digits=1, mention="",
+                    keep_vehicle=True, keep_order=True) -> dict:
+    """Rounded copy of `signals` with a merged, top-k `by_city` table."""
+    eta, delay = signals.get("avg_eta_by_city", {}), signals.get("delay_rate_by_city", {})
+    ranked = sorted(eta, key=lambda c: -delay.get(c, 0))
+    named = [c for c in ranked if mention and c.lower() in mention.lower()]
+    cities = named + [c for c in ranked if c not in named][:max(0, top_k - len(named))]
+    out = {k: _r(v, digits) for k, v in signals.items() if not isinstance(v, dict)}
+    if keep_vehicle and "avg_eta_by_vehicle" in signals:
+        out["avg_eta_by_vehicle"] = {k: _r(v, digits) for k, v in signals["avg_eta_by_vehicle"].items()}
+    if keep_order and "avg_eta_by_order_type" in signals:
+        out["avg_eta_by_order_type"] = {k: _r(v, digits) for k, v in signals["avg_eta_by_order_type"].items()}
+    if cities:
+        out["by_city"] = {c: [_r(eta[c], digits), _r(delay.get(c), digits)] for c in cities}
+    return out
+
+
+def build_context(signals, budget=DEFAULT_BUDGET, top_k=DEFAULT_TOP_K, digits=1, mention=""):
+    """(minified JSON, token count) for `signals`, shrunk until it fits `budget` tokens."""
+    steps = [dict(top_k=k) for k in range(top_k, 0, -1)]
+    steps += [dict(top_k=1, keep_order=False), dict(top_k=1, keep_order=False, keep_vehicle=False)]
+    for step in steps:
+        text = json.dumps(compact_signals(signals, digits=digits, mention=mention, **step),
+                          separators=(",", ":"), ensure_ascii=False)
+        tokens = count_tokens(text)
+        if tokens <= budget:
+            break
+    return text, tokens
+
+
+def legacy_context(signals) -> str:
+    """What the prompts embedded before: every breakdown, pretty-printed."""
+    return json.dumps(signals, indent=2)
+
+
+def decision_messages(context, status):
+    return [{"role": "system", "content": DECISION_SYSTEM},
+            {"role": "user", "content": f"## Live Operations Snapshot\n{context}\n\n"
+                                        f"## Classification\nStatus is already determined as: {status}\n"
+                                        f"Do NOT change or override this status."}]
+
+
+def copilot_messages(context, question):
+    return [{"role": "system", "content": COPILOT_SYSTEM},
+            {"role": "user", "content": f"## Live Operations Data\n{context}\n\n"
+                                        f"## Question from Operations Manager\n{question}"}]
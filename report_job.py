@@ -0,0 +1,230 @@
+"""
+Scheduled, headless AI analysis + email report per city group.
+
+Runs the same `signals` -> `OpsAI.decision` -> `OpsAI.send_report` path as
+the "Run AI Analysis" / "Send Report" buttons, without Streamlit. Each
+tick polls the data (`ingest.LiveData`, so inbox/ drops are picked up),
+then runs every city group in parallel on a thread pool: the work is
+Groq / Resend I/O, and the cube lookups are sub-millisecond.
+
+Every run is recorded in a SQLite history (`.cache/report_runs.sqlite`).
+A group whose signals and recipient list are unchanged since its last
+successful send is skipped ("unchanged") rather than re-analysed and
+re-mailed; `--force` overrides that. Emails carry idempotency keys derived
+from the group, the schedule slot and the signals, so a run retried within
+the same slot does not deliver twice. A job that raises is recorded as
+"error" and retried next tick; a failed data refresh runs the tick on the
+last snapshot, so the scheduler itself keeps going.
+
+    python report_job.py --group South=Bangalore,Chennai,Mysore --group All= --to ops@x.com --once
+    python report_job.py --jobs report_jobs.json --every 3600     # hourly, aligned to the hour
+    python report_job.py --history
+
+report_jobs.json: [{"name": "South", "cities": ["Chennai"], "to": ["ops@x.com"]}, ...]
+(an empty "cities" list means all cities; "to" defaults to --to / REPORT_TO).
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+import data_store
+import email_report
+import llm_cache
+from cube import build_signals
+from ingest import LiveData
+from ops_ai import DECISION_PROMPT_VERSION, GROQ_MODEL, OpsAI
+
+DEFAULT_HISTORY = os.path.join(data_store.BASE_DIR, ".cache", "report_runs.sqlite")
+
+Job = namedtuple("Job", "name cities to")
+SENT_OUTCOMES = ("sent", "partial")
+
+
+class RunHistory:
+    """Append-only run log. Safe across threads and processes."""
+
+    def __init__(self, path=DEFAULT_HISTORY):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, job TEXT NOT NULL, "
+                             "cities TEXT, slot TEXT, started REAL, finished REAL, signals_key TEXT, "
+                             "outcome TEXT, message TEXT, decision TEXT, recipients TEXT)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS runs_job ON runs(job, id)")
+
+    def last_sent(self, job):
+        """signals_key of the job's last run that delivered mail, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT signals_key FROM runs WHERE job = ? AND outcome IN (?, ?) "
+                                   "ORDER BY id DESC LIMIT 1", (job, *SENT_OUTCOMES)).fetchone()
+        return row[0] if row else None
+
+    def record(self, **run):
+        cols = ("job", "cities", "slot", "started", "finished", "signals_key", "outcome",
+                "message", "decision", "recipients")
+        with self._lock:
+            self._db.execute(f"INSERT INTO runs ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                             [run.get(c) for c in cols])
+
+    def recent(self, limit=20):
+        with self._lock:
+            cur = self._db.execute("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,))
+            names = [d[0] for d in cur.description]
+            return [dict(zip(names, row)) for row in cur.fetchall()]
+
+
+def signals_key(job, signals):
+    """Changes when the job's signals, recipients or decision prompt change."""
+    return llm_cache.make_key(GROQ_MODEL, "report", DECISION_PROMPT_VERSION, signals,
+                              to=sorted(a.lower() for a in job.to))
+
+
+def run_job(job, cube, ai, history, slot, force=False):
+    """Analyse and mail one city group; returns the recorded run."""
+    started = time.time()
+    signals = build_signals(cube, job.cities or None)
+    key = signals_key(job, signals)
+    run = dict(job=job.name, cities=",".join(job.cities), slot=slot, started=started, signals_key=key)
+    if not force and history.last_sent(job.name) == key:
+        run.update(outcome="unchanged", message="signals unchanged since last report")
+    else:
+        decision = ai.decision(signals)
+        run["decision"] = json.dumps(decision)
+        if decision.get("error") or decision.get("status") == "ERROR":
+            run.update(outcome="error", message=decision.get("reason"))
+        else:
+            try:
+                status = ai.send_report(job.to, decision, signals, run_id=f"{job.name}:{slot}:{key}")
+            except Exception as e:
+                run.update(outcome="error", message=str(e))
+            else:
+                counts = email_report.summarize(status)
+                outcome = ("sent" if counts.get("sent") == len(status) else
+                           "partial" if counts.get("sent") else "failed")
+                run.update(outcome=outcome, message=str(counts), recipients=json.dumps(status))
+    run["finished"] = time.time()
+    history.record(**run)
+    return run
+
+
+def run_job_safe(job, cube, ai, history, slot, force=False):
+    """`run_job`, but a raise comes back (and is recorded, if history works) as an "error" run."""
+    started = time.time()
+    try:
+        return run_job(job, cube, ai, history, slot, force)
+    except Exception as e:  # one job's failure must not take down the tick
+        run = dict(job=job.name, cities=",".join(job.cities), slot=slot, started=started,
+                   finished=time.time(), outcome="error", message=f"{type(e).__name__}: {e}")
+        try:
+            history.record(**run)
+        except Exception:  # e.g. the SQLite error that failed the job in the first place
+            pass
+        return run
+
+
+def run_all(jobs, live, ai, history, slot=None, workers=4, force=False, log=None):
+    """One tick: refresh the data, then run every job in parallel.
+
+    If the refresh fails the jobs run on the last snapshot; a job that
+    raises comes back as an "error" run, so the next tick retries it.
+    """
+    try:
+        live.poll()
+    except Exception as e:
+        if log:
+            log(f"data refresh failed, using the last snapshot: {type(e).__name__}: {e}")
+    _, cube = live.snapshot()
+    slot = slot or time.strftime("%Y-%m-%dT%H:%M", time.localtime())
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+        return list(pool.map(lambda j: run_job_safe(j, cube, ai, history, slot, force), jobs))
+
+
+def next_tick(now, every):
+    """Next wall-clock multiple of `every` seconds (the top of the hour for 3600)."""
+    return (now // every + 1) * every
+
+
+def load_jobs(args):
+    default_to = email_report.parse_recipients(args.to or os.getenv("REPORT_TO", ""))[0]
+    jobs = []
+    if args.jobs:
+        with open(args.jobs) as f:
+            for j in json.load(f):
+                jobs.append(Job(j["name"], list(j.get("cities") or []),
+                                email_report.parse_recipients(j.get("to") or default_to)[0]))
+    for g in args.group:
+        name, _, cities = g.partition("=")
+        jobs.append(Job(name, [c.strip() for c in cities.split(",") if c.strip()], default_to))
+    return jobs
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Scheduled AI analysis + email report per city group.")
+    ap.add_argument("--jobs", help="JSON list of {name, cities, to}")
+    ap.add_argument("--group", action="append", default=[], help="NAME=City1,City2 (empty = all cities)")
+    ap.add_argument("--to", help="default recipients, comma separated (or REPORT_TO)")
+    ap.add_argument("--every", type=float, default=3600, help="seconds between runs, wall-clock aligned")
+    ap.add_argument("--once", action="store_true", help="run now and exit")
+    ap.add_argument("--force", action="store_true", help="send even if signals are unchanged")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--history", action="store_true", help="print recent runs and exit")
+    ap.add_argument("--history-path", default=DEFAULT_HISTORY)
+    args = ap.parse_args(argv)
+    load_dotenv()
+
+    history = RunHistory(args.history_path)
+    if args.history:
+        for r in history.recent():
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(r['started']))}  {r['job']:<12} "
+                  f"{r['outcome']:<9} {r['finished'] - r['started']:6.2f}s  {r['message']}")
+        return
+
+    jobs = load_jobs(args)
+    if not jobs:
+        ap.error("no jobs: pass --jobs or --group")
+    if any(not j.to for j in jobs):
+        ap.error("every job needs recipients: --to, REPORT_TO or \"to\" in --jobs")
+    live = LiveData(data_store.DEFAULT_CSV)
+    unknown = {c for j in jobs for c in j.cities} - set(live.snapshot()[1].cities)
+    if unknown:
+        print(f"warning: unknown cities {sorted(unknown)} match no rows")
+    ai = OpsAI(cache=llm_cache.from_env(os.path.join(data_store.BASE_DIR, ".cache", "llm_cache.sqlite")))
+
+    def tick(slot):
+        t = time.perf_counter()
+        try:
+            runs = run_all(jobs, live, ai, history, slot, args.workers, args.force, log=print)
+        except Exception as e:  # keep the scheduler alive; the next slot tries again
+            print(f"tick failed: {type(e).__name__}: {e}")
+            return
+        for r in runs:
+            print(f"  {r['job']:<12} {r['outcome']:<9} {r['finished'] - r['started']:6.2f}s  {r['message']}")
+        print(f"{len(jobs)} jobs in {time.perf_counter() - t:.2f}s")
+
+    try:
+        if args.once:
+            tick(None)
+            return
+        while True:
+            wake = next_tick(time.time(), args.every)
+            print(f"next run at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(wake))}")
+            time.sleep(max(0.0, wake - time.time()))
+            tick(time.strftime("%Y-%m-%dT%H:%M", time.localtime(wake)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ai.clients.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Standalone async ETA prediction service (no Streamlit, stdlib HTTP only).
+
+Concurrent requests are queued into a `MicroBatcher`, which scores them in a
+single `model.predict` call once `max_batch` rows are waiting or the oldest
+request has waited `max_wait_ms`, whichever comes first. Prediction runs on
+a worker thread so the event loop keeps accepting connections meanwhile.
+
+    python serve.py --port 8502 --max-batch 512 --max-wait-ms 2
+    python serve.py --flat-kernel          # tree_kernel evaluator, lower per-batch overhead
+    python serve.py --memo-size 0          # disable the prediction memo (predict_memo.py)
+
+    POST /predict        {"Delivery_person_Age": 30, "Delivery_person_Ratings": 4.5,
+                          "distance_km": 5.0, "Type_of_order": "Meal",
+                          "Type_of_vehicle": "Motorcycle"}
+                         -> {"eta_min": 23.1}
+    POST /predict/bulk   {"orders": [{...}, {...}]}  -> {"eta_min": [..., ...]}
+    GET  /health, GET /stats
+
+Orders may give the four *_latitude/*_longitude columns instead of distance_km.
+Rows already scored are answered from a shared `PredictionMemo` without
+queueing; only the misses go to the batcher. Memo hit rates and latencies
+are under "memo" in /stats.
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from features import COORD_COLS, ORDER_MAP, VEHICLE_MAP, haversine, normalize_label
+from inference import load_model
+from predict_memo import PredictionMemo
+from tree_kernel import FlatEnsemble, compile_model
+
+
+# ─────────────────────────────────────────────
+# REQUEST ENCODING
+# ─────────────────────────────────────────────
+def _code(order, key, mapping):
+    label = normalize_label(order.get(key, ""))
+    if label not in mapping:
+        raise ValueError(f"{key} must be one of {list(mapping)}")
+    return mapping[label]
+
+def encode_order(order: dict, features) -> list:
+    """One JSON order -> feature row in FEATURES order."""
+    if "distance_km" in order:
+        dist = float(order["distance_km"])
+    elif all(c in order for c in COORD_COLS):
+        dist = haversine(*(float(order[c]) for c in COORD_COLS))
+    else:
+        raise ValueError("distance_km or the four coordinate fields are required")
+    row = {
+        "Delivery_person_Age":     float(order["Delivery_person_Age"]),
+        "Delivery_person_Ratings": float(order["Delivery_person_Ratings"]),
+        "distance_km":             dist,
+        "Type_of_order_encoded":   _code(order, "Type_of_order", ORDER_MAP),
+        "Type_of_vehicle_encoded": _code(order, "Type_of_vehicle", VEHICLE_MAP),
+    }
+    return [row[f] for f in features]
+
+
+# ─────────────────────────────────────────────
+# MICRO-BATCHING
+# ─────────────────────────────────────────────
+class MicroBatcher:
+    def __init__(self, model, features, max_batch=512, max_wait_ms=2.0):
+        self.model, self.features = model, features
+        self.max_batch, self.max_wait = max_batch, max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+        self.stats = {"requests": 0, "rows": 0, "batches": 0, "predict_s": 0.0}
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        self.pool.shutdown(wait=False)
+
+    async def submit(self, rows) -> np.ndarray:
+        fut = asyncio.get_running_loop().create_future()
+        await self.queue.put((np.asarray(rows, dtype=np.float64), fut))
+        return await fut
+
+    def _predict(self, X):
+        t = time.perf_counter()
+        if isinstance(self.model, FlatEnsemble):
+            y = self.model.predict(X)
+        else:
+            y = self.model.predict(pd.DataFrame(X, columns=self.features))
+        self.stats["predict_s"] += time.perf_counter() - t
+        return y
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        n = len(batch[0][0])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while n < self.max_batch:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                left = deadline - loop.time()
+                if left <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), left)
+                except asyncio.TimeoutError:
+                    break
+            batch.append(item)
+            n += len(item[0])
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            X = np.concatenate([x for x, _ in batch])
+            try:
+                y = await loop.run_in_executor(self.pool, self._predict, X)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done(): fut.set_exception(e)
+                continue
+            self.stats["requests"] += len(batch)
+            self.stats["rows"]     += len(X)
+            self.stats["batches"]  += 1
+            i = 0
+            for x, fut in batch:
+                if not fut.done(): fut.set_result(y[i:i + len(x)])
+                i += len(x)
+
+
+# ─────────────────────────────────────────────
+# HTTP
+# ─────────────────────────────────────────────
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+class PredictionServer:
+    def __init__(self, batcher: MicroBatcher, memo: PredictionMemo = None):
+        self.batcher, self.memo = batcher, memo
+
+    async def predict(self, rows) -> np.ndarray:
+        if self.memo is None:
+            return await self.batcher.submit(rows)
+        t = time.perf_counter()
+        X = np.asarray(rows, dtype=np.float64)
+        y, missing = self.memo.lookup(X)
+        if missing:
+            y[missing] = await self.batcher.submit(X[missing])
+            self.memo.store(X[missing], y[missing])
+        self.memo.record_call(time.perf_counter() - t, bool(missing))
+        return y
+
+    async def route(self, method, path, body):
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/stats":
+            s = dict(self.batcher.stats)
+            s["avg_batch_rows"] = round(s["rows"] / s["batches"], 2) if s["batches"] else 0.0
+            if self.memo is not None:
+                s["memo"] = self.memo.stats()
+            return 200, s
+        if path not in ("/predict", "/predict/bulk"):
+            return 404, {"error": f"no route {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            payload = json.loads(body or b"{}")
+            feats = self.batcher.features
+            if path == "/predict":
+                y = await self.predict([encode_order(payload, feats)])
+                return 200, {"eta_min": float(y[0])}
+            orders = payload.get("orders") if isinstance(payload, dict) else payload
+            if not isinstance(orders, list) or not orders:
+                raise ValueError('"orders" must be a non-empty list')
+            y = await self.predict([encode_order(o, feats) for o in orders])
+            return 200, {"eta_min": y.tolist()}
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {"error": str(e) if not isinstance(e, KeyError) else f"missing field {e}"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                try:
+                    status, out = await self.route(method, path.split("?", 1)[0], body)
+                except Exception as e:
+                    status, out = 500, {"error": str(e)}
+                data = json.dumps(out).encode()
+                keep = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if not keep:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8502, max_batch=512, max_wait_ms=2.0, flat_kernel=False,
+                memo_size=65536, grid_km=None):
+    model, features = load_model()
+    memo = PredictionMemo(model, features, memo_size, grid_km) if memo_size else None
+    if flat_kernel:
+        model = compile_model(model)
+    batcher = MicroBatcher(model, features, max_batch, max_wait_ms)
+    batcher.start()
+    server = await asyncio.start_server(PredictionServer(batcher, memo).handle, host, port, backlog=1024)
+    print(f"ETA service on http://{host}:{port}  (max_batch={max_batch}, max_wait_ms={max_wait_ms})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Async micro-batching ETA prediction service.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8502)
+    ap.add_argument("--max-batch", type=int, default=512, help="rows per model.predict call")
+    ap.add_argument("--max-wait-ms", type=float, default=2.0,
+                    help="longest a request waits for batch-mates")
+    ap.add_argument("--flat-kernel", action="store_true",
+                    help="score with the tree_kernel flat-array evaluator instead of sklearn")
+    ap.add_argument("--memo-size", type=int, default=65536, help="memoized rows (0 disables the memo)")
+    ap.add_argument("--grid-km", type=float, default=None,
+                    help="precompute the Predict tab lattice up to this distance")
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms, args.flat_kernel,
+                          args.memo_size, args.grid_km))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
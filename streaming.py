@@ -0,0 +1,109 @@
+"""
+Helpers for rendering LLM output while it is still being generated.
+
+`StreamBuffer` is written by a background job (tokens and/or completed
+JSON fields) and read by the Streamlit script on each fragment tick. It
+also records time-to-first-token and total latency.
+
+`JsonFieldStream` is an incremental parser for the AI decision reply. Fed
+arbitrary chunks of a JSON object (optionally wrapped in ``` fences or
+chatter), it returns each top-level string field as soon as its closing
+quote arrives, so `reason` can be shown before `immediate_action` has
+been generated.
+
+    p = JsonFieldStream()
+    p.feed('{"status":"GOOD","rea')   # -> {"status": "GOOD"}
+    p.feed('son":"ok"}')             # -> {"reason": "ok"}
+"""
+import json
+import time
+
+
+class StreamBuffer:
+    def __init__(self):
+        self.parts, self.fields = [], {}
+        self.t0 = time.perf_counter()
+        self.ttft = self.total = None
+        self.done = False
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    def _first(self):
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.t0
+
+    def write(self, token):
+        self._first()
+        self.parts.append(token)
+
+    def set_fields(self, fields):
+        if fields:
+            self._first()
+            self.fields.update(fields)
+
+    def finish(self, text=None):
+        """Mark complete; `text` replaces the streamed parts (e.g. a cache hit that never streamed)."""
+        self._first()
+        if text is not None:
+            self.parts = [text]
+        self.total = time.perf_counter() - self.t0
+        self.done = True
+
+
+class JsonFieldStream:
+    """Incremental scanner for a flat JSON object; yields completed top-level fields."""
+
+    def __init__(self):
+        self.buf = ""
+        self.pos = 0          # next unscanned char
+        self.depth = 0
+        self.in_str = self.esc = False
+        self.str_start = None
+        self.key = None       # last completed key at depth 1
+        self.expect = "key"   # at depth 1: "key" -> ":" -> "value" -> "," -> "key"
+        self.value_start = None
+        self.fields = {}
+
+    def feed(self, chunk) -> dict:
+        """Add text; return the fields completed by it."""
+        self.buf += chunk
+        new = {}
+        b = self.buf
+        for i in range(self.pos, len(b)):
+            c = b[i]
+            if self.in_str:
+                if self.esc:
+                    self.esc = False
+                elif c == "\\":
+                    self.esc = True
+                elif c == '"':
+                    self.in_str = False
+                    if self.depth == 1:
+                        raw = b[self.str_start:i + 1]
+                        if self.expect == "key":
+                            self.key, self.expect = json.loads(raw), ":"
+                        elif self.expect == "value":
+                            new[self.key] = json.loads(raw)
+                            self.expect = ","
+                continue
+            if c == '"':
+                self.in_str, self.str_start = True, i
+            elif c in "{[":
+                self.depth += 1
+                if self.depth == 2 and self.expect == "value":
+                    self.value_start = i
+            elif c in "}]":
+                if self.depth == 2 and self.value_start is not None and self.key is not None:
+                    new[self.key] = json.loads(b[self.value_start:i + 1])
+                    self.value_start, self.expect = None, ","
+                self.depth = max(0, self.depth - 1)
+            elif self.depth == 1:
+                if c == ":" and self.expect == ":":
+                    self.expect = "value"
+                elif c == ",":
+                    self.expect = "key"
+        self.pos = len(b)
+        self.fields.update(new)
+        return new
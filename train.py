@@ -0,0 +1,217 @@
+"""
+Retrain the ETA model from the cleaned dataset and register it.
+
+Reads the same cleaned frame the app shows (`data_store.load_clean_frame`:
+the column store, including rows appended by `ingest.py`). Encodes it with
+`features.encode_features`, then caches the feature matrix, the target and
+the K-fold indices under `.cache/train/<key>/`. The key covers the store's
+content (source SHA-256, clean version, row count), the feature list, the
+fold count and the seed. Reruns on unchanged data skip the encoding and
+reuse the same folds, so the CV scores are comparable across runs.
+
+The hyperparameter search fits every (config, fold) pair of the chosen
+`backends` grid on a process pool (`--backend gbr` is the shipped
+GradientBoostingRegressor, `--backend hist` the histogram booster). Workers
+memory-map the cached arrays, so no feature data is pickled. Each fit stops
+early once its internal validation loss stops improving
+(`n_iter_no_change`). Per config, the report shows CV RMSE/MAE, the trees
+actually kept, wall-clock, and fit/predict throughput in rows per second.
+The best config is refit on all rows and stored with
+`model_registry.Registry.register`. `load_model()` serves it once it is
+promoted (the default):
+
+    python train.py                          # default grid, all cores, register + promote
+    python train.py --backend hist           # histogram-binned booster, same FEATURES
+    python train.py --grid quick --workers 2 --no-promote
+    python train.py --dry-run                # search only, register nothing
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import data_store
+from backends import BACKENDS, n_trees
+from model_registry import DEFAULT_NAME, DEFAULT_ROOT, Registry
+
+FEATURES = ["Delivery_person_Age", "Delivery_person_Ratings", "distance_km",
+            "Type_of_order_encoded", "Type_of_vehicle_encoded"]
+TARGET = "Delivery_Time_min"
+CACHE_DIR = os.path.join(data_store.BASE_DIR, ".cache", "train")
+# Bump when the cached X / y / folds layout changes.
+CACHE_VERSION = 1
+
+
+def expand_grid(grid):
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def dataset_key(df, features, folds, seed):
+    manifest = data_store.read_manifest(data_store.DEFAULT_DIR)
+    if manifest is not None and manifest.get("rows") == len(df):
+        source = [manifest.get("source_sha256"), manifest.get("clean_version"), manifest["rows"],
+                  manifest.get("appends", 0)]
+    else:  # frame did not come from the store: hash the rows themselves
+        source = [hashlib.sha256(np.ascontiguousarray(df[c].to_numpy(dtype=np.float64)).tobytes()).hexdigest()
+                  for c in ("Delivery_person_Age", "Delivery_person_Ratings", "distance_km", TARGET)]
+    doc = json.dumps([CACHE_VERSION, source, list(features), folds, seed])
+    return hashlib.sha256(doc.encode()).hexdigest()[:16]
+
+
+def prepare(df=None, features=FEATURES, folds=5, seed=42, cache_dir=CACHE_DIR):
+    """Directory holding X.npy, y.npy and folds.npy for this data; built on first use."""
+    from features import encode_features
+    df = data_store.load_clean_frame() if df is None else df
+    d = os.path.join(cache_dir, dataset_key(df, features, folds, seed))
+    if os.path.exists(os.path.join(d, "meta.json")):
+        return d
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".new-", dir=cache_dir)
+    X = encode_features(df, features).to_numpy(dtype=np.float64)
+    y = df[TARGET].to_numpy(dtype=np.float64)
+    fold_of = np.random.default_rng(seed).permutation(len(y)) % folds  # balanced, shuffled
+    np.save(os.path.join(tmp, "X.npy"), X)
+    np.save(os.path.join(tmp, "y.npy"), y)
+    np.save(os.path.join(tmp, "folds.npy"), fold_of.astype(np.int8))
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"rows": len(y), "features": list(features), "folds": folds, "seed": seed}, f)
+    os.chmod(tmp, 0o755)
+    try:
+        os.rename(tmp, d)
+    except OSError:  # another process built the same key first
+        shutil.rmtree(tmp, ignore_errors=True)
+    return d
+
+
+def load_cached(d):
+    with open(os.path.join(d, "meta.json")) as f:
+        meta = json.load(f)
+    arrays = {k: np.load(os.path.join(d, f"{k}.npy"), mmap_mode="r") for k in ("X", "y", "folds")}
+    return arrays["X"], arrays["y"], arrays["folds"], meta
+
+
+_W = {}  # per-worker state: the mapped X, y, folds of one cache dir
+
+
+def _fit_fold(cache, backend, params, fold):
+    if _W.get("cache") != cache:
+        _W.update(zip(("X", "y", "folds", "meta"), load_cached(cache)), cache=cache)
+    X, y, folds = _W["X"], _W["y"], _W["folds"]
+    train, test = folds != fold, folds == fold
+    start = time.time()
+    t = time.perf_counter()
+    model = BACKENDS[backend].make(**params).fit(X[train], y[train])
+    fit_s = time.perf_counter() - t
+    t = time.perf_counter()
+    err = model.predict(X[test]) - y[test]
+    predict_s = time.perf_counter() - t
+    return {"fold": fold, "rmse": float(np.sqrt(np.mean(err ** 2))), "mae": float(np.mean(np.abs(err))),
+            "trees": n_trees(model), "fit_s": fit_s, "predict_s": predict_s,
+            "train_rows": int(train.sum()), "test_rows": int(test.sum()), "start": start, "end": time.time()}
+
+
+def summarize(params, fits):
+    wall = max(f["end"] for f in fits) - min(f["start"] for f in fits)  # first fold start to last fold end
+    fit_s = sum(f["fit_s"] for f in fits)
+    rmse = [f["rmse"] for f in fits]
+    return {"params": params, "cv_rmse": float(np.mean(rmse)), "cv_rmse_std": float(np.std(rmse)),
+            "cv_mae": float(np.mean([f["mae"] for f in fits])),
+            "trees": int(np.median([f["trees"] for f in fits])),
+            "wall_s": wall, "fit_s": fit_s,
+            "fit_rows_per_s": sum(f["train_rows"] for f in fits) / fit_s,
+            "predict_rows_per_s": sum(f["test_rows"] for f in fits) / sum(f["predict_s"] for f in fits)}
+
+
+def search(cache, configs, workers=None, on_result=None, backend="gbr"):
+    """Cross-validate every config on a process pool; returns one summary per config, best first."""
+    _, _, _, meta = load_cached(cache)
+    tasks = [(i, fold) for i in range(len(configs)) for fold in range(meta["folds"])]
+    fits = {i: [] for i in range(len(configs))}
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = {pool.submit(_fit_fold, cache, backend, configs[i], fold): i for i, fold in tasks}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            fits[i].append(fut.result())
+            if len(fits[i]) == meta["folds"]:
+                results.append(summarize(configs[i], fits[i]))
+                if on_result:
+                    on_result(results[-1])
+    return sorted(results, key=lambda s: s["cv_rmse"])
+
+
+def fit_final(cache, params, backend="gbr"):
+    """Best config refit on every cached row, as a DataFrame so the model keeps feature names."""
+    import pandas as pd
+    X, y, _, meta = load_cached(cache)
+    t = time.perf_counter()
+    model = BACKENDS[backend].make(**params).fit(
+        pd.DataFrame(np.asarray(X), columns=meta["features"]), np.asarray(y))
+    return model, time.perf_counter() - t
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Retrain the ETA model with a parallel CV grid search.")
+    ap.add_argument("--backend", choices=sorted(BACKENDS), default="gbr")
+    ap.add_argument("--grid", choices=("default", "quick"), default="default")
+    ap.add_argument("--folds", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    ap.add_argument("--registry", default=DEFAULT_ROOT)
+    ap.add_argument("--name", default=DEFAULT_NAME)
+    ap.add_argument("--no-promote", action="store_true", help="register without switching CURRENT")
+    ap.add_argument("--dry-run", action="store_true", help="search only; register nothing")
+    args = ap.parse_args(argv)
+
+    t = time.perf_counter()
+    df = data_store.load_clean_frame()
+    key = dataset_key(df, FEATURES, args.folds, args.seed)
+    cached = os.path.exists(os.path.join(CACHE_DIR, key, "meta.json"))
+    cache = prepare(df, FEATURES, args.folds, args.seed)
+    print(f"{len(df):,} rows, {args.folds} folds, data {'cached' if cached else 'encoded'} "
+          f"in {time.perf_counter() - t:.2f}s -> {cache}")
+
+    backend = BACKENDS[args.backend]
+    configs = expand_grid(backend.grids[args.grid])
+    print(f"{backend.estimator}: {len(configs)} configs x {args.folds} folds on {args.workers or os.cpu_count()} workers")
+    label = lambda params: " ".join(f"{k}={v}" for k, v in params.items())
+    width = max(len(label(c)) for c in configs)
+    print(f"  {'params':<{width}} {'RMSE':>6} {'±':>5} {'MAE':>6} {'trees':>5} {'wall s':>7} "
+          f"{'fit rows/s':>11} {'pred rows/s':>11}")
+
+    def show(s):
+        print(f"  {label(s['params']):<{width}} {s['cv_rmse']:6.3f} {s['cv_rmse_std']:5.3f} "
+              f"{s['cv_mae']:6.3f} {s['trees']:5d} "
+              f"{s['wall_s']:7.1f} {s['fit_rows_per_s']:11,.0f} {s['predict_rows_per_s']:11,.0f}")
+
+    t = time.perf_counter()
+    results = search(cache, configs, args.workers, show, args.backend)
+    search_s = time.perf_counter() - t
+    best = results[0]
+    print(f"search: {search_s:.1f}s wall; best CV RMSE {best['cv_rmse']:.3f} with {best['params']}")
+    if args.dry_run:
+        return
+
+    model, fit_s = fit_final(cache, best["params"], args.backend)
+    print(f"final fit on all rows: {fit_s:.1f}s, {n_trees(model)} trees")
+    metrics = {k: best[k] for k in ("cv_rmse", "cv_rmse_std", "cv_mae")}
+    metrics.update(folds=args.folds, rows=len(df), search_s=round(search_s, 2), configs=len(configs))
+    store = data_store.read_manifest(data_store.DEFAULT_DIR) or {}
+    source = {"dataset_key": key, "grid": args.grid, "seed": args.seed,
+              "base_params": backend.base_params,
+              **{k: store.get(k) for k in ("source_sha256", "clean_version")}}
+    version = Registry(args.registry).register(model, FEATURES, args.name, metrics=metrics,
+                                               source=source, promote=not args.no_promote)
+    print(f"registered {args.name} v{version}" + ("" if args.no_promote else " (CURRENT)"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Flat-array inference kernel for the fitted gradient-boosting ensembles.
+
+`compile_model` copies every tree of the ensemble into five contiguous
+arrays (feature, threshold, left, right, value) addressed by a global node
+id, with `roots` holding each tree's first node. Leaves point back at
+themselves with an infinite threshold, so `FlatEnsemble.predict` can walk
+all trees for a whole batch in lock-step for exactly `depth` gather steps,
+with no per-estimator Python dispatch, input validation or DataFrame
+conversion.
+
+    flat = compile_model(model)
+    flat.predict(np.array([[30, 4.5, 5.0, 2, 2]]))
+    flat.save("model_flat.npz");  FlatEnsemble.load("model_flat.npz")
+
+Rows are cast to the dtype the estimator compares in before routing:
+float32 for GradientBoostingRegressor (sklearn's tree code), float64 for
+HistGradientBoostingRegressor, whose trees are read from its predictors
+(numeric splits only; inputs must not be NaN). Routing therefore matches
+`model.predict` and outputs agree to float rounding. The
+kernel targets small batches and single rows; for millions of rows sklearn's
+compiled per-tree loop is still the faster path.
+"""
+import argparse
+
+import numpy as np
+
+_LEAF = -1
+_ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+
+class FlatEnsemble:
+    def __init__(self, feature, threshold, left, right, value, roots, init, depth, n_features,
+                 x_dtype="float32"):
+        self.feature   = np.ascontiguousarray(feature,   dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left      = np.ascontiguousarray(left,      dtype=np.intp)
+        self.right     = np.ascontiguousarray(right,     dtype=np.intp)
+        self.value     = np.ascontiguousarray(value,     dtype=np.float64)
+        self.roots     = np.ascontiguousarray(roots,     dtype=np.intp)
+        self.init, self.depth, self.n_features = float(init), int(depth), int(n_features)
+        self.x_dtype = np.dtype(str(x_dtype))
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def predict(self, X, block_rows=256) -> np.ndarray:
+        """ETA for an (n, n_features) array-like; evaluated in row blocks to bound memory."""
+        X = np.asarray(X, dtype=self.x_dtype)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"expected {self.n_features} features, got {X.shape[1]}")
+        out = np.empty(len(X), dtype=np.float64)
+        for i in range(0, len(X), block_rows):
+            out[i:i + block_rows] = self._predict_block(X[i:i + block_rows])
+        return out
+
+    def _predict_block(self, X):
+        # (rows, trees) matrix of current node ids; X is addressed flat so
+        # each step is three 1-D `take` gathers.
+        flat_x = X.ravel()
+        row_base = (np.arange(len(X), dtype=np.intp) * self.n_features)[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.depth):
+            go_left = flat_x.take(row_base + self.feature.take(node)) <= self.threshold.take(node)
+            node = np.where(go_left, self.left.take(node), self.right.take(node))
+        return self.init + self.value.take(node).sum(axis=1)
+
+    def save(self, path):
+        np.savez(path, init=self.init, depth=self.depth, n_features=self.n_features,
+                 x_dtype=self.x_dtype.name, **{k: getattr(self, k) for k in _ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            return cls(**{k: z[k] for k in _ARRAYS}, init=z["init"], depth=z["depth"],
+                       n_features=z["n_features"], x_dtype=z["x_dtype"] if "x_dtype" in z else "float32")
+
+
+def compile_model(model) -> FlatEnsemble:
+    """Flatten a fitted squared-error GradientBoostingRegressor or HistGradientBoostingRegressor."""
+    if isinstance(getattr(model, "flat", None), FlatEnsemble):  # model_registry.RegistryModel
+        return model.flat
+    if type(model).__name__ == "HistGradientBoostingRegressor" and model.loss == "squared_error":
+        return _compile_hist(model)
+    if type(model).__name__ != "GradientBoostingRegressor" or model.loss != "squared_error":
+        raise TypeError("compile_model supports squared_error (Hist)GradientBoostingRegressor only")
+    init = 0.0 if model.init_ == "zero" else float(np.ravel(model.init_.constant_)[0])
+    lr = model.learning_rate
+
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset, depth = 0, 0
+    for est in model.estimators_[:, 0]:
+        t = est.tree_
+        leaf = t.children_left == _LEAF
+        ids = np.arange(t.node_count) + offset
+        roots.append(offset)
+        feature.append(np.where(leaf, 0, t.feature))
+        threshold.append(np.where(leaf, np.inf, t.threshold))
+        left.append(np.where(leaf, ids, t.children_left + offset))
+        right.append(np.where(leaf, ids, t.children_right + offset))
+        value.append(lr * t.value[:, 0, 0])
+        depth = max(depth, t.max_depth)
+        offset += t.node_count
+
+    return FlatEnsemble(np.concatenate(feature), np.concatenate(threshold),
+                        np.concatenate(left), np.concatenate(right),
+                        np.concatenate(value), np.array(roots),
+                        init=init, depth=depth, n_features=model.n_features_in_)
+
+
+def _compile_hist(model) -> FlatEnsemble:
+    # Leaf values already include the learning rate; `num_threshold` splits are `x <= t` in float64.
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset, depth = 0, 0
+    for (p,) in model._predictors:
+        n = p.nodes
+        if n["is_categorical"].any():
+            raise TypeError("compile_model does not support categorical splits")
+        leaf = n["is_leaf"].astype(bool)
+        ids = np.arange(len(n)) + offset
+        roots.append(offset)
+        feature.append(np.where(leaf, 0, n["feature_idx"]))
+        threshold.append(np.where(leaf, np.inf, n["num_threshold"]))
+        left.append(np.where(leaf, ids, n["left"].astype(np.intp) + offset))
+        right.append(np.where(leaf, ids, n["right"].astype(np.intp) + offset))
+        value.append(np.where(leaf, n["value"], 0.0))
+        depth = max(depth, int(n["depth"].max()))
+        offset += len(n)
+
+    return FlatEnsemble(np.concatenate(feature), np.concatenate(threshold),
+                        np.concatenate(left), np.concatenate(right),
+                        np.concatenate(value), np.array(roots),
+                        init=float(np.ravel(model._baseline_prediction)[0]), depth=depth,
+                        n_features=model.n_features_in_, x_dtype="float64")
+
+
+def main(argv=None):
+    from inference import load_model
+    ap = argparse.ArgumentParser(description="Export the shipped model as flat tree arrays.")
+    ap.add_argument("dst", nargs="?", default="delivery_time_model_flat.npz")
+    args = ap.parse_args(argv)
+    flat = compile_model(load_model()[0])
+    flat.save(args.dst)
+    print(f"{flat.n_trees} trees, {flat.n_nodes} nodes, depth {flat.depth} -> {args.dst}")
+
+
+if __name__ == "__main__":
+    main()